@@ -0,0 +1,127 @@
+# Fichier : agent/budget.py
+# Budget de temps d'un tour : ce que l'agent a déjà appris (observations des
+# outils) est noté au fil du tour ; si l'échéance tombe avant la réponse
+# finale, on répond avec ces observations plutôt qu'avec un message d'excuse.
+
+import threading
+from typing import Any, Dict, List, Optional, Tuple
+from uuid import UUID
+
+from langchain_core.callbacks import BaseCallbackHandler
+
+from agent.telemetry import PARSING_ERROR_TOOL
+
+# Taille maximale d'une observation reprise dans une réponse partielle.
+OBSERVATION_MAX_CHARS = 1500
+
+PARTIAL_ANSWER_PROMPT = """Tu es un assistant de voyage IA. Le temps imparti pour
+répondre est écoulé. Réponds en français, de façon concise, à la question de
+l'utilisateur en t'appuyant uniquement sur les résultats d'outils ci-dessous.
+Indique clairement ce qui n'a pas pu être vérifié.
+
+Question : {question}
+
+Résultats déjà obtenus :
+{observations}
+"""
+
+
+class ObservationRecorder(BaseCallbackHandler):
+    """
+    Callbacks d'un seul tour : résultats des outils terminés et étape en
+    cours (appel LLM ou outil), pour attribuer une échéance atteinte.
+    """
+
+    run_inline = True
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.observations: List[Tuple[str, str, str]] = []  # (outil, entrée, résultat)
+        self._tools: Dict[UUID, Tuple[str, str]] = {}
+        self._llm_runs = set()
+
+    def on_chat_model_start(self, serialized, messages, *, run_id: UUID, **kwargs: Any) -> None:
+        with self._lock:
+            self._llm_runs.add(run_id)
+
+    def on_llm_start(self, serialized, prompts, *, run_id: UUID, **kwargs: Any) -> None:
+        with self._lock:
+            self._llm_runs.add(run_id)
+
+    def on_llm_end(self, response, *, run_id: UUID, **kwargs: Any) -> None:
+        with self._lock:
+            self._llm_runs.discard(run_id)
+
+    def on_llm_error(self, error: BaseException, *, run_id: UUID, **kwargs: Any) -> None:
+        with self._lock:
+            self._llm_runs.discard(run_id)
+
+    def on_tool_start(self, serialized, input_str, *, run_id: UUID, **kwargs: Any) -> None:
+        name = (serialized or {}).get("name") or kwargs.get("name") or "tool"
+        with self._lock:
+            self._tools[run_id] = (name, str(input_str))
+
+    def on_tool_end(self, output, *, run_id: UUID, **kwargs: Any) -> None:
+        with self._lock:
+            run = self._tools.pop(run_id, None)
+            if run is not None and run[0] != PARSING_ERROR_TOOL:
+                text = getattr(output, "content", output)
+                self.observations.append((run[0], run[1], str(text)))
+
+    def on_tool_error(self, error: BaseException, *, run_id: UUID, **kwargs: Any) -> None:
+        with self._lock:
+            self._tools.pop(run_id, None)
+
+    def stage(self) -> str:
+        """Étape en cours : « tool:<nom> », « llm », ou « agent » entre deux étapes."""
+        with self._lock:
+            if self._tools:
+                return "tool:" + next(iter(self._tools.values()))[0]
+            return "llm" if self._llm_runs else "agent"
+
+    def render_observations(self) -> str:
+        with self._lock:
+            observations = list(self.observations)
+        blocks = []
+        for tool, tool_input, output in observations:
+            if len(output) > OBSERVATION_MAX_CHARS:
+                output = output[:OBSERVATION_MAX_CHARS].rstrip() + "..."
+            blocks.append(f"[{tool}] {tool_input}\n{output}")
+        return "\n\n".join(blocks)
+
+
+def format_partial_answer(recorder: ObservationRecorder) -> str:
+    """Réponse partielle sans LLM : les résultats bruts des outils déjà appelés."""
+    observations = recorder.render_observations()
+    if not observations:
+        return ("Je n'ai pas pu préparer de réponse dans le temps imparti. "
+                "Pourriez-vous réessayer, ou poser une question plus précise ?")
+    return ("Je n'ai pas pu terminer ma réponse dans le temps imparti. "
+            "Voici ce que j'ai déjà trouvé :\n\n" + observations)
+
+
+class DeadlineStats:
+    """Taux de tours ayant atteint leur échéance et issue des réponses partielles."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._stats = {"turns": 0, "deadline_hits": 0, "partial_synthesized": 0, "partial_raw": 0, "partial_empty": 0}
+        self._stages: Dict[str, int] = {}
+
+    def record(self, hit: bool = False, stage: Optional[str] = None, outcome: Optional[str] = None) -> None:
+        """outcome : synthesized (LLM), raw (observations brutes) ou empty (rien à montrer)."""
+        with self._lock:
+            self._stats["turns"] += 1
+            if hit:
+                self._stats["deadline_hits"] += 1
+                self._stages[stage or "agent"] = self._stages.get(stage or "agent", 0) + 1
+            if outcome:
+                self._stats[f"partial_{outcome}"] += 1
+
+    def stats(self) -> Dict:
+        with self._lock:
+            stats = dict(self._stats)
+            stages = dict(self._stages)
+        stats["hit_rate"] = stats["deadline_hits"] / stats["turns"] if stats["turns"] else 0.0
+        stats.update({f"hits_{stage}": count for stage, count in stages.items()})
+        return stats
@@ -0,0 +1,129 @@
+# Fichier : agent/concurrency.py
+
+import asyncio
+import threading
+import time
+from collections import OrderedDict, deque
+from contextlib import asynccontextmanager
+from typing import Dict, Optional
+
+
+class _Waiter:
+    __slots__ = ("loop", "future", "granted", "enqueued_at")
+
+    def __init__(self, loop, future):
+        self.loop = loop
+        self.future = future
+        self.granted = False
+        self.enqueued_at = time.monotonic()
+
+
+def _resolve(future):
+    if not future.done():
+        future.set_result(None)
+
+
+class FairLimiter:
+    """
+    Limiteur de concurrence global avec équité entre utilisateurs :
+    - au plus max_concurrent tours d'agent en même temps dans le processus ;
+    - au plus max_per_user tours simultanés pour un même utilisateur ;
+    - les places libérées sont distribuées à tour de rôle entre les
+      utilisateurs en attente, pour qu'un utilisateur très actif ne bloque
+      pas les autres.
+
+    Utilisable depuis plusieurs boucles asyncio / threads à la fois.
+    """
+
+    def __init__(self, max_concurrent: int = 16, max_per_user: int = 2):
+        self.max_concurrent = max_concurrent
+        self.max_per_user = max_per_user
+        self._lock = threading.Lock()
+        self._active = 0
+        self._per_user: Dict[str, int] = {}
+        self._waiting: "OrderedDict[str, deque]" = OrderedDict()
+        self._last_served: Dict[str, int] = {}
+        self._served = 0
+        self._stats = {"acquired": 0, "waited": 0, "wait_time_total": 0.0, "wait_time_max": 0.0}
+
+    def _dispatch_locked(self) -> None:
+        # Tour de rôle : l'utilisateur servi le moins récemment passe en premier.
+        for user_id in sorted(self._waiting, key=lambda u: self._last_served.get(u, -1)):
+            if self._active >= self.max_concurrent:
+                return
+            queue = self._waiting[user_id]
+            if self._per_user.get(user_id, 0) >= self.max_per_user:
+                continue
+            waiter = queue.popleft()
+            if not queue:
+                del self._waiting[user_id]
+            waiter.granted = True
+            self._active += 1
+            self._per_user[user_id] = self._per_user.get(user_id, 0) + 1
+            self._served += 1
+            self._last_served[user_id] = self._served
+            self._stats["acquired"] += 1
+            waited = time.monotonic() - waiter.enqueued_at
+            if waited > 0.001:
+                self._stats["waited"] += 1
+            self._stats["wait_time_total"] += waited
+            self._stats["wait_time_max"] = max(self._stats["wait_time_max"], waited)
+            waiter.loop.call_soon_threadsafe(_resolve, waiter.future)
+
+    async def acquire(self, user_id: str) -> None:
+        loop = asyncio.get_running_loop()
+        waiter = _Waiter(loop, loop.create_future())
+        with self._lock:
+            self._waiting.setdefault(user_id, deque()).append(waiter)
+            self._dispatch_locked()
+        try:
+            await waiter.future
+        except asyncio.CancelledError:
+            with self._lock:
+                if waiter.granted:
+                    self._release_locked(user_id)
+                else:
+                    queue = self._waiting.get(user_id)
+                    if queue and waiter in queue:
+                        queue.remove(waiter)
+                        if not queue:
+                            del self._waiting[user_id]
+            raise
+
+    def _release_locked(self, user_id: str) -> None:
+        self._active -= 1
+        remaining = self._per_user.get(user_id, 1) - 1
+        if remaining > 0:
+            self._per_user[user_id] = remaining
+        else:
+            self._per_user.pop(user_id, None)
+            if user_id not in self._waiting:
+                self._last_served.pop(user_id, None)
+        self._dispatch_locked()
+
+    def release(self, user_id: str) -> None:
+        with self._lock:
+            self._release_locked(user_id)
+
+    @asynccontextmanager
+    async def slot(self, user_id: str, timeout: Optional[float] = None):
+        """Place pour la durée du bloc ; asyncio.TimeoutError si elle n'arrive pas dans `timeout` secondes."""
+        if timeout is None:
+            await self.acquire(user_id)
+        else:
+            await asyncio.wait_for(self.acquire(user_id), max(timeout, 0.0))
+        try:
+            yield
+        finally:
+            self.release(user_id)
+
+    def stats(self) -> Dict:
+        with self._lock:
+            stats = dict(self._stats)
+            stats.update({
+                "active": self._active,
+                "waiting": sum(len(q) for q in self._waiting.values()),
+                "max_concurrent": self.max_concurrent,
+                "max_per_user": self.max_per_user,
+            })
+        return stats
@@ -0,0 +1,71 @@
+# Fichier : agent/factory.py
+# Construction de l'agent selon le mode choisi (AGENT_MODE) :
+# - "react" : prompt texte Thought/Action/Observation ;
+# - "tools" : appel de fonctions natif du modèle, plusieurs outils par tour.
+
+from langchain.agents import create_react_agent, create_tool_calling_agent
+from langchain.prompts import ChatPromptTemplate, MessagesPlaceholder, PromptTemplate
+
+AGENT_MODES = ("react", "tools")
+
+REACT_TEMPLATE = """
+Tu es un assistant de voyage IA. Réponds en français. Tu as accès aux outils suivants :
+
+{tools}
+
+Utilise le format suivant :
+Question: la question de l'utilisateur
+Thought: tu dois réfléchir à ce que tu vas faire
+Action: l'action à entreprendre, doit être l'un des outils suivants [{tool_names}]
+Action Input: l'entrée pour l'action
+Observation: le résultat de l'action
+... (ce cycle peut se répéter)
+Thought: Je connais maintenant la réponse finale
+Final Answer: la réponse finale à la question
+
+Instructions :
+1. Pour toute question sur une ville, utilise TOUJOURS l'outil `travel_database_tool` en premier.
+2. Pour comparer plusieurs villes ou préparer un itinéraire en plusieurs étapes, utilise
+   `compare_destinations_tool` une seule fois avec toutes les villes.
+3. Pour un programme jour par jour dans une ville (durée, budget), utilise `plan_itinerary_tool`
+   et rédige le plan qu'il renvoie sans refaire les calculs.
+4. Si ces outils ne renvoient rien d'utile, utilise `internet_search`.
+
+Commençons !
+
+Historique : {chat_history}
+Question: {input}
+Scratchpad : {agent_scratchpad}
+"""
+
+TOOLS_SYSTEM_TEMPLATE = """
+Tu es un assistant de voyage IA. Réponds en français.
+
+Instructions :
+1. Pour toute question sur une ville, utilise TOUJOURS l'outil `travel_database_tool` en premier.
+2. Pour comparer plusieurs villes, utilise `compare_destinations_tool` une seule fois avec toutes les villes.
+3. Pour un programme jour par jour dans une ville (durée, budget), utilise `plan_itinerary_tool`
+   et rédige le plan qu'il renvoie sans refaire les calculs.
+4. Si ces outils ne renvoient rien d'utile, utilise `internet_search`.
+5. Quand plusieurs informations indépendantes sont nécessaires (plusieurs villes,
+   base de données et recherche web...), demande tous les appels d'outils en une seule fois.
+
+Historique : {chat_history}
+"""
+
+react_prompt = PromptTemplate.from_template(REACT_TEMPLATE)
+
+tools_prompt = ChatPromptTemplate.from_messages([
+    ("system", TOOLS_SYSTEM_TEMPLATE),
+    ("human", "{input}"),
+    MessagesPlaceholder("agent_scratchpad"),
+])
+
+
+def build_agent(llm, tools, mode: str = "react"):
+    """Renvoie le runnable de l'agent pour le mode demandé."""
+    if mode not in AGENT_MODES:
+        raise ValueError(f"AGENT_MODE inconnu : {mode} (attendu : {', '.join(AGENT_MODES)})")
+    if mode == "tools":
+        return create_tool_calling_agent(llm, tools, tools_prompt)
+    return create_react_agent(llm, tools, react_prompt)
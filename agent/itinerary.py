@@ -0,0 +1,230 @@
+# Fichier : agent/itinerary.py
+# Planification déterministe d'un séjour dans une ville : choix de
+# l'hébergement et répartition des activités par jour sous contraintes
+# (heures par jour, budget total). Le modèle n'a plus qu'à rédiger le plan
+# au lieu de jongler avec durées et prix sur plusieurs itérations ReAct.
+
+import heapq
+import time
+from typing import Dict, List, Optional, Sequence, Tuple
+
+# Part du budget réservée aux repas et transports sur place.
+ESSENTIALS_SHARE = 0.3
+# Durée supposée d'une activité sans durée renseignée (heures).
+DEFAULT_ACTIVITY_HOURS = 2.0
+# Une activité dans les centres d'intérêt vaut trois activités quelconques.
+INTEREST_BONUS = 2.0
+# Le confort de l'hébergement (type préféré, note) pèse comme une activité.
+LODGING_WEIGHT = 1.0
+# Hébergements essayés (les mieux classés) et activités candidates (les plus
+# intéressantes par heure et par euro) : bornent le temps de calcul.
+LODGING_CANDIDATES = 8
+ACTIVITY_CANDIDATES = 200
+LOCAL_SEARCH_ROUNDS = 20
+
+
+def _hours(activity: Dict) -> float:
+    value = activity.get("duration_hours")
+    return float(value) if value is not None else DEFAULT_ACTIVITY_HOURS
+
+
+def _price(item: Dict, field: str = "price") -> float:
+    value = item.get(field)
+    return float(value) if value is not None else 0.0
+
+
+def _activity_value(activity: Dict, categories: Sequence[str]) -> float:
+    category = (activity.get("category") or "").lower()
+    return 1.0 + (INTEREST_BONUS if category in categories else 0.0)
+
+
+def candidate_activities(activities: List[Dict], hours_per_day: float, budget: float,
+                         categories: Sequence[str] = ()) -> List[Tuple[float, float, float, Dict]]:
+    """
+    (valeur, heures, prix, activité) des ACTIVITY_CANDIDATES activités les
+    plus intéressantes par heure et par euro, calculées une fois par plan.
+    """
+    items = []
+    for activity in activities:
+        hours, price = _hours(activity), _price(activity)
+        if hours <= hours_per_day and price <= budget:
+            items.append((_activity_value(activity, categories), hours, price, activity))
+    scale = budget if budget != float("inf") else None
+
+    def density(item):
+        value, hours, price, _ = item
+        return value / (hours / hours_per_day + (price / scale if scale else 0.0) + 1e-9)
+
+    return heapq.nlargest(ACTIVITY_CANDIDATES, items, key=density)
+
+
+def schedule_activities(items: List[Tuple[float, float, float, Dict]], days: int, hours_per_day: float,
+                        budget: float) -> Dict:
+    """
+    Sac à dos multiple : chaque activité au plus une fois, au plus
+    hours_per_day heures par jour, coût total ≤ budget. Glouton (dans l'ordre
+    de candidate_activities, jour le moins chargé d'abord) puis recherche
+    locale : échanges d'une activité planifiée contre une meilleure (ou aussi
+    bonne et moins chère), puis ajouts avec le temps et l'argent libérés.
+    """
+    plan: List[List[Tuple]] = [[] for _ in range(days)]
+    used = [0.0] * days
+    cost = 0.0
+
+    def place(item) -> bool:
+        nonlocal cost
+        _, hours, price, _ = item
+        if cost + price > budget:
+            return False
+        fitting = [d for d in range(days) if used[d] + hours <= hours_per_day]
+        if not fitting:
+            return False
+        day = min(fitting, key=used.__getitem__)  # jours équilibrés
+        plan[day].append(item)
+        used[day] += hours
+        cost += price
+        return True
+
+    unplanned = [item for item in items if not place(item)]
+
+    for _ in range(LOCAL_SEARCH_ROUNDS):
+        improved = False
+        planned = [item for day in plan for item in day]
+        if not planned:
+            break
+        # Un candidat ne peut rien améliorer s'il vaut moins que toutes les
+        # activités planifiées, ou autant sans être moins cher qu'aucune.
+        lowest_value = min(item[0] for item in planned)
+        highest_price = max(item[2] for item in planned if item[0] == lowest_value)
+        for u_index, candidate in enumerate(unplanned):
+            value, hours, price, _ = candidate
+            if value < lowest_value or (value == lowest_value and price >= highest_price):
+                continue
+            best = None
+            for day in range(days):
+                slack = hours_per_day - used[day]
+                for s_index, (s_value, s_hours, s_price, _) in enumerate(plan[day]):
+                    gain = (value - s_value, s_price - price)
+                    if gain <= (0, 0) or value < s_value:
+                        continue
+                    if hours - s_hours > slack or cost - s_price + price > budget:
+                        continue
+                    if best is None or gain > best[0]:
+                        best = (gain, day, s_index)
+            if best is not None:
+                _, day, s_index = best
+                current = plan[day][s_index]
+                plan[day][s_index] = candidate
+                used[day] += hours - current[1]
+                cost += price - current[2]
+                unplanned[u_index] = current
+                improved = True
+        remaining = []
+        for candidate in unplanned:
+            if place(candidate):
+                improved = True
+            else:
+                remaining.append(candidate)
+        unplanned = remaining
+        if not improved:
+            break
+
+    return {
+        "days": [
+            {"day": d + 1, "activities": [item[3] for item in plan[d]], "hours": round(used[d], 1),
+             "cost": round(sum(item[2] for item in plan[d]), 2)}
+            for d in range(days)
+        ],
+        "cost": round(cost, 2),
+        "value": sum(item[0] for day in plan for item in day),
+    }
+
+
+def plan_trip(accommodations: List[Dict], activities: List[Dict], days: int, budget_per_day: Optional[float] = None,
+              hours_per_day: float = 8.0, accommodation_type: Optional[str] = None,
+              categories: Sequence[str] = ()) -> Dict:
+    """
+    Plan d'un séjour de `days` jours (days - 1 nuits, au moins une) : pour
+    chacun des hébergements les mieux classés qui tiennent dans le budget,
+    planifie les activités avec le reste et garde la meilleure combinaison.
+    Sans budget, seules les heures par jour limitent le plan.
+    """
+    start = time.perf_counter()
+    days = max(1, int(days))
+    nights = max(days - 1, 1)
+    categories = [c.lower() for c in categories]
+    total = float(budget_per_day) * days if budget_per_day else float("inf")
+    essentials = total * ESSENTIALS_SHARE if budget_per_day else 0.0
+    wanted_type = (accommodation_type or "").lower()
+
+    def lodging_score(acc):
+        rating = float(acc["rating"]) if acc.get("rating") is not None else 2.5
+        return (2.0 if (acc.get("type") or "").lower() == wanted_type else 0.0) + rating / 5
+
+    lodgings = [a for a in accommodations if a.get("average_price_per_night") is not None]
+    affordable = [a for a in lodgings if nights * _price(a, "average_price_per_night") <= total - essentials]
+    affordable.sort(key=lambda a: (-lodging_score(a), _price(a, "average_price_per_night")))
+
+    items = candidate_activities(activities, hours_per_day, total - essentials, categories)
+    best = None
+    # Sans budget, l'hébergement ne change rien aux activités : un seul essai.
+    for lodging in affordable[:LODGING_CANDIDATES if budget_per_day else 1] or [None]:
+        lodging_cost = nights * _price(lodging, "average_price_per_night") if lodging else 0.0
+        schedule = schedule_activities(items, days, hours_per_day, total - essentials - lodging_cost)
+        value = schedule["value"] + (LODGING_WEIGHT * lodging_score(lodging) if lodging else 0.0)
+        if best is None or value > best[0]:
+            best = (value, lodging, lodging_cost, schedule)
+
+    _, lodging, lodging_cost, schedule = best
+    planned = sum(len(day["activities"]) for day in schedule["days"])
+    return {
+        "days": schedule["days"],
+        "lodging": dict(lodging, nights=nights, total=round(lodging_cost, 2)) if lodging else None,
+        "budget": {
+            "total": round(total, 2) if budget_per_day else None,
+            "lodging": round(lodging_cost, 2),
+            "activities": schedule["cost"],
+            "essentials": round(essentials, 2) if budget_per_day else None,
+            "remaining": round(total - essentials - lodging_cost - schedule["cost"], 2) if budget_per_day else None,
+        },
+        "activities_planned": planned,
+        "activities_available": len(activities),
+        "no_affordable_lodging": bool(lodgings) and not affordable,
+        "solve_ms": round((time.perf_counter() - start) * 1000, 2),
+    }
+
+
+def format_itinerary(city: str, plan: Dict, days: int, budget_per_day: Optional[float], hours_per_day: float) -> str:
+    """Plan jour par jour compact, à reformuler par le modèle (chiffres exacts)."""
+    budget = plan["budget"]
+    header = f"Itinéraire {city} — {days} jour(s), {hours_per_day:g} h d'activités max par jour"
+    if budget_per_day:
+        header += f", budget {budget_per_day:g}€/jour ({budget['total']:g}€ au total)"
+    lines = [header]
+    lodging = plan["lodging"]
+    if lodging:
+        lines.append(
+            f"Hébergement : {lodging['name']} ({lodging.get('type')}), {lodging['average_price_per_night']}€/nuit "
+            f"× {lodging['nights']} nuit(s) = {lodging['total']:g}€, note {lodging.get('rating')}"
+        )
+    elif plan["no_affordable_lodging"]:
+        lines.append("Hébergement : aucun dans le budget (en chercher un autre avec internet_search)")
+    else:
+        lines.append("Hébergement : aucun dans la base")
+    for day in plan["days"]:
+        if not day["activities"]:
+            lines.append(f"Jour {day['day']} : journée libre")
+            continue
+        items = []
+        for a in day["activities"]:
+            details = [f"{a['duration_hours']}h" if a.get("duration_hours") is not None else f"~{DEFAULT_ACTIVITY_HOURS:g}h",
+                       f"{a['price']}€" if a.get("price") is not None else "prix non renseigné"]
+            items.append(f"{a['name']} ({a.get('category')}, {', '.join(details)})")
+        lines.append(f"Jour {day['day']} ({day['hours']:g} h, {day['cost']:g}€) : " + " ; ".join(items))
+    if budget_per_day:
+        lines.append(
+            f"Budget : hébergement {budget['lodging']:g}€ + activités {budget['activities']:g}€ "
+            f"+ repas/transports {budget['essentials']:g}€ réservés = reste {budget['remaining']:g}€"
+        )
+    lines.append(f"{plan['activities_planned']} activité(s) planifiée(s) sur {plan['activities_available']} disponibles.")
+    return "\n".join(lines)
@@ -0,0 +1,320 @@
+# Fichier : agent/llm_cache.py
+# Cache des réponses du LLM (Gemini, temperature=0) : un même prompt (modèle,
+# paramètres, messages complets) renvoie la même réponse sans rappeler
+# l'API. Branché via le paramètre `cache` des modèles de chat LangChain ; le
+# stockage est interchangeable (mémoire, fichier SQLite, table PostgreSQL).
+#
+#   llm = ChatGoogleGenerativeAI(..., cache=create_completion_cache())
+
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from typing import Dict, Optional, Sequence, Tuple
+
+from langchain_core.caches import BaseCache
+from langchain_core.messages import message_to_dict, messages_from_dict
+from langchain_core.outputs import ChatGeneration
+
+
+class MemoryCompletionStore:
+    """Stockage en mémoire (LRU) : propre au processus, perdu au redémarrage."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._entries: "OrderedDict[str, Tuple[str, float]]" = OrderedDict()
+
+    def get(self, key: str) -> Optional[Tuple[str, float]]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+            return entry
+
+    def set(self, key: str, value: str, created_at: float) -> None:
+        with self._lock:
+            self._entries[key] = (value, created_at)
+            self._entries.move_to_end(key)
+
+    def trim(self, max_entries: int, expired_before: float) -> int:
+        with self._lock:
+            removed = 0
+            for key in [k for k, (_, created_at) in self._entries.items() if created_at < expired_before]:
+                del self._entries[key]
+                removed += 1
+            while len(self._entries) > max_entries:
+                self._entries.popitem(last=False)
+                removed += 1
+            return removed
+
+    def count(self) -> int:
+        with self._lock:
+            return len(self._entries)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+
+class SQLiteCompletionStore:
+    """Fichier SQLite local, partagé par les processus d'une même machine."""
+
+    def __init__(self, path: str):
+        if path != ":memory:":
+            os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._lock = threading.Lock()
+        with self._lock, self._conn:
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute("""
+                CREATE TABLE IF NOT EXISTS llm_cache (
+                    cache_key TEXT PRIMARY KEY,
+                    completion TEXT NOT NULL,
+                    created_at REAL NOT NULL,
+                    last_access REAL NOT NULL
+                )
+            """)
+            self._conn.execute("CREATE INDEX IF NOT EXISTS idx_llm_cache_last_access ON llm_cache (last_access)")
+
+    def get(self, key: str) -> Optional[Tuple[str, float]]:
+        with self._lock, self._conn:
+            row = self._conn.execute(
+                "SELECT completion, created_at FROM llm_cache WHERE cache_key = ?", (key,)
+            ).fetchone()
+            if row is not None:
+                self._conn.execute("UPDATE llm_cache SET last_access = ? WHERE cache_key = ?", (time.time(), key))
+            return row
+
+    def set(self, key: str, value: str, created_at: float) -> None:
+        with self._lock, self._conn:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO llm_cache (cache_key, completion, created_at, last_access) VALUES (?, ?, ?, ?)",
+                (key, value, created_at, created_at),
+            )
+
+    def trim(self, max_entries: int, expired_before: float) -> int:
+        with self._lock, self._conn:
+            removed = self._conn.execute("DELETE FROM llm_cache WHERE created_at < ?", (expired_before,)).rowcount
+            count = self._conn.execute("SELECT COUNT(*) FROM llm_cache").fetchone()[0]
+            if count > max_entries:
+                removed += self._conn.execute(
+                    "DELETE FROM llm_cache WHERE cache_key IN "
+                    "(SELECT cache_key FROM llm_cache ORDER BY last_access LIMIT ?)",
+                    (count - max_entries,),
+                ).rowcount
+            return removed
+
+    def count(self) -> int:
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM llm_cache").fetchone()[0]
+
+    def clear(self) -> None:
+        with self._lock, self._conn:
+            self._conn.execute("DELETE FROM llm_cache")
+
+
+class PostgresCompletionStore:
+    """
+    Table llm_cache (database/init/07_llm_cache.sql), partagée par tous les
+    réplicas : une réponse obtenue par l'un sert à tous.
+    """
+
+    def get(self, key: str) -> Optional[Tuple[str, float]]:
+        from database.postgres_db import get_db_connection
+        # Un seul aller-retour : lecture et date du dernier accès (éviction LRU).
+        with get_db_connection() as conn:
+            with conn.cursor() as cur:
+                cur.execute(
+                    """
+                    UPDATE llm_cache SET last_access = now() WHERE cache_key = %s
+                    RETURNING completion, extract(epoch FROM created_at)::float8;
+                    """,
+                    (key,),
+                )
+                return cur.fetchone()
+
+    def set(self, key: str, value: str, created_at: float) -> None:
+        from database.postgres_db import get_db_connection
+        with get_db_connection() as conn:
+            with conn.cursor() as cur:
+                cur.execute(
+                    """
+                    INSERT INTO llm_cache (cache_key, completion, created_at, last_access)
+                    VALUES (%s, %s, to_timestamp(%s), now())
+                    ON CONFLICT (cache_key) DO UPDATE
+                    SET completion = EXCLUDED.completion, created_at = EXCLUDED.created_at, last_access = now();
+                    """,
+                    (key, value, created_at),
+                )
+
+    def trim(self, max_entries: int, expired_before: float) -> int:
+        from database.postgres_db import get_db_connection
+        with get_db_connection() as conn:
+            with conn.cursor() as cur:
+                cur.execute("DELETE FROM llm_cache WHERE created_at < to_timestamp(%s);", (expired_before,))
+                removed = cur.rowcount
+                cur.execute(
+                    """
+                    DELETE FROM llm_cache WHERE cache_key IN (
+                        SELECT cache_key FROM llm_cache ORDER BY last_access DESC OFFSET %s
+                    );
+                    """,
+                    (max_entries,),
+                )
+                return removed + cur.rowcount
+
+    def count(self) -> int:
+        from database.postgres_db import get_db_connection
+        with get_db_connection() as conn:
+            with conn.cursor() as cur:
+                cur.execute("SELECT COUNT(*) FROM llm_cache;")
+                return cur.fetchone()[0]
+
+    def clear(self) -> None:
+        from database.postgres_db import get_db_connection
+        with get_db_connection() as conn:
+            with conn.cursor() as cur:
+                cur.execute("DELETE FROM llm_cache;")
+
+
+class CompletionCache(BaseCache):
+    """
+    Cache exact des complétions : la clé est l'empreinte SHA-256 du modèle et
+    de ses paramètres (llm_string de LangChain, qui inclut temperature et stop)
+    et du prompt sérialisé. Les entrées expirent après `ttl` secondes ;
+    au-delà de `max_entries`, les moins récemment lues sont supprimées
+    (vérifié toutes les `trim_every` écritures).
+
+    Seules les réponses de chat non vides sont conservées, sans leurs
+    identifiants ni leur consommation de tokens : une réponse servie par le
+    cache ne coûte aucun quota.
+    """
+
+    def __init__(self, store, ttl: float = 7 * 86400.0, max_entries: int = 10_000, trim_every: int = 100):
+        self.store = store
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.trim_every = trim_every
+        self._lock = threading.Lock()
+        self._writes_since_trim = 0
+        self._stats = {"hits": 0, "misses": 0, "expired": 0, "writes": 0, "evictions": 0, "errors": 0}
+
+    @staticmethod
+    def key(prompt: str, llm_string: str) -> str:
+        return hashlib.sha256(f"{llm_string}\x00{_canonical_prompt(prompt)}".encode("utf-8")).hexdigest()
+
+    def _count(self, name: str, n: int = 1) -> None:
+        with self._lock:
+            self._stats[name] += n
+
+    def lookup(self, prompt: str, llm_string: str) -> Optional[Sequence[ChatGeneration]]:
+        try:
+            entry = self.store.get(self.key(prompt, llm_string))
+        except Exception as e:
+            # Cache indisponible : on appelle le LLM normalement.
+            print(f"Erreur de lecture du cache LLM : {e}")
+            self._count("errors")
+            return None
+        if entry is None:
+            self._count("misses")
+            return None
+        completion, created_at = entry
+        if self.ttl and time.time() - created_at > self.ttl:
+            self._count("expired")
+            self._count("misses")
+            return None
+        self._count("hits")
+        return [ChatGeneration(message=message) for message in messages_from_dict(json.loads(completion))]
+
+    def update(self, prompt: str, llm_string: str, return_val: Sequence) -> None:
+        if not return_val or not all(
+            isinstance(generation, ChatGeneration) and (generation.message.content or generation.message.additional_kwargs)
+            for generation in return_val
+        ):
+            return
+        messages = []
+        for generation in return_val:
+            message = generation.message.model_copy(update={"id": None})
+            if hasattr(message, "usage_metadata"):
+                message.usage_metadata = None
+            messages.append(message_to_dict(message))
+        try:
+            self.store.set(self.key(prompt, llm_string), json.dumps(messages, ensure_ascii=False), time.time())
+        except Exception as e:
+            print(f"Erreur d'écriture dans le cache LLM : {e}")
+            self._count("errors")
+            return
+        with self._lock:
+            self._stats["writes"] += 1
+            self._writes_since_trim += 1
+            trim = self._writes_since_trim >= self.trim_every
+            if trim:
+                self._writes_since_trim = 0
+        if trim:
+            self.trim()
+
+    def trim(self) -> int:
+        """Supprime les entrées expirées puis les moins récemment lues au-delà de max_entries."""
+        try:
+            removed = self.store.trim(self.max_entries, time.time() - self.ttl if self.ttl else 0.0)
+        except Exception as e:
+            print(f"Erreur lors du nettoyage du cache LLM : {e}")
+            self._count("errors")
+            return 0
+        self._count("evictions", removed)
+        return removed
+
+    def clear(self, **kwargs) -> None:
+        self.store.clear()
+
+    def stats(self) -> Dict:
+        with self._lock:
+            stats = dict(self._stats)
+        lookups = stats["hits"] + stats["misses"]
+        stats["hit_rate"] = stats["hits"] / lookups if lookups else 0.0
+        return stats
+
+
+def _canonical_prompt(prompt: str) -> str:
+    """
+    Prompt sans les identifiants des messages (« run-<uuid> » attribués à
+    chaque réponse) : un même historique donne la même clé d'une session à l'autre.
+    """
+    try:
+        messages = json.loads(prompt)
+    except ValueError:
+        return prompt
+
+    def strip_ids(node):
+        if isinstance(node, dict):
+            return {k: strip_ids(v) for k, v in node.items() if not (k == "id" and isinstance(v, (str, type(None))))}
+        if isinstance(node, list):
+            return [strip_ids(v) for v in node]
+        return node
+
+    return json.dumps(strip_ids(messages), sort_keys=True, ensure_ascii=False)
+
+
+def create_completion_cache() -> Optional[CompletionCache]:
+    """Construit le cache à partir des variables LLM_CACHE_* (None si LLM_CACHE=off)."""
+    backend = os.getenv("LLM_CACHE", "sqlite")  # memory | sqlite | postgres | off
+    if backend == "off":
+        return None
+    if backend == "memory":
+        store = MemoryCompletionStore()
+        trim_every = 1
+    elif backend == "postgres":
+        store = PostgresCompletionStore()
+        trim_every = 500
+    else:
+        store = SQLiteCompletionStore(os.getenv("LLM_CACHE_PATH", ".cache/llm_cache.sqlite3"))
+        trim_every = 100
+    return CompletionCache(
+        store,
+        ttl=float(os.getenv("LLM_CACHE_TTL", str(7 * 86400))),
+        max_entries=int(os.getenv("LLM_CACHE_MAX_ENTRIES", "10000")),
+        trim_every=trim_every,
+    )
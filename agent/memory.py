@@ -0,0 +1,124 @@
+# Fichier : agent/memory.py
+
+import threading
+import time
+from collections import OrderedDict
+from typing import Callable, Dict, List
+
+from langchain.memory import ConversationSummaryBufferMemory
+from langchain.prompts import PromptTemplate
+from langchain_core.messages import BaseMessage
+
+SUMMARY_PROMPT = PromptTemplate.from_template("""
+Résume progressivement la conversation entre un voyageur et son assistant,
+en ajoutant les nouvelles lignes au résumé existant. Conserve les destinations,
+dates, budgets et préférences ; reste sous {max_words} mots.
+
+Résumé actuel :
+{summary}
+
+Nouvelles lignes :
+{new_lines}
+
+Nouveau résumé :
+""")
+
+
+def estimate_tokens(text: str) -> int:
+    """Estimation locale (~4 caractères par token) : pas d'appel réseau à Gemini."""
+    return len(text) // 4 + 1
+
+
+class TokenBudgetMemory(ConversationSummaryBufferMemory):
+    """
+    Mémoire de conversation bornée : les derniers échanges sont gardés tels
+    quels tant qu'ils tiennent dans max_token_limit, les plus anciens sont
+    repliés dans un résumé. Le résumé n'est recalculé qu'à partir de
+    l'ancien résumé et des messages qui sortent de la fenêtre.
+    """
+
+    max_summary_tokens: int = 300
+
+    def _count_tokens(self, messages: List[BaseMessage]) -> int:
+        return sum(estimate_tokens(str(m.content)) for m in messages)
+
+    def _pop_overflow(self) -> List[BaseMessage]:
+        buffer = self.chat_memory.messages
+        pruned_memory = []
+        # On retire par paires (question + réponse) pour garder un historique cohérent.
+        while buffer and self._count_tokens(buffer) > self.max_token_limit:
+            pruned_memory.extend(buffer[:2])
+            del buffer[:2]
+        return pruned_memory
+
+    def _set_summary(self, summary: str) -> None:
+        # Garde-fou si le modèle ne respecte pas la longueur demandée.
+        max_chars = self.max_summary_tokens * 4
+        self.moving_summary_buffer = summary[-max_chars:] if len(summary) > max_chars else summary
+
+    def prune(self) -> None:
+        pruned_memory = self._pop_overflow()
+        if pruned_memory:
+            self._set_summary(self.predict_new_summary(pruned_memory, self.moving_summary_buffer))
+
+    async def aprune(self) -> None:
+        pruned_memory = self._pop_overflow()
+        if pruned_memory:
+            self._set_summary(await self.apredict_new_summary(pruned_memory, self.moving_summary_buffer))
+
+
+def create_session_memory(llm, max_token_limit: int = 1500, max_summary_tokens: int = 300) -> TokenBudgetMemory:
+    return TokenBudgetMemory(
+        llm=llm,
+        prompt=SUMMARY_PROMPT.partial(max_words=str(int(max_summary_tokens * 0.75))),
+        memory_key="chat_history",
+        output_key="output",
+        return_messages=False,
+        max_token_limit=max_token_limit,
+        max_summary_tokens=max_summary_tokens,
+    )
+
+
+class SessionStore:
+    """
+    Associe un objet (ici un AgentExecutor et sa mémoire) à chaque session.
+    Borné à max_sessions entrées : la session la moins récemment utilisée est
+    évincée, ainsi que toute session inactive depuis plus de idle_ttl secondes.
+    """
+
+    def __init__(self, factory: Callable[[str], object], max_sessions: int = 200, idle_ttl: float = 3600.0):
+        self.factory = factory
+        self.max_sessions = max_sessions
+        self.idle_ttl = idle_ttl
+        self._sessions = OrderedDict()  # session_id -> (objet, dernière_utilisation)
+        self._lock = threading.Lock()
+        self._evictions = 0
+
+    def _evict_locked(self, now: float) -> None:
+        while self._sessions:
+            session_id, (_, last_used) = next(iter(self._sessions.items()))
+            if len(self._sessions) > self.max_sessions or now - last_used > self.idle_ttl:
+                del self._sessions[session_id]
+                self._evictions += 1
+            else:
+                break
+
+    def get(self, session_id: str):
+        now = time.monotonic()
+        with self._lock:
+            entry = self._sessions.pop(session_id, None)
+            value = entry[0] if entry else None
+        if value is None:
+            value = self.factory(session_id)
+        with self._lock:
+            self._sessions[session_id] = (value, now)
+            self._evict_locked(now)
+        return value
+
+    def drop(self, session_id: str) -> None:
+        with self._lock:
+            self._sessions.pop(session_id, None)
+
+    def stats(self) -> Dict:
+        with self._lock:
+            return {"sessions": len(self._sessions), "max_sessions": self.max_sessions, "evictions": self._evictions}
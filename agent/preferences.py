@@ -0,0 +1,76 @@
+# Fichier : agent/preferences.py
+# Préférences de la barre latérale (style, budget, intérêts) converties en
+# filtres de travel_database_tool. Elles sont portées par une ContextVar le
+# temps d'un tour : l'outil les lit sans que le modèle ait à les recopier.
+
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Dict, Iterator, Optional
+
+# Part du budget journalier consacrée à l'hébergement.
+LODGING_SHARE = 0.5
+
+TRAVEL_STYLE_TYPES = {
+    "confort": "hotel",
+    "backpacker": "hostel",
+}
+
+INTEREST_CATEGORIES = {
+    "culture": ["culture"],
+    "gastronomie": ["food"],
+    "nature": ["nature"],
+    "sport": ["adventure"],
+    "plage": ["beach"],
+}
+
+_current_preferences: ContextVar[Optional[Dict]] = ContextVar("travel_agent_preferences", default=None)
+
+
+def preferences_to_filters(preferences: Optional[Dict]) -> Dict:
+    """
+    {"travel_style": "Confort (hôtels, voiture)", "budget_per_day": 100,
+     "interests": ["Culture", ...]} -> filtres par défaut de l'outil.
+    """
+    if not preferences:
+        return {}
+    filters = {}
+    budget = preferences.get("budget_per_day")
+    if budget:
+        filters["max_price_per_night"] = round(float(budget) * LODGING_SHARE, 2)
+    style = (preferences.get("travel_style") or "").strip().lower()
+    for prefix, accommodation_type in TRAVEL_STYLE_TYPES.items():
+        if style.startswith(prefix):
+            filters["accommodation_type"] = accommodation_type
+            break
+    categories = []
+    for interest in preferences.get("interests") or []:
+        for category in INTEREST_CATEGORIES.get(interest.strip().lower(), []):
+            if category not in categories:
+                categories.append(category)
+    if categories:
+        filters["activity_categories"] = categories
+    return filters
+
+
+@contextmanager
+def use_preferences(preferences: Optional[Dict]) -> Iterator[None]:
+    """Rend `preferences` visibles des outils appelés dans le bloc (tâches incluses)."""
+    token = _current_preferences.set(preferences)
+    try:
+        yield
+    finally:
+        try:
+            _current_preferences.reset(token)
+        except ValueError:
+            # Générateur asynchrone fermé depuis un autre contexte : rien à restaurer.
+            pass
+
+
+def current_filters() -> Dict:
+    """Filtres issus des préférences du tour en cours ({} hors d'un tour)."""
+    return preferences_to_filters(_current_preferences.get())
+
+
+def current_preferences() -> Dict:
+    """Préférences brutes du tour en cours (durée, budget...) ; {} hors d'un tour."""
+    return dict(_current_preferences.get() or {})
@@ -0,0 +1,143 @@
+# Fichier : agent/router.py
+# Pré-routeur : répond directement aux simples demandes d'informations sur une
+# ville connue, sans passer par la boucle ReAct (au moins deux appels Gemini).
+
+import threading
+import time
+from typing import Dict, Optional
+
+from database.postgres_db import format_city_summary, get_all_cities
+from utils.text import normalize_text
+
+# Mots autorisés autour du nom de la ville pour qu'une question reste une
+# « simple consultation ». Tout autre mot (durée, budget, comparaison,
+# itinéraire...) renvoie vers l'agent.
+LOOKUP_WORDS = {
+    # français
+    "parle", "parlez", "moi", "nous", "de", "d", "du", "des", "la", "le", "les", "l",
+    "sur", "a", "au", "aux", "en", "pour", "que", "quoi", "qu", "est", "ce", "c",
+    "info", "infos", "information", "informations", "renseignements", "presentation",
+    "je", "veux", "voudrais", "aimerais", "savoir", "connaitre", "decouvrir",
+    "dis", "dites", "donne", "donnez", "quelles", "quels", "quel", "quelle", "sont",
+    "faire", "visiter", "voir", "hotels", "hotel", "hebergements", "hebergement",
+    "activites", "activite", "vaccins", "vaccin", "ville", "destination", "svp", "stp",
+    "il", "y", "peut", "on", "tout", "bonjour", "salut", "merci",
+    # anglais
+    "tell", "me", "about", "what", "is", "there", "to", "do", "in", "the",
+    "please", "hi", "hello", "things", "see",
+}
+
+PHRASING_PROMPT = """Tu es un assistant de voyage IA. Réponds en français, de façon
+chaleureuse et concise, à la question de l'utilisateur en t'appuyant uniquement
+sur les informations ci-dessous.
+
+Question : {question}
+
+Informations :
+{record}
+"""
+
+
+def render_city_answer(city: str, details: Dict, filters: Dict, max_chars: int = 2400) -> str:
+    """
+    Réponse du raccourci : le même résumé que travel_database_tool (mêmes
+    préférences, même `limit`, même borne de taille), à partir de la fiche
+    filtrée et classée.
+    """
+    return format_city_summary(city, details, filters, max_chars=max_chars)
+
+
+class CityRouter:
+    """
+    Index en mémoire des noms de villes (normalisés) et statistiques du
+    raccourci. L'index est rechargé au plus tard après `refresh_interval`
+    secondes, ou dès qu'une invalidation est reçue (mark_stale).
+    """
+
+    def __init__(self, refresh_interval: float = 300.0, max_words: int = 12):
+        self.refresh_interval = refresh_interval
+        self.max_words = max_words
+        self._index: Dict[str, Optional[str]] = {}
+        self._max_city_words = 1
+        self._loaded_at = 0.0
+        self._lock = threading.Lock()
+        self._stats = {
+            "requests": 0,
+            "hits": 0,
+            "fast_path_time_total": 0.0,
+            "agent_turns": 0,
+            "agent_time_total": 0.0,
+            "latency_saved_total": 0.0,
+        }
+
+    def mark_stale(self, _city: str = "*") -> None:
+        self._loaded_at = 0.0
+
+    def _ensure_index(self) -> None:
+        if time.monotonic() - self._loaded_at < self.refresh_interval:
+            return
+        with self._lock:
+            if time.monotonic() - self._loaded_at < self.refresh_interval:
+                return
+            index: Dict[str, Optional[str]] = {}
+            for row in get_all_cities():
+                key = normalize_text(row["city"])
+                # Deux destinations du même nom : ambigu, on laisse l'agent trancher.
+                index[key] = None if key in index else row["city"]
+            self._index = index
+            self._max_city_words = max((len(k.split()) for k in index), default=1)
+            self._loaded_at = time.monotonic()
+
+    def match(self, user_input: str) -> Optional[str]:
+        """
+        Renvoie le nom de la ville si la question est une simple demande
+        d'informations sur une seule ville connue, None sinon.
+        """
+        words = normalize_text(user_input).split()
+        if not words or len(words) > self.max_words:
+            return None
+        try:
+            self._ensure_index()
+        except Exception as e:
+            print(f"Erreur lors du chargement de l'index des villes : {e}")
+            return None
+
+        # Recherche des n-grammes (du plus long au plus court) présents dans l'index.
+        found = None
+        remaining = list(words)
+        for size in range(min(self._max_city_words, len(words)), 0, -1):
+            for start in range(len(remaining) - size + 1):
+                key = " ".join(remaining[start:start + size])
+                if key in self._index:
+                    if found is not None or self._index[key] is None:
+                        return None
+                    found = self._index[key]
+                    remaining = remaining[:start] + remaining[start + size:]
+                    break
+        if found is None:
+            return None
+        if any(word not in LOOKUP_WORDS for word in remaining):
+            return None
+        return found
+
+    def record(self, hit: bool, elapsed: float) -> None:
+        with self._lock:
+            self._stats["requests"] += 1
+            if hit:
+                self._stats["hits"] += 1
+                self._stats["fast_path_time_total"] += elapsed
+                if self._stats["agent_turns"]:
+                    avg_agent = self._stats["agent_time_total"] / self._stats["agent_turns"]
+                    self._stats["latency_saved_total"] += max(avg_agent - elapsed, 0.0)
+            else:
+                self._stats["agent_turns"] += 1
+                self._stats["agent_time_total"] += elapsed
+
+    def stats(self) -> Dict:
+        with self._lock:
+            stats = dict(self._stats)
+            stats["indexed_cities"] = len(self._index)
+        stats["hit_rate"] = stats["hits"] / stats["requests"] if stats["requests"] else 0.0
+        stats["fast_path_avg"] = stats["fast_path_time_total"] / stats["hits"] if stats["hits"] else 0.0
+        stats["agent_avg"] = stats["agent_time_total"] / stats["agent_turns"] if stats["agent_turns"] else 0.0
+        return stats
@@ -0,0 +1,179 @@
+# Fichier : agent/search_cache.py
+# Cache persistant de l'outil internet_search (DuckDuckGo) : les mêmes
+# recherches ("visa Japon"...) ne sont plus refaites pour chaque utilisateur.
+
+import asyncio
+import os
+import sqlite3
+import threading
+import time
+from typing import Callable, Dict, Optional
+
+from langchain.tools import BaseTool
+
+from utils.deadline import time_left
+from utils.rate_limit import TokenBucket
+from utils.singleflight import SingleFlight
+from utils.text import normalize_text
+
+
+class SearchCache:
+    """
+    Stockage SQLite local des résultats de recherche, borné en durée de vie
+    (ttl, secondes) et en nombre d'entrées (les moins récemment lues sont
+    supprimées en premier).
+    """
+
+    def __init__(self, path: str, ttl: float = 86400.0, max_entries: int = 5000):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        if path != ":memory:":
+            os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._lock = threading.Lock()
+        self._stats = {"hits": 0, "misses": 0, "stale_hits": 0, "evictions": 0}
+        with self._lock, self._conn:
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute("""
+                CREATE TABLE IF NOT EXISTS search_cache (
+                    query_key TEXT PRIMARY KEY,
+                    result TEXT NOT NULL,
+                    created_at REAL NOT NULL,
+                    last_access REAL NOT NULL
+                )
+            """)
+            self._conn.execute("CREATE INDEX IF NOT EXISTS idx_search_cache_last_access ON search_cache (last_access)")
+
+    def get(self, key: str, allow_stale: bool = False) -> Optional[str]:
+        now = time.time()
+        with self._lock, self._conn:
+            row = self._conn.execute(
+                "SELECT result, created_at FROM search_cache WHERE query_key = ?", (key,)
+            ).fetchone()
+            if row is None:
+                self._stats["misses"] += 1
+                return None
+            result, created_at = row
+            if self.ttl and now - created_at > self.ttl:
+                if allow_stale:
+                    self._stats["stale_hits"] += 1
+                    return result
+                self._stats["misses"] += 1
+                return None
+            self._conn.execute("UPDATE search_cache SET last_access = ? WHERE query_key = ?", (now, key))
+            self._stats["hits"] += 1
+            return result
+
+    def set(self, key: str, result: str) -> None:
+        now = time.time()
+        with self._lock, self._conn:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO search_cache (query_key, result, created_at, last_access) VALUES (?, ?, ?, ?)",
+                (key, result, now, now),
+            )
+            count = self._conn.execute("SELECT COUNT(*) FROM search_cache").fetchone()[0]
+            if count > self.max_entries:
+                excess = count - self.max_entries
+                self._conn.execute(
+                    "DELETE FROM search_cache WHERE query_key IN "
+                    "(SELECT query_key FROM search_cache ORDER BY last_access LIMIT ?)",
+                    (excess,),
+                )
+                self._stats["evictions"] += excess
+
+    def purge_expired(self) -> int:
+        with self._lock, self._conn:
+            cur = self._conn.execute("DELETE FROM search_cache WHERE created_at < ?", (time.time() - self.ttl,))
+            return cur.rowcount
+
+    def stats(self) -> Dict:
+        with self._lock:
+            stats = dict(self._stats)
+            stats["entries"] = self._conn.execute("SELECT COUNT(*) FROM search_cache").fetchone()[0]
+        lookups = stats["hits"] + stats["misses"]
+        stats["hit_rate"] = stats["hits"] / lookups if lookups else 0.0
+        return stats
+
+
+class CachedSearchTool(BaseTool):
+    """
+    Outil internet_search avec cache persistant, regroupement des requêtes
+    identiques simultanées et limitation de débit vers le moteur de recherche.
+    `backend` est la fonction de recherche réelle (DuckDuckGo en production,
+    une fausse fonction dans les tests).
+    """
+
+    name: str = "internet_search"
+    description: str = (
+        "Recherche sur internet (DuckDuckGo). Utile pour l'actualité, les visas, "
+        "la météo ou les villes absentes de la base. L'entrée est une requête de recherche."
+    )
+    backend: Callable[[str], str]
+    cache: SearchCache
+    rate_limiter: TokenBucket
+    flight: SingleFlight
+    rate_limit_timeout: float = 30.0
+
+    def _fetch(self, key: str, query: str) -> str:
+        # Pas d'attente du limiteur au-delà de l'échéance du tour en cours.
+        self.rate_limiter.acquire(timeout=time_left("tool:internet_search", self.rate_limit_timeout))
+        result = self.backend(query)
+        if result and result.strip():
+            self.cache.set(key, result)
+        return result
+
+    def _run(self, query: str, run_manager=None) -> str:
+        key = normalize_text(query)
+        cached = self.cache.get(key)
+        if cached is not None:
+            return cached
+        try:
+            return self.flight.do(key, lambda: self._fetch(key, query))
+        except Exception:
+            # Moteur indisponible ou limite atteinte : un résultat expiré vaut mieux que rien.
+            stale = self.cache.get(key, allow_stale=True)
+            if stale is not None:
+                return stale
+            raise
+
+    async def _arun(self, query: str, run_manager=None) -> str:
+        key = normalize_text(query)
+        cached = self.cache.get(key)
+        if cached is not None:
+            return cached
+        try:
+            # Moteur et limiteur bloquants : exécutés hors de la boucle, la
+            # requête partagée avec les appels synchrones identiques en cours.
+            return await self.flight.ado(key, lambda: asyncio.to_thread(self._fetch, key, query))
+        except Exception:
+            stale = self.cache.get(key, allow_stale=True)
+            if stale is not None:
+                return stale
+            raise
+
+    def stats(self) -> Dict:
+        return {
+            "cache": self.cache.stats(),
+            "coalescing": self.flight.stats(),
+            "rate_limiter": self.rate_limiter.stats(),
+        }
+
+
+def create_cached_search_tool(backend: Optional[Callable[[str], str]] = None) -> CachedSearchTool:
+    """Construit l'outil à partir des variables SEARCH_CACHE_* / SEARCH_RATE_*."""
+    if backend is None:
+        from langchain_community.tools import DuckDuckGoSearchRun
+        backend = DuckDuckGoSearchRun().run
+    return CachedSearchTool(
+        backend=backend,
+        cache=SearchCache(
+            os.getenv("SEARCH_CACHE_PATH", ".cache/search_cache.sqlite3"),
+            ttl=float(os.getenv("SEARCH_CACHE_TTL", "86400")),
+            max_entries=int(os.getenv("SEARCH_CACHE_MAX_ENTRIES", "5000")),
+        ),
+        rate_limiter=TokenBucket(
+            rate=float(os.getenv("SEARCH_RATE_LIMIT", "1")),
+            burst=int(os.getenv("SEARCH_RATE_BURST", "3")),
+        ),
+        flight=SingleFlight(),
+    )
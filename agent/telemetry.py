@@ -0,0 +1,122 @@
+# Fichier : agent/telemetry.py
+# Gestionnaire de callbacks LangChain qui transforme les événements de l'agent
+# en étapes (utils/tracing) : appels LLM (tokens, latence), appels d'outils,
+# et relances après une sortie ReAct mal formée.
+
+import threading
+import time
+from typing import Any, Dict, Optional, Tuple
+from uuid import UUID
+
+from langchain_core.callbacks import BaseCallbackHandler
+
+from agent.memory import estimate_tokens
+from utils.metrics import registry
+from utils.tracing import record_span
+
+llm_tokens = registry.counter("travel_agent_llm_tokens_total", "Tokens envoyés (in) et reçus (out) par modèle")
+parsing_retries = registry.counter(
+    "travel_agent_parsing_retries_total", "Sorties du modèle illisibles renvoyées à l'agent (handle_parsing_errors)"
+)
+
+# Outil fictif utilisé par AgentExecutor pour renvoyer une erreur d'analyse au modèle.
+PARSING_ERROR_TOOL = "_Exception"
+
+
+def _model_name(serialized: Optional[Dict], kwargs: Dict) -> str:
+    params = kwargs.get("invocation_params") or {}
+    name = params.get("model") or params.get("model_name") or (serialized or {}).get("name")
+    return str(name or "llm").replace("models/", "")
+
+
+def _usage(response) -> Tuple[Optional[int], Optional[int]]:
+    """Tokens (entrée, sortie) rapportés par le fournisseur, si disponibles."""
+    try:
+        message = response.generations[0][0].message
+        usage = getattr(message, "usage_metadata", None)
+        if usage:
+            return usage.get("input_tokens"), usage.get("output_tokens")
+    except (AttributeError, IndexError):
+        pass
+    token_usage = (response.llm_output or {}).get("token_usage") or {}
+    return token_usage.get("prompt_tokens"), token_usage.get("completion_tokens")
+
+
+class TelemetryCallbackHandler(BaseCallbackHandler):
+    """
+    À passer dans config={"callbacks": [...]} des appels de l'agent. Sans
+    état propre à un tour : une seule instance sert tout le processus.
+    """
+
+    # Traitement en ligne (quelques microsecondes), pas de passage par un thread.
+    run_inline = True
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._llm_runs: Dict[UUID, Tuple[float, str, int]] = {}
+        self._tool_runs: Dict[UUID, Tuple[float, str]] = {}
+
+    # --- LLM ---
+
+    def _start_llm(self, run_id: UUID, serialized, kwargs, prompt_text: str) -> None:
+        with self._lock:
+            self._llm_runs[run_id] = (time.perf_counter(), _model_name(serialized, kwargs), estimate_tokens(prompt_text))
+
+    def on_chat_model_start(self, serialized, messages, *, run_id: UUID, **kwargs: Any) -> None:
+        text = "".join(str(m.content) for batch in messages for m in batch)
+        self._start_llm(run_id, serialized, kwargs, text)
+
+    def on_llm_start(self, serialized, prompts, *, run_id: UUID, **kwargs: Any) -> None:
+        self._start_llm(run_id, serialized, kwargs, "".join(prompts))
+
+    def on_llm_end(self, response, *, run_id: UUID, **kwargs: Any) -> None:
+        with self._lock:
+            run = self._llm_runs.pop(run_id, None)
+        if run is None:
+            return
+        start, model, estimated_in = run
+        tokens_in, tokens_out = _usage(response)
+        estimated = tokens_in is None or tokens_out is None
+        if tokens_in is None:
+            tokens_in = estimated_in
+        if tokens_out is None:
+            text = "".join(g.text for batch in response.generations for g in batch)
+            tokens_out = estimate_tokens(text)
+        llm_tokens.inc(tokens_in, model=model, direction="in")
+        llm_tokens.inc(tokens_out, model=model, direction="out")
+        record_span("llm", model, time.perf_counter() - start,
+                    tokens_in=tokens_in, tokens_out=tokens_out, tokens_estimated=estimated)
+
+    def on_llm_error(self, error: BaseException, *, run_id: UUID, **kwargs: Any) -> None:
+        with self._lock:
+            run = self._llm_runs.pop(run_id, None)
+        if run is not None:
+            record_span("llm", run[1], time.perf_counter() - run[0], status="error", error=type(error).__name__)
+
+    # --- Outils ---
+
+    def on_tool_start(self, serialized, input_str, *, run_id: UUID, **kwargs: Any) -> None:
+        name = (serialized or {}).get("name") or kwargs.get("name") or "tool"
+        if name == PARSING_ERROR_TOOL:
+            parsing_retries.inc()
+        with self._lock:
+            self._tool_runs[run_id] = (time.perf_counter(), name)
+
+    def on_tool_end(self, output, *, run_id: UUID, **kwargs: Any) -> None:
+        with self._lock:
+            run = self._tool_runs.pop(run_id, None)
+        if run is None:
+            return
+        if run[1] == PARSING_ERROR_TOOL:
+            record_span("retry", "parsing_error", time.perf_counter() - run[0])
+        else:
+            record_span("tool", run[1], time.perf_counter() - run[0])
+
+    def on_tool_error(self, error: BaseException, *, run_id: UUID, **kwargs: Any) -> None:
+        with self._lock:
+            run = self._tool_runs.pop(run_id, None)
+        if run is not None:
+            record_span("tool", run[1], time.perf_counter() - run[0], status="error", error=type(error).__name__)
+
+
+telemetry_handler = TelemetryCallbackHandler()
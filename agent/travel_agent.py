@@ -1,86 +1,687 @@
 # Fichier : agent/travel_agent.py (Version finale avec outil personnalisé)
 
 import os
+import asyncio
+import json
+import queue
+import threading
+import time
+from functools import lru_cache
+from typing import AsyncIterator, Dict, Iterator, List, Literal, Optional, Tuple, Union
 from dotenv import load_dotenv
 
-from langchain.agents import AgentExecutor, create_react_agent
-from langchain_community.tools import DuckDuckGoSearchRun
+from langchain.agents import AgentExecutor
 from langchain_google_genai import ChatGoogleGenerativeAI
-from langchain.memory import ConversationBufferMemory
-from langchain.prompts import PromptTemplate
-from langchain.tools import tool # Important : pour créer notre outil
+from langchain.tools import StructuredTool # Important : pour créer notre outil
+from pydantic import BaseModel, Field
 
 # On importe notre nouvelle fonction "couteau suisse"
-from database.postgres_db import get_info_for_city
+from database.postgres_db import warm_up_pool, get_pool_stats
+from database.conversation_store import get_history_stats
+from database.city_cache import (
+    get_cached_info_for_city, aget_cached_info_for_city, afetch_ranked_city, compare_cities, acompare_cities,
+    load_city_columns, start_invalidation_listener, add_invalidation_callback, get_city_cache_stats,
+    get_ranking_stats, TOOL_OUTPUT_MAX_CHARS,
+)
+from agent.memory import SessionStore, create_session_memory, estimate_tokens
+from agent.concurrency import FairLimiter
+from agent.router import CityRouter, PHRASING_PROMPT, render_city_answer
+from agent.search_cache import create_cached_search_tool
+from agent.llm_cache import create_completion_cache
+from agent.factory import build_agent
+from agent.preferences import current_filters, current_preferences, use_preferences
+from agent.itinerary import format_itinerary, plan_trip
+from agent.budget import PARTIAL_ANSWER_PROMPT, DeadlineStats, ObservationRecorder, format_partial_answer
+from agent.telemetry import telemetry_handler
+from utils.deadline import DeadlineExceeded, bounded, bounded_iter, record_hit, remaining, use_deadline
+from utils.metrics import registry, start_metrics_server
+from utils.singleflight import Abandoned, SingleFlight
+from utils.text import normalize_text
+from utils.tracing import trace
+
+# 1. Création de notre outil personnalisé (synchrone + asynchrone)
+# Filtres, classement et top-k sont évalués hors du modèle (NumPy ou SQL) ; les
+# arguments non fournis par le modèle reprennent les préférences de la barre
+# latérale (agent/preferences).
+TRAVEL_TOOL_MAX_LIMIT = 20
+
+class TravelDatabaseInput(BaseModel):
+    city: str = Field(description="Nom de la ville")
+    max_price_per_night: Optional[float] = Field(None, description="Prix maximum d'un hébergement par nuit (€)")
+    accommodation_type: Optional[str] = Field(None, description="Type d'hébergement : hotel, hostel...")
+    activity_category: Optional[str] = Field(None, description="Catégorie d'activité : culture, food, nature, adventure, beach...")
+    min_rating: Optional[float] = Field(None, description="Note minimale des hébergements (sur 5)")
+    limit: int = Field(5, description=f"Nombre maximum d'hébergements et d'activités (≤ {TRAVEL_TOOL_MAX_LIMIT})")
+    sort: Literal["best", "rating", "price"] = Field(
+        "best", description="Tri : best (selon les préférences), rating (meilleures notes) ou price (moins chers)"
+    )
+
+def _tool_filters(city: str, **arguments) -> Tuple[str, Dict]:
+    """
+    Fusionne les arguments de l'outil et les préférences du tour. En mode
+    ReAct, l'entrée est une chaîne : elle peut contenir un objet JSON.
+    """
+    text = city.strip()
+    if text.startswith("{"):
+        try:
+            parsed = json.loads(text)
+            text = str(parsed.pop("city", ""))
+            arguments.update({k: v for k, v in parsed.items() if k in TravelDatabaseInput.model_fields})
+        except (ValueError, AttributeError):
+            pass
+    filters = current_filters()
+    if arguments.get("activity_category"):
+        filters["activity_categories"] = [arguments.pop("activity_category")]
+    filters.update({k: v for k, v in arguments.items() if v is not None and k != "activity_category"})
+    filters["limit"] = max(1, min(int(filters.get("limit") or 5), TRAVEL_TOOL_MAX_LIMIT))
+    if filters.get("sort") not in ("best", "rating", "price"):
+        filters["sort"] = "best"
+    return text, filters
+
+def travel_database(city: str, max_price_per_night: Optional[float] = None, accommodation_type: Optional[str] = None,
+                    activity_category: Optional[str] = None, min_rating: Optional[float] = None,
+                    limit: int = 5, sort: str = "best") -> str:
+    """
+    Utilise cet outil pour obtenir les informations sur une ville : description,
+    vaccins, meilleurs hébergements et activités. L'entrée est le nom de la ville,
+    ou un objet JSON avec "city" et des filtres facultatifs (max_price_per_night,
+    accommodation_type, activity_category, min_rating, limit, sort = best | rating | price).
+    """
+    city, filters = _tool_filters(city, max_price_per_night=max_price_per_night,
+                                  accommodation_type=accommodation_type, activity_category=activity_category,
+                                  min_rating=min_rating, limit=limit, sort=sort)
+    return get_cached_info_for_city(city, filters)
+
+async def atravel_database(city: str, max_price_per_night: Optional[float] = None,
+                           accommodation_type: Optional[str] = None, activity_category: Optional[str] = None,
+                           min_rating: Optional[float] = None, limit: int = 5, sort: str = "best") -> str:
+    city, filters = _tool_filters(city, max_price_per_night=max_price_per_night,
+                                  accommodation_type=accommodation_type, activity_category=activity_category,
+                                  min_rating=min_rating, limit=limit, sort=sort)
+    return await aget_cached_info_for_city(city, filters)
+
+travel_database_tool = StructuredTool.from_function(
+    func=travel_database,
+    coroutine=atravel_database,
+    name="travel_database_tool",
+    args_schema=TravelDatabaseInput,
+)
+
+# Comparaison de plusieurs villes en un seul appel d'outil (une requête SQL)
+TRAVEL_COMPARE_MAX_CITIES = 8
+
+class CompareDestinationsInput(BaseModel):
+    # Une chaîne est aussi acceptée : c'est la forme de l'entrée en mode ReAct.
+    cities: Union[List[str], str] = Field(description=f"Villes à comparer (2 à {TRAVEL_COMPARE_MAX_CITIES})")
+
+def _compare_arguments(cities) -> Tuple[List[str], Dict]:
+    """En mode ReAct, l'entrée est une chaîne : liste JSON, objet {"cities": [...]} ou noms séparés par des virgules."""
+    if isinstance(cities, str):
+        text = cities.strip()
+        try:
+            parsed = json.loads(text)
+            cities = parsed.get("cities", []) if isinstance(parsed, dict) else parsed
+        except ValueError:
+            cities = text.replace(" et ", ",").replace(";", ",").split(",")
+    if isinstance(cities, str):
+        cities = [cities]
+    names = [str(city).strip().strip("\"'") for city in cities if str(city).strip()]
+    return names[:TRAVEL_COMPARE_MAX_CITIES], current_filters()
+
+def compare_destinations(cities: List[str]) -> str:
+    """
+    Utilise cet outil pour comparer plusieurs villes en un seul appel (budget par
+    jour, sécurité, meilleure période, hébergements le moins cher et le mieux noté).
+    L'entrée est la liste des villes, par exemple : Bangkok, Tokyo
+    """
+    names, filters = _compare_arguments(cities)
+    return compare_cities(names, filters)
+
+async def acompare_destinations(cities: List[str]) -> str:
+    names, filters = _compare_arguments(cities)
+    return await acompare_cities(names, filters)
+
+compare_destinations_tool = StructuredTool.from_function(
+    func=compare_destinations,
+    coroutine=acompare_destinations,
+    name="compare_destinations_tool",
+    args_schema=CompareDestinationsInput,
+)
+
+# Itinéraire jour par jour calculé hors du modèle (agent/itinerary), qui n'a
+# plus qu'à le rédiger
+ITINERARY_MAX_DAYS = 30
+ITINERARY_DEFAULT_DAYS = 3
+
+class PlanItineraryInput(BaseModel):
+    city: str = Field(description="Ville du séjour")
+    days: Optional[int] = Field(None, description=f"Nombre de jours (1 à {ITINERARY_MAX_DAYS})")
+    budget_per_day: Optional[float] = Field(None, description="Budget par jour (€), hébergement compris")
+    hours_per_day: float = Field(8.0, description="Heures d'activités maximum par jour")
 
-# 1. Création de notre outil personnalisé
-@tool
-def travel_database_tool(city: str) -> str:
+def _itinerary_arguments(city: str, **arguments) -> Tuple[str, Dict]:
+    """Comme _tool_filters : entrée JSON possible en mode ReAct, préférences du tour par défaut."""
+    text = city.strip()
+    if text.startswith("{"):
+        try:
+            parsed = json.loads(text)
+            text = str(parsed.pop("city", ""))
+            arguments.update({k: v for k, v in parsed.items() if k in PlanItineraryInput.model_fields})
+        except (ValueError, AttributeError):
+            pass
+    preferences = current_preferences()
+    filters = current_filters()
+    days = arguments.get("days") or preferences.get("duration_days") or ITINERARY_DEFAULT_DAYS
+    return text, {
+        "days": max(1, min(int(days), ITINERARY_MAX_DAYS)),
+        "budget_per_day": arguments.get("budget_per_day") or preferences.get("budget_per_day"),
+        "hours_per_day": max(1.0, min(float(arguments.get("hours_per_day") or 8.0), 14.0)),
+        "accommodation_type": filters.get("accommodation_type"),
+        "categories": filters.get("activity_categories") or [],
+    }
+
+def plan_itinerary(city: str, days: Optional[int] = None, budget_per_day: Optional[float] = None,
+                   hours_per_day: float = 8.0) -> str:
     """
-    Utilise cet outil pour obtenir toutes les informations sur une ville,
-    y compris les descriptions, vaccins, hôtels et activités.
-    L'entrée doit être uniquement le nom de la ville.
+    Utilise cet outil pour un programme de séjour jour par jour dans une ville
+    (« 7 jours à Paris avec 100€ par jour ») : hébergement choisi, activités
+    réparties par jour dans le budget et les heures disponibles. L'entrée est
+    le nom de la ville, ou un objet JSON avec "city", "days", "budget_per_day"
+    et "hours_per_day". Rédige la réponse à partir du plan, sans le recalculer.
     """
-    return get_info_for_city(city)
+    city, arguments = _itinerary_arguments(city, days=days, budget_per_day=budget_per_day, hours_per_day=hours_per_day)
+    try:
+        columns, note = load_city_columns(city)
+    except Exception as e:
+        print(f"Erreur lors de la connexion ou de la requête à la base de données : {e}")
+        return "Erreur lors de la récupération des informations de la base de données."
+    if columns is None:
+        return f"Je n'ai trouvé aucune information pour la ville de {city} dans la base de données."
+    plan = plan_trip(columns.accommodation_records(), columns.activity_records(), **arguments)
+    return note + format_itinerary(columns.destination.get("city", city), plan, arguments["days"],
+                                   arguments["budget_per_day"], arguments["hours_per_day"])
+
+async def aplan_itinerary(city: str, days: Optional[int] = None, budget_per_day: Optional[float] = None,
+                          hours_per_day: float = 8.0) -> str:
+    # Calcul en mémoire (quelques ms) ; seul le premier chargement de la ville attend la base.
+    return await asyncio.to_thread(plan_itinerary, city, days, budget_per_day, hours_per_day)
+
+plan_itinerary_tool = StructuredTool.from_function(
+    func=plan_itinerary,
+    coroutine=aplan_itinerary,
+    name="plan_itinerary_tool",
+    args_schema=PlanItineraryInput,
+)
 
 # 2. Initialisations
+# Les objets lourds (client Gemini, outil de recherche, agent) sont construits
+# à la première utilisation puis réutilisés : importer ce module reste rapide.
 load_dotenv()
-llm = ChatGoogleGenerativeAI(
-    model="gemini-1.5-pro-latest",
-    google_api_key=os.getenv("GEMINI_API_KEY"),
-    temperature=0,
-    convert_system_message_to_human=True
-)
+AGENT_MODE = os.getenv("AGENT_MODE", "react")
+
+@lru_cache(maxsize=None)
+def get_completion_cache():
+    # temperature=0 : un même prompt donne la même réponse, inutile de rappeler Gemini
+    return create_completion_cache()
+
+@lru_cache(maxsize=None)
+def get_llm() -> ChatGoogleGenerativeAI:
+    return ChatGoogleGenerativeAI(
+        model="gemini-1.5-pro-latest",
+        google_api_key=os.getenv("GEMINI_API_KEY"),
+        temperature=0,
+        convert_system_message_to_human=True,
+        cache=get_completion_cache(),
+    )
 
 # 3. Création de la liste d'outils
-search_tool = DuckDuckGoSearchRun(name="internet_search")
-tools = [travel_database_tool, search_tool] # Notre outil + la recherche web
-
-# 4. Le Prompt final, simplifié
-template = """
-Tu es un assistant de voyage IA. Réponds en français. Tu as accès aux outils suivants :
-
-{tools}
-
-Utilise le format suivant :
-Question: la question de l'utilisateur
-Thought: tu dois réfléchir à ce que tu vas faire
-Action: l'action à entreprendre, doit être l'un des outils suivants [{tool_names}]
-Action Input: l'entrée pour l'action
-Observation: le résultat de l'action
-... (ce cycle peut se répéter)
-Thought: Je connais maintenant la réponse finale
-Final Answer: la réponse finale à la question
-
-Instructions :
-1. Pour toute question sur une ville, utilise TOUJOURS l'outil `travel_database_tool` en premier.
-2. Si cet outil ne renvoie rien d'utile, utilise `internet_search`.
-
-Commençons !
-
-Historique : {chat_history}
-Question: {input}
-Scratchpad : {agent_scratchpad}
-"""
-
-prompt = PromptTemplate.from_template(template)
-
-# --- Le reste du fichier ne change pas ---
-memory = ConversationBufferMemory(memory_key="chat_history", return_messages=True)
-agent = create_react_agent(llm, tools, prompt)
-agent_executor = AgentExecutor(
-    agent=agent,
-    tools=tools,
-    memory=memory,
-    verbose=True,
-    max_iterations=6,
-    handle_parsing_errors=True
+@lru_cache(maxsize=None)
+def get_tools() -> list:
+    # Recherche DuckDuckGo derrière un cache persistant et un limiteur de débit
+    search_tool = create_cached_search_tool()
+    return [travel_database_tool, compare_destinations_tool, plan_itinerary_tool, search_tool] # Nos outils + la recherche web
+
+# 4. L'agent : prompt texte ReAct ou appel de fonctions natif (AGENT_MODE = react | tools)
+@lru_cache(maxsize=None)
+def get_agent():
+    return build_agent(get_llm(), get_tools(), AGENT_MODE)
+
+@lru_cache(maxsize=None)
+def warm_up() -> None:
+    """
+    Prépare tout ce dont un premier tour a besoin, une seule fois par processus :
+    agent, pool de connexions préchauffé (pas de TCP/TLS à la première question)
+    et écoute des invalidations du cache des villes (LISTEN/NOTIFY).
+    """
+    get_agent()
+    warm_up_pool()
+    start_invalidation_listener()
+    _start_metrics()
+
+# 5. Un AgentExecutor (et une mémoire) par session utilisateur
+def _create_session_executor(session_id: str) -> AgentExecutor:
+    memory = create_session_memory(
+        get_llm(),
+        max_token_limit=int(os.getenv("AGENT_MEMORY_TOKEN_BUDGET", "1500")),
+        max_summary_tokens=int(os.getenv("AGENT_SUMMARY_TOKEN_BUDGET", "300")),
+    )
+    return AgentExecutor(
+        agent=get_agent(),
+        tools=get_tools(),
+        memory=memory,
+        verbose=True,
+        max_iterations=6,  # la durée est bornée par l'échéance du tour (AGENT_TURN_BUDGET)
+        handle_parsing_errors=True
+    )
+
+sessions = SessionStore(
+    _create_session_executor,
+    max_sessions=int(os.getenv("AGENT_MAX_SESSIONS", "200")),
+    idle_ttl=float(os.getenv("AGENT_SESSION_IDLE_TTL", "3600")),
+)
+
+def reset_session(session_id: str) -> None:
+    """Oublie l'historique d'une session (ex. à la déconnexion)."""
+    sessions.drop(session_id)
+
+def restore_session(session_id: str, messages: List[Dict]) -> None:
+    """
+    Recharge dans la mémoire de l'agent les derniers messages d'une conversation
+    restaurée ({"role", "content"}), dans la limite de son budget de tokens.
+    Sans effet si la session a déjà un historique.
+    """
+    memory = sessions.get(session_id).memory
+    if memory.chat_memory.messages:
+        return
+    budget, kept = memory.max_token_limit, []
+    for message in reversed(messages):
+        budget -= estimate_tokens(message["content"])
+        if budget < 0:
+            break
+        kept.append(message)
+    for message in reversed(kept):
+        if message["role"] == "user":
+            memory.chat_memory.add_user_message(message["content"])
+        else:
+            memory.chat_memory.add_ai_message(message["content"])
+
+# Concurrence globale bornée, partagée équitablement entre utilisateurs
+limiter = FairLimiter(
+    max_concurrent=int(os.getenv("AGENT_MAX_CONCURRENCY", "16")),
+    max_per_user=int(os.getenv("AGENT_MAX_PER_USER", "2")),
 )
 
-def get_response(user_input: str) -> str:
+# 6. Raccourci déterministe : « parle-moi de Paris » est servi directement
+# depuis la base, sans boucle ReAct (FAST_PATH_MODE = template | llm | off).
+FAST_PATH_MODE = os.getenv("FAST_PATH_MODE", "template")
+router = CityRouter(refresh_interval=float(os.getenv("FAST_PATH_INDEX_REFRESH", "300")))
+add_invalidation_callback(router.mark_stale)
+
+async def _afast_path_answer(user_input: str, session_id: str) -> Optional[str]:
+    if FAST_PATH_MODE == "off":
+        return None
+    # match() peut recharger l'index depuis la base : hors de la boucle asyncio.
+    city = await asyncio.to_thread(router.match, user_input)
+    if city is None:
+        return None
+    # Mêmes filtres que l'outil appelé sans arguments : préférences du tour, limit par défaut.
+    city, filters = _tool_filters(city)
+    details = await afetch_ranked_city(city, filters)
+    if details is None:
+        return None
+    answer = render_city_answer(city, details, filters, max_chars=TOOL_OUTPUT_MAX_CHARS)
+    if FAST_PATH_MODE == "llm":
+        answer = (await get_llm().ainvoke(
+            PHRASING_PROMPT.format(question=user_input, record=answer), config=AGENT_CONFIG
+        )).content
+    await sessions.get(session_id).memory.asave_context({"input": user_input}, {"output": answer})
+    return answer
+
+def get_router_stats() -> Dict:
+    """Taux de réponses servies par le raccourci et latence économisée."""
+    return router.stats()
+
+# 7. Regroupement des premiers tours identiques : pendant un pic (« week-end à
+# Paris »), les premières questions identiques (texte normalisé, mêmes
+# préférences, session sans historique) posées en même temps partagent une
+# seule exécution. Chaque session reçoit la réponse dans sa propre mémoire.
+COALESCE_FIRST_TURNS = os.getenv("COALESCE_FIRST_TURNS", "on") == "on"
+turn_flight = SingleFlight()
+
+def _first_turn_key(user_input: str, session_id: str, preferences: Optional[Dict]) -> Optional[tuple]:
+    """Clé de regroupement, ou None si la session a déjà un historique."""
+    if not COALESCE_FIRST_TURNS:
+        return None
+    memory = sessions.get(session_id).memory
+    if memory.chat_memory.messages or memory.moving_summary_buffer:
+        return None
+    return AGENT_MODE, normalize_text(user_input), json.dumps(preferences or {}, sort_keys=True, ensure_ascii=False)
+
+async def _ashared_answer(future, user_input: str, session_id: str) -> Optional[str]:
+    """Réponse du tour identique en cours, enregistrée dans la session ; None s'il a été abandonné."""
+    try:
+        # shield : annuler cette attente n'annule pas le tour partagé.
+        answer = await asyncio.shield(asyncio.wrap_future(future))
+    except Abandoned:
+        return None
+    await sessions.get(session_id).memory.asave_context({"input": user_input}, {"output": answer})
+    return answer
+
+def get_coalescing_stats() -> Dict:
+    """Travail évité : tours, lectures de ville et recherches web partagés."""
+    city = get_city_cache_stats()
+    search = get_tools()[-1].flight.stats()
+    turns = turn_flight.stats()
+    return {
+        "turns_shared": turns["shared"],
+        "turns_executed": turns["executions"],
+        "turns_in_flight": turns["in_flight"],
+        "city_lookups_shared": city["coalesced_lookups"],
+        "searches_shared": search["shared"],
+        "searches_executed": search["executions"],
+    }
+
+# 8. Échéance des tours : chaque tour dispose de AGENT_TURN_BUDGET secondes
+# (0 = sans limite, l'API passe l'échéance de la requête), propagées aux
+# appels LLM et aux outils (annulation) ainsi qu'aux requêtes SQL
+# (statement_timeout). À échéance, l'agent répond avec ce que les outils ont
+# déjà renvoyé, reformulé par le LLM dans le temps réservé s'il suffit.
+TURN_BUDGET = float(os.getenv("AGENT_TURN_BUDGET", "45"))
+PARTIAL_ANSWER_RESERVE = float(os.getenv("AGENT_PARTIAL_ANSWER_RESERVE", "5"))
+deadline_stats = DeadlineStats()
+
+def _turn_config(recorder: ObservationRecorder) -> Dict:
+    return {"callbacks": AGENT_CONFIG["callbacks"] + [recorder]}
+
+def _partial_reserve() -> float:
+    """Temps gardé pour la réponse partielle : au plus un quart de ce qui reste."""
+    left = remaining()
+    return 0.0 if left is None else min(PARTIAL_ANSWER_RESERVE, 0.25 * max(left, 0.0))
+
+async def _apartial_answer(user_input: str, session_id: str, recorder: ObservationRecorder, stage: str,
+                           turn: Dict) -> str:
+    """Réponse d'un tour arrivé à échéance, enregistrée dans la session."""
+    turn["status"] = "deadline"
+    turn["attrs"]["deadline_stage"] = stage
+    answer, outcome = None, "empty"
+    observations = recorder.render_observations()
+    if observations:
+        outcome = "raw"
+        try:
+            answer = (await bounded(get_llm().ainvoke(
+                PARTIAL_ANSWER_PROMPT.format(question=user_input, observations=observations), config=AGENT_CONFIG
+            ), "partial_answer")).content
+            outcome = "synthesized"
+        except Exception as e:
+            print(f"Erreur lors de la rédaction de la réponse partielle : {e}")
+    if not answer:
+        answer = format_partial_answer(recorder)
+    deadline_stats.record(hit=True, stage=stage, outcome=outcome)
     try:
-        response = agent_executor.invoke({"input": user_input})
-        return response.get("output", "Désolé, une erreur est survenue.")
+        await sessions.get(session_id).memory.asave_context({"input": user_input}, {"output": answer})
     except Exception as e:
-        print(f"Erreur dans l'AgentExecutor : {e}")
-        return "Je suis désolé, je rencontre une difficulté technique. Pourriez-vous reformuler ?"
\ No newline at end of file
+        print(f"Erreur lors de l'enregistrement de la réponse partielle : {e}")
+    return answer
+
+# 9. Mesures : étapes de chaque tour (LLM, outils, base) et jauges lues à la collecte
+AGENT_CONFIG = {"callbacks": [telemetry_handler]}
+
+def _start_metrics() -> None:
+    """Jauges des caches / pools et, si METRICS_PORT est défini, l'endpoint /metrics."""
+    registry.gauge_callback("travel_agent_db_pool", "Pool de connexions psycopg2", get_pool_stats)
+    registry.gauge_callback("travel_agent_city_cache", "Cache des informations par ville", get_city_cache_stats)
+    registry.gauge_callback("travel_agent_search_cache", "Cache de internet_search", lambda: get_tools()[-1].cache.stats())
+    registry.gauge_callback("travel_agent_ranking", "Classement des hébergements et activités", get_ranking_stats)
+    registry.gauge_callback("travel_agent_fast_path", "Raccourci de consultation", get_router_stats)
+    if get_completion_cache() is not None:
+        registry.gauge_callback("travel_agent_llm_cache", "Cache des réponses du LLM", get_completion_cache().stats)
+    registry.gauge_callback("travel_agent_coalescing", "Exécutions identiques regroupées", get_coalescing_stats)
+    registry.gauge_callback("travel_agent_limiter", "Limiteur de tours simultanés", limiter.stats)
+    registry.gauge_callback("travel_agent_deadline", "Tours arrivés à échéance et réponses partielles", deadline_stats.stats)
+    registry.gauge_callback("travel_agent_sessions", "Sessions en mémoire", sessions.stats)
+    registry.gauge_callback("travel_agent_history_writer", "Écriture différée de l'historique", get_history_stats)
+    port = os.getenv("METRICS_PORT")
+    if port:
+        try:
+            start_metrics_server(int(port))
+        except OSError as e:
+            print(f"Impossible de démarrer l'endpoint /metrics sur le port {port} : {e}")
+
+_background_loop = None
+_background_loop_lock = threading.Lock()
+
+def _get_background_loop() -> asyncio.AbstractEventLoop:
+    """
+    Boucle asyncio unique du processus, dans un thread dédié : les appels
+    synchrones y exécutent leurs coroutines, ce qui permet de réutiliser
+    le pool asyncpg d'un tour à l'autre.
+    """
+    global _background_loop
+    with _background_loop_lock:
+        if _background_loop is None:
+            _background_loop = asyncio.new_event_loop()
+            threading.Thread(target=_background_loop.run_forever, name="agent-loop", daemon=True).start()
+    return _background_loop
+
+def get_response(user_input: str, session_id: str = "default", preferences: Optional[Dict] = None,
+                 budget: Optional[float] = None) -> str:
+    """
+    Version synchrone de aget_response, exécutée dans la boucle asyncio
+    d'arrière-plan (outils en parallèle en mode "tools", pool asyncpg partagé).
+    """
+    return asyncio.run_coroutine_threadsafe(
+        aget_response(user_input, session_id, preferences=preferences, budget=budget), _get_background_loop()
+    ).result()
+
+async def aget_response(user_input: str, session_id: str = "default", user_id: str = None,
+                        preferences: Optional[Dict] = None, budget: Optional[float] = None) -> str:
+    """
+    Version asynchrone de get_response : appels Gemini, recherche web et
+    requêtes asyncpg n'occupent pas de thread pendant l'attente réseau.
+    Le nombre de tours simultanés est borné par `limiter`, par utilisateur
+    (user_id, ou à défaut session_id) et globalement. `preferences` (barre
+    latérale) sert de filtres par défaut à travel_database_tool. Le tour
+    dure au plus `budget` secondes (défaut : AGENT_TURN_BUDGET), attente
+    dans le limiteur comprise.
+    """
+    await asyncio.to_thread(warm_up)
+    with trace("agent", mode=AGENT_MODE) as turn, use_preferences(preferences), \
+            use_deadline(TURN_BUDGET if budget is None else budget):
+        key = _first_turn_key(user_input, session_id, preferences)
+        if key is None:
+            return await _arun_turn(user_input, session_id, user_id, turn)
+        future, leader = turn_flight.join(key)
+        if not leader:
+            answer = await _ashared_answer(future, user_input, session_id)
+            if answer is not None:
+                turn["name"] = "coalesced"
+                return answer
+            return await _arun_turn(user_input, session_id, user_id, turn)
+        try:
+            answer = await _arun_turn(user_input, session_id, user_id, turn)
+        except BaseException:
+            turn_flight.finish(key, future, error=Abandoned())
+            raise
+        # Tour en échec (message d'excuse) : les tours en attente s'exécutent eux-mêmes.
+        turn_flight.finish(key, future, result=answer, error=Abandoned() if turn["status"] == "error" else None)
+        return answer
+
+async def _arun_turn(user_input: str, session_id: str, user_id: Optional[str], turn: Dict) -> str:
+    """Un tour complet (raccourci ou AgentExecutor), dans une place du limiteur, avant l'échéance."""
+    requested = time.perf_counter()
+    recorder = ObservationRecorder()
+    acquired = False
+    try:
+        async with limiter.slot(user_id or session_id, timeout=remaining()):
+            acquired = True
+            start = time.perf_counter()
+            turn["attrs"]["queue_ms"] = round((start - requested) * 1000, 2)
+            try:
+                answer = await _afast_path_answer(user_input, session_id)
+                if answer is not None:
+                    router.record(True, time.perf_counter() - start)
+                    turn["name"] = "fast_path"
+                    deadline_stats.record()
+                    return answer
+            except Exception as e:
+                print(f"Erreur dans le raccourci de consultation : {e}")
+            try:
+                agent_executor = sessions.get(session_id)
+                response = await bounded(
+                    agent_executor.ainvoke({"input": user_input}, config=_turn_config(recorder)),
+                    recorder.stage, reserve=_partial_reserve(),
+                )
+                router.record(False, time.perf_counter() - start)
+                deadline_stats.record()
+                return response.get("output", "Désolé, une erreur est survenue.")
+            except DeadlineExceeded as e:
+                return await _apartial_answer(user_input, session_id, recorder, e.stage, turn)
+            except Exception as e:
+                print(f"Erreur dans l'AgentExecutor : {e}")
+                turn["status"] = "error"
+                deadline_stats.record()
+                return "Je suis désolé, je rencontre une difficulté technique. Pourriez-vous reformuler ?"
+    except asyncio.TimeoutError:
+        if acquired:
+            raise
+        # Pas de place dans le limiteur avant l'échéance.
+        record_hit("limiter")
+        return await _apartial_answer(user_input, session_id, recorder, "limiter", turn)
+
+# 10. Réponse en streaming : étapes intermédiaires puis jetons de la réponse finale
+FINAL_ANSWER_MARKER = "Final Answer:"
+
+async def astream_response(user_input: str, session_id: str = "default", user_id: str = None,
+                           preferences: Optional[Dict] = None, budget: Optional[float] = None) -> AsyncIterator[Dict]:
+    """
+    Exécute un tour de l'agent et produit des événements au fil de l'eau :
+    - {"type": "tool_start", "tool": ..., "input": ...}
+    - {"type": "tool_end", "tool": ...}
+    - {"type": "token", "text": ...} : morceaux de la réponse finale, dès qu'ils arrivent
+    - {"type": "final", "text": ...} : la réponse complète, toujours en dernier
+    À échéance (`budget`, comme pour aget_response), la réponse partielle
+    est émise en jetons puis en "final".
+    """
+    await asyncio.to_thread(warm_up)
+    with trace("agent", mode=AGENT_MODE, streaming=True) as turn, use_preferences(preferences), \
+            use_deadline(TURN_BUDGET if budget is None else budget):
+        key = _first_turn_key(user_input, session_id, preferences)
+        future, leader = turn_flight.join(key) if key is not None else (None, False)
+        if future is not None and not leader:
+            answer = await _ashared_answer(future, user_input, session_id)
+            if answer is not None:
+                turn["name"] = "coalesced"
+                yield {"type": "token", "text": answer}
+                yield {"type": "final", "text": answer}
+                return
+        output = None
+        try:
+            async for event in _astream_turn(user_input, session_id, user_id, turn):
+                if event["type"] == "final":
+                    output = event["text"]
+                yield event
+        finally:
+            if leader:
+                # Sans réponse finale (client parti) ou tour en échec, les tours en attente s'exécutent eux-mêmes.
+                failed = output is None or turn["status"] == "error"
+                turn_flight.finish(key, future, result=output, error=Abandoned() if failed else None)
+
+async def _astream_turn(user_input: str, session_id: str, user_id: Optional[str], turn: Dict) -> AsyncIterator[Dict]:
+    """Événements d'un tour complet (raccourci ou AgentExecutor), dans une place du limiteur, avant l'échéance."""
+    buffer = ""
+    in_final_answer = False
+    answer_started = False
+    output = None
+    recorder = ObservationRecorder()
+    acquired = False
+    try:
+        async with limiter.slot(user_id or session_id, timeout=remaining()):
+            acquired = True
+            start = time.perf_counter()
+            try:
+                answer = await _afast_path_answer(user_input, session_id)
+            except Exception as e:
+                print(f"Erreur dans le raccourci de consultation : {e}")
+                answer = None
+            if answer is not None:
+                router.record(True, time.perf_counter() - start)
+                turn["name"] = "fast_path"
+                deadline_stats.record()
+                yield {"type": "token", "text": answer}
+                yield {"type": "final", "text": answer}
+                return
+            try:
+                agent_executor = sessions.get(session_id)
+                events = agent_executor.astream_events(
+                    {"input": user_input}, version="v2", config=_turn_config(recorder)
+                )
+                async for event in bounded_iter(events, recorder.stage, reserve=_partial_reserve()):
+                    kind = event["event"]
+                    if kind == "on_chat_model_start":
+                        buffer = ""
+                        in_final_answer = False
+                    elif kind == "on_chat_model_stream":
+                        text = event["data"]["chunk"].content
+                        if not isinstance(text, str) or not text:
+                            continue
+                        if AGENT_MODE == "tools":
+                            # Appel de fonctions natif : le texte du modèle est directement la réponse.
+                            in_final_answer = True
+                        if not in_final_answer:
+                            # On n'émet que ce qui suit "Final Answer:" (le marqueur peut
+                            # être coupé entre deux morceaux, d'où le tampon).
+                            buffer += text
+                            index = buffer.find(FINAL_ANSWER_MARKER)
+                            if index < 0:
+                                continue
+                            in_final_answer = True
+                            answer_started = False
+                            text = buffer[index + len(FINAL_ANSWER_MARKER):]
+                        if not answer_started:
+                            text = text.lstrip()
+                            answer_started = bool(text)
+                        if text:
+                            yield {"type": "token", "text": text}
+                    elif kind == "on_tool_start":
+                        yield {"type": "tool_start", "tool": event["name"], "input": event["data"].get("input")}
+                    elif kind == "on_tool_end":
+                        yield {"type": "tool_end", "tool": event["name"]}
+                    elif kind == "on_chain_end" and not event.get("parent_ids"):
+                        output = (event["data"].get("output") or {}).get("output")
+                        router.record(False, time.perf_counter() - start)
+                deadline_stats.record()
+            except DeadlineExceeded as e:
+                output = await _apartial_answer(user_input, session_id, recorder, e.stage, turn)
+                yield {"type": "token", "text": ("\n\n" if answer_started else "") + output}
+            except Exception as e:
+                print(f"Erreur dans l'AgentExecutor : {e}")
+                turn["status"] = "error"
+                deadline_stats.record()
+                output = "Je suis désolé, je rencontre une difficulté technique. Pourriez-vous reformuler ?"
+    except asyncio.TimeoutError:
+        if acquired:
+            raise
+        record_hit("limiter")
+        output = await _apartial_answer(user_input, session_id, recorder, "limiter", turn)
+        yield {"type": "token", "text": output}
+    yield {"type": "final", "text": output or "Désolé, une erreur est survenue."}
+
+def stream_response(user_input: str, session_id: str = "default", preferences: Optional[Dict] = None,
+                    budget: Optional[float] = None) -> Iterator[Dict]:
+    """
+    Version synchrone de astream_response (pour Streamlit et la CLI) :
+    l'agent tourne dans la boucle asyncio d'arrière-plan, les événements
+    sont relayés par une file.
+    """
+    events = queue.Queue()
+
+    async def consume():
+        try:
+            async for event in astream_response(user_input, session_id, preferences=preferences, budget=budget):
+                events.put(event)
+        finally:
+            events.put(None)
+
+    asyncio.run_coroutine_threadsafe(consume(), _get_background_loop())
+    while (event := events.get()) is not None:
+        yield event
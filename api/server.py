@@ -0,0 +1,318 @@
+# Fichier : api/server.py
+# API HTTP sans interface pour les tours de planification, à déployer en
+# plusieurs réplicas derrière un répartiteur de charge, indépendamment de
+# l'interface Streamlit.
+#
+#   POST /v1/turns   {"message": "...", "session_id": "...", "preferences": {...},
+#                     "stream": false, "deadline_ms": 30000}
+#                    -> 200 {"session_id", "answer", "duration_ms"}
+#                    -> 200 text/event-stream si "stream": true (ou Accept: text/event-stream)
+#                    -> 401 si le jeton est absent ou refusé
+#                    -> 503 + Retry-After si les clés de signature sont injoignables
+#                    -> 429 + Retry-After si la file d'attente est pleine
+#                    -> 504 si l'échéance est atteinte
+#   GET  /healthz    processus vivant
+#   GET  /readyz     prêt à recevoir du trafic (agent chargé, base joignable, file non saturée)
+#   GET  /metrics    métriques Prometheus
+#
+# Lancement : python -m api.server --port 8080 --workers 8 --max-queue 32
+
+import argparse
+import json
+import os
+import queue
+import signal
+import threading
+import time
+import uuid
+from concurrent.futures import TimeoutError as FutureTimeout
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, Optional, Tuple
+
+from dotenv import load_dotenv
+
+from api.workers import DeadlineExceeded, Job, QueueFull, WorkerPool
+from auth.session import KeysUnavailable
+from utils.metrics import registry
+
+load_dotenv()
+
+API_AUTH = os.getenv("API_AUTH", "firebase")  # firebase | off
+DEFAULT_DEADLINE = float(os.getenv("API_DEFAULT_DEADLINE", "60"))
+MAX_DEADLINE = float(os.getenv("API_MAX_DEADLINE", "120"))
+# Marge entre la fin du tour de l'agent et l'échéance de la requête.
+DEADLINE_MARGIN = float(os.getenv("API_DEADLINE_MARGIN", "0.5"))
+DRAIN_TIMEOUT = float(os.getenv("API_DRAIN_TIMEOUT", "30"))
+# Clés de signature injoignables : délai proposé au client avant de réessayer.
+AUTH_RETRY_AFTER = 5
+MAX_BODY_BYTES = 64 * 1024
+MAX_MESSAGE_CHARS = 4000
+ROUTES = ("/v1/turns", "/healthz", "/readyz", "/metrics")
+
+http_requests = registry.counter("travel_agent_api_requests_total", "Requêtes HTTP de l'API par route et code")
+
+
+class Unauthorized(Exception):
+    """Jeton absent ou refusé (HTTP 401)."""
+
+
+class PlanningAPI:
+    """État partagé par les requêtes : agent, pool de workers, disponibilité."""
+
+    def __init__(self, workers: int, max_queue: int):
+        from agent import travel_agent
+        self.agent = travel_agent
+        self.pool = WorkerPool(travel_agent._get_background_loop, workers=workers, max_queue=max_queue)
+        self.ready = False
+        self.draining = False
+        self.database_ok = False
+
+    def start(self) -> None:
+        """Démarre les workers ; l'agent est préparé en arrière-plan (/readyz passe alors à 200)."""
+        self.pool.start()
+        registry.gauge_callback("travel_agent_api_pool", "Pool de workers de l'API", self.pool.stats)
+        threading.Thread(target=self._warm_up, name="api-warm-up", daemon=True).start()
+
+    def _warm_up(self) -> None:
+        from database.postgres_db import warm_up_pool
+        try:
+            if API_AUTH == "firebase":
+                from auth.firebase_auth import get_session_manager
+                get_session_manager()  # clés de signature chargées en arrière-plan
+            self.agent.warm_up()
+            self.database_ok = warm_up_pool()
+            self.ready = True
+        except Exception as e:
+            print(f"Erreur lors de la préparation de l'API : {e}")
+
+    def readiness(self) -> Tuple[bool, Dict]:
+        stats = self.pool.stats()
+        saturated = stats["queued"] >= stats["max_queue"]
+        ready = self.ready and self.database_ok and not self.draining and not saturated
+        return ready, {"ready": ready, "agent": self.ready, "database": self.database_ok,
+                       "draining": self.draining, "saturated": saturated, "pool": stats}
+
+    def authenticate(self, headers) -> Optional[str]:
+        """
+        Identifiant de l'utilisateur ; lève Unauthorized si le jeton est absent
+        ou refusé, KeysUnavailable si les clés de signature sont injoignables.
+        Sans authentification (API_AUTH=off), X-User-Id ou None : le limiteur
+        de l'agent compte alors les tours par session, au lieu de réunir tous
+        les appelants sous un seul utilisateur (AGENT_MAX_PER_USER).
+        """
+        if API_AUTH == "off":
+            return headers.get("X-User-Id") or None
+        authorization = headers.get("Authorization") or ""
+        if not authorization.startswith("Bearer "):
+            raise Unauthorized()
+        from auth.firebase_auth import verify_id_token
+        claims = verify_id_token(authorization[len("Bearer "):].strip())
+        if not claims:
+            raise Unauthorized()
+        return claims["sub"]
+
+    def submit(self, user_id: Optional[str], session_id: str, message: str, preferences: Optional[Dict],
+               deadline: float, streaming: bool) -> Job:
+        # Les sessions de l'agent sont propres à chaque utilisateur.
+        agent_session = f"{user_id or 'anonymous'}:{session_id}"
+        expires = time.monotonic() + deadline
+
+        async def run(emit):
+            # L'agent s'arrête un peu avant l'échéance de la requête (temps passé
+            # en file déduit) pour renvoyer une réponse partielle plutôt qu'un 504.
+            budget = max(expires - time.monotonic() - DEADLINE_MARGIN, 0.1)
+            if not streaming:
+                return await self.agent.aget_response(message, agent_session, user_id=user_id, preferences=preferences,
+                                                      budget=budget)
+            final = None
+            async for event in self.agent.astream_response(message, agent_session, user_id=user_id,
+                                                           preferences=preferences, budget=budget):
+                emit(event)
+                if event["type"] == "final":
+                    final = event["text"]
+            return final
+
+        return self.pool.submit(Job(run, expires, streaming=streaming))
+
+
+def _request_deadline(body: Dict, headers) -> float:
+    value = body.get("deadline_ms") or headers.get("X-Request-Deadline-Ms")
+    try:
+        deadline = float(value) / 1000 if value else DEFAULT_DEADLINE
+    except (TypeError, ValueError):
+        deadline = DEFAULT_DEADLINE
+    return min(max(deadline, 0.1), MAX_DEADLINE)
+
+
+def make_handler(api: PlanningAPI):
+    class PlanningHandler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+        server_version = "TravelPlanAPI/1.0"
+
+        def _send_json(self, status: int, payload: Dict, headers: Optional[Dict] = None) -> None:
+            body = json.dumps(payload, ensure_ascii=False).encode("utf-8")
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json; charset=utf-8")
+            self.send_header("Content-Length", str(len(body)))
+            for name, value in (headers or {}).items():
+                self.send_header(name, str(value))
+            self.end_headers()
+            self.wfile.write(body)
+            path = self.path.split("?")[0]
+            http_requests.inc(route=path if path in ROUTES else "other", code=str(status))
+
+        def do_GET(self):
+            path = self.path.split("?")[0]
+            if path == "/healthz":
+                self._send_json(200, {"status": "ok"})
+            elif path == "/readyz":
+                ready, details = api.readiness()
+                self._send_json(200 if ready else 503, details)
+            elif path == "/metrics":
+                body = registry.render().encode("utf-8")
+                self.send_response(200)
+                self.send_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+            else:
+                self._send_json(404, {"error": "not_found"})
+
+        def do_POST(self):
+            length = int(self.headers.get("Content-Length") or 0)
+            if length > MAX_BODY_BYTES:
+                self.close_connection = True  # corps non lu : la connexion ne peut pas être réutilisée
+                self._send_json(413, {"error": "body_too_large"})
+                return
+            raw = self.rfile.read(length)
+            if self.path.split("?")[0] != "/v1/turns":
+                self._send_json(404, {"error": "not_found"})
+                return
+            if api.draining:
+                self._send_json(503, {"error": "draining"}, {"Retry-After": 1})
+                return
+            try:
+                user_id = api.authenticate(self.headers)
+            except Unauthorized:
+                self._send_json(401, {"error": "unauthorized"})
+                return
+            except KeysUnavailable as e:
+                print(f"Erreur lors de la vérification du jeton : {e}")
+                self._send_json(503, {"error": "auth_unavailable", "retry_after": AUTH_RETRY_AFTER},
+                                {"Retry-After": AUTH_RETRY_AFTER})
+                return
+            try:
+                body = json.loads(raw or b"{}")
+                message = body["message"]
+                if not isinstance(message, str) or not message.strip() or len(message) > MAX_MESSAGE_CHARS:
+                    raise ValueError("message")
+            except (ValueError, KeyError, TypeError):
+                self._send_json(400, {"error": "invalid_request",
+                                      "detail": f"'message' : texte non vide de {MAX_MESSAGE_CHARS} caractères max"})
+                return
+            session_id = str(body.get("session_id") or uuid.uuid4())
+            streaming = bool(body.get("stream")) or "text/event-stream" in (self.headers.get("Accept") or "")
+            try:
+                job = api.submit(user_id, session_id, message, body.get("preferences"),
+                                 _request_deadline(body, self.headers), streaming)
+            except QueueFull as e:
+                self._send_json(429, {"error": "queue_full", "retry_after": e.retry_after},
+                                {"Retry-After": e.retry_after})
+                return
+            if streaming:
+                self._stream(job, session_id)
+            else:
+                self._wait(job, session_id)
+
+        def _wait(self, job: Job, session_id: str) -> None:
+            try:
+                # Le worker termine toujours le tour à l'échéance ; marge pour l'annulation.
+                answer = job.result.result(timeout=max(job.remaining(), 0) + 5)
+            except (DeadlineExceeded, FutureTimeout):
+                job.cancel()
+                self._send_json(504, {"error": "deadline_exceeded", "session_id": session_id})
+                return
+            except Exception as e:
+                self._send_json(500, {"error": "internal_error", "detail": type(e).__name__})
+                return
+            self._send_json(200, {"session_id": session_id, "answer": answer,
+                                  "duration_ms": round((time.monotonic() - job.enqueued_at) * 1000, 1)})
+
+        def _write_event(self, name: str, payload: Dict) -> None:
+            data = json.dumps(payload, ensure_ascii=False)
+            self.wfile.write(f"event: {name}\ndata: {data}\n\n".encode("utf-8"))
+            self.wfile.flush()
+
+        def _stream(self, job: Job, session_id: str) -> None:
+            # Server-Sent Events ; la connexion est fermée à la fin du flux.
+            self.close_connection = True
+            try:
+                self.send_response(200)
+                self.send_header("Content-Type", "text/event-stream; charset=utf-8")
+                self.send_header("Cache-Control", "no-cache")
+                self.send_header("Connection", "close")
+                self.end_headers()
+                self._write_event("session", {"session_id": session_id})
+                while True:
+                    try:
+                        event = job.events.get(timeout=max(job.remaining(), 0) + 5)
+                    except queue.Empty:
+                        job.cancel()
+                        self._write_event("error", {"error": "deadline_exceeded"})
+                        break
+                    if event is None:
+                        error = job.result.exception()
+                        if error is not None:
+                            self._write_event("error", {
+                                "error": "deadline_exceeded" if isinstance(error, DeadlineExceeded) else "internal_error"
+                            })
+                        break
+                    self._write_event(event["type"], event)
+            except (BrokenPipeError, ConnectionResetError):
+                job.cancel()  # client parti : inutile de continuer le tour
+            http_requests.inc(route="/v1/turns", code="200")
+
+        def log_message(self, format, *args):
+            pass  # une ligne par requête serait trop verbeuse ; voir /metrics
+
+    return PlanningHandler
+
+
+def serve(host: str, port: int, workers: int, max_queue: int) -> None:
+    api = PlanningAPI(workers=workers, max_queue=max_queue)
+    api.start()
+    server = ThreadingHTTPServer((host, port), make_handler(api))
+    server.daemon_threads = True
+
+    def shutdown(signum, frame):
+        # Plus de nouveaux tours (/readyz -> 503), on termine ceux en cours.
+        api.draining = True
+
+        def drain_and_stop():
+            if not api.pool.drain(DRAIN_TIMEOUT):
+                print("Arrêt : des tours étaient encore en cours après API_DRAIN_TIMEOUT.")
+            server.shutdown()
+
+        threading.Thread(target=drain_and_stop, name="api-shutdown", daemon=True).start()
+
+    signal.signal(signal.SIGTERM, shutdown)
+    signal.signal(signal.SIGINT, shutdown)
+    print(f"🚀 API de planification sur http://{host}:{port} ({workers} workers, file de {max_queue})")
+    server.serve_forever()
+    server.server_close()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="API HTTP de planification de voyage")
+    parser.add_argument("--host", default=os.getenv("API_HOST", "0.0.0.0"))
+    parser.add_argument("--port", type=int, default=int(os.getenv("API_PORT", "8080")))
+    parser.add_argument("--workers", type=int, default=int(os.getenv("API_WORKERS", "8")),
+                        help="tours exécutés simultanément")
+    parser.add_argument("--max-queue", type=int, default=int(os.getenv("API_MAX_QUEUE", "32")),
+                        help="tours en attente au-delà desquels l'API répond 429")
+    args = parser.parse_args()
+    serve(args.host, args.port, args.workers, args.max_queue)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,189 @@
+# Fichier : api/workers.py
+# Exécution des tours de l'API : file d'attente bornée et pool de workers.
+# Une requête qui ne trouve pas de place dans la file est refusée tout de
+# suite (QueueFull -> HTTP 429) plutôt que d'attendre indéfiniment ; chaque
+# tour a une échéance, vérifiée à la sortie de file puis pendant l'exécution
+# (le tour est alors annulé).
+
+import asyncio
+import math
+import queue
+import threading
+import time
+import uuid
+from concurrent.futures import CancelledError, Future, TimeoutError as FutureTimeout
+from typing import Awaitable, Callable, Dict, Optional
+
+from utils.deadline import DeadlineExceeded
+from utils.metrics import registry
+
+turns_total = registry.counter("travel_agent_api_turns_total", "Tours de l'API par issue (ok, rejected, deadline, cancelled, error)")
+queue_wait = registry.histogram("travel_agent_api_queue_wait_seconds", "Attente dans la file avant un worker")
+
+
+class QueueFull(Exception):
+    """File d'attente pleine : le client doit réessayer plus tard (retry_after secondes)."""
+
+    def __init__(self, retry_after: int):
+        super().__init__(f"file d'attente pleine, réessayer dans {retry_after} s")
+        self.retry_after = retry_after
+
+
+class Job:
+    """
+    Un tour soumis au pool. `run(emit)` est une coroutine qui renvoie la
+    réponse finale et peut émettre des événements intermédiaires (streaming).
+    Les événements sont lus par la requête HTTP dans `events` ; le dernier
+    est toujours None.
+    """
+
+    def __init__(self, run: Callable[[Callable[[Dict], None]], Awaitable[str]], deadline: float,
+                 streaming: bool = False):
+        self.id = uuid.uuid4().hex[:16]
+        self.run = run
+        self.deadline = deadline  # time.monotonic()
+        self.streaming = streaming
+        self.enqueued_at = time.monotonic()
+        self.result: Future = Future()
+        self.events: "queue.Queue[Optional[Dict]]" = queue.Queue()
+        self._task: Optional[Future] = None
+        self._lock = threading.Lock()
+        self.cancelled = False
+
+    def remaining(self) -> float:
+        return self.deadline - time.monotonic()
+
+    def emit(self, event: Dict) -> None:
+        if self.streaming:
+            self.events.put(event)
+
+    def cancel(self) -> None:
+        """Abandon par le client (connexion fermée) : le tour en cours est annulé."""
+        with self._lock:
+            self.cancelled = True
+            task = self._task
+        if task is not None:
+            task.cancel()
+
+
+class WorkerPool:
+    """
+    `workers` threads qui exécutent les tours dans la boucle asyncio de
+    l'agent (renvoyée par loop_factory), au plus un tour chacun. La file accepte au plus
+    `max_queue` tours en attente.
+    """
+
+    def __init__(self, loop_factory: Callable[[], asyncio.AbstractEventLoop], workers: int = 8, max_queue: int = 32):
+        self._loop_factory = loop_factory
+        self.workers = workers
+        self.max_queue = max_queue
+        self._queue: "queue.Queue[Optional[Job]]" = queue.Queue(maxsize=max_queue)
+        self._threads = []
+        self._busy = 0
+        self._lock = threading.Lock()
+        self._avg_duration = 5.0  # moyenne glissante, pour Retry-After
+        self._stats = {"submitted": 0, "rejected": 0, "completed": 0, "deadline": 0, "cancelled": 0, "errors": 0}
+
+    def start(self) -> None:
+        for i in range(self.workers):
+            thread = threading.Thread(target=self._work, name=f"api-worker-{i}", daemon=True)
+            thread.start()
+            self._threads.append(thread)
+
+    def retry_after(self) -> int:
+        """Estimation (s) du temps avant qu'une place se libère dans la file."""
+        with self._lock:
+            average = self._avg_duration
+        return max(1, math.ceil(average * (self._queue.qsize() + 1) / self.workers))
+
+    def submit(self, job: Job) -> Job:
+        try:
+            self._queue.put_nowait(job)
+        except queue.Full:
+            with self._lock:
+                self._stats["rejected"] += 1
+            turns_total.inc(outcome="rejected")
+            raise QueueFull(self.retry_after())
+        with self._lock:
+            self._stats["submitted"] += 1
+        return job
+
+    _STAT_KEYS = {"ok": "completed", "deadline": "deadline", "cancelled": "cancelled", "error": "errors"}
+
+    def _finish(self, job: Job, outcome: str, result=None, error: Optional[BaseException] = None) -> None:
+        with self._lock:
+            self._stats[self._STAT_KEYS[outcome]] += 1
+        turns_total.inc(outcome=outcome)
+        if error is not None:
+            job.result.set_exception(error)
+        else:
+            job.result.set_result(result)
+        job.events.put(None)
+
+    def _work(self) -> None:
+        while True:
+            job = self._queue.get()
+            if job is None:
+                return
+            queue_wait.observe(time.monotonic() - job.enqueued_at)
+            if job.cancelled:
+                self._finish(job, "cancelled", error=CancelledError())
+                continue
+            if job.remaining() <= 0:
+                self._finish(job, "deadline", error=DeadlineExceeded("échéance atteinte dans la file d'attente"))
+                continue
+            with self._lock:
+                self._busy += 1
+            started = time.monotonic()
+            try:
+                self._execute(job)
+            finally:
+                with self._lock:
+                    self._busy -= 1
+                    self._avg_duration = 0.9 * self._avg_duration + 0.1 * (time.monotonic() - started)
+
+    def _execute(self, job: Job) -> None:
+        task = asyncio.run_coroutine_threadsafe(job.run(job.emit), self._loop_factory())
+        with job._lock:
+            job._task = task
+            cancelled = job.cancelled
+        if cancelled:
+            task.cancel()
+        try:
+            answer = task.result(timeout=max(job.remaining(), 0))
+        except FutureTimeout:
+            task.cancel()
+            self._finish(job, "deadline", error=DeadlineExceeded("échéance atteinte pendant le tour"))
+        except CancelledError as e:
+            self._finish(job, "cancelled", error=e)
+        except Exception as e:
+            print(f"Erreur dans un tour de l'API : {e}")
+            self._finish(job, "error", error=e)
+        else:
+            self._finish(job, "ok", result=answer)
+
+    def stop(self) -> None:
+        """Les workers terminent les tours déjà en file puis s'arrêtent."""
+        for _ in self._threads:
+            self._queue.put(None)
+
+    def drain(self, timeout: float) -> bool:
+        """Attend que la file soit vide et les workers inactifs (arrêt propre)."""
+        deadline = time.monotonic() + timeout
+        while time.monotonic() < deadline:
+            with self._lock:
+                idle = self._busy == 0
+            if idle and self._queue.empty():
+                return True
+            time.sleep(0.05)
+        return False
+
+    def stats(self) -> Dict:
+        with self._lock:
+            stats = dict(self._stats)
+            stats["busy"] = self._busy
+            stats["avg_turn_seconds"] = round(self._avg_duration, 3)
+        stats["queued"] = self._queue.qsize()
+        stats["workers"] = self.workers
+        stats["max_queue"] = self.max_queue
+        return stats
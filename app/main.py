@@ -2,13 +2,14 @@
 
 import streamlit as st
 import os
+import uuid
 from dotenv import load_dotenv
 import sys
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
-# On importe les nouvelles fonctions d'authentification et l'agent
-from agent.travel_agent import get_response
-from auth.firebase_auth import signup_user, login_user
+# On importe les fonctions d'authentification ; l'agent (plus lourd) n'est
+# chargé qu'une fois l'utilisateur connecté, voir load_agent().
+from auth.firebase_auth import signup_user, login_user, open_session, get_session, close_session
 
 
 # Charger les variables d'environnement
@@ -22,6 +23,15 @@ st.set_page_config(
     initial_sidebar_state="expanded"
 )
 
+# --- CHARGEMENT DE L'AGENT (une seule fois par processus) ---
+# Streamlit ré-exécute ce fichier à chaque interaction : st.cache_resource
+# garde l'agent construit et préchauffé d'une exécution à l'autre.
+@st.cache_resource(show_spinner="Préparation de l'assistant...")
+def load_agent():
+    from agent import travel_agent
+    travel_agent.warm_up()
+    return travel_agent
+
 # --- FONCTION POUR L'ÉCRAN DE CONNEXION ---
 def show_login_page():
     st.title("Bienvenue sur votre Assistant de Voyage 🧳")
@@ -34,8 +44,16 @@ def show_login_page():
     with col1:
         if st.button("Se connecter"):
             user = login_user(email, password)
-            if user:
-                st.session_state['user_info'] = user # Stocker les infos utilisateur
+            try:
+                session = open_session(user) if user else None
+            except ValueError as e:
+                st.error(f"Erreur: Firebase n'est pas configuré correctement ({e}).")
+                return
+            if session:
+                # Seul l'identifiant de session est gardé : les jetons restent
+                # côté serveur, vérifiés et renouvelés par auth/session.py.
+                st.session_state['auth_session_id'] = session["session_id"]
+                st.session_state['user_info'] = {"uid": session["uid"], "email": session["email"]}
                 st.success("Connexion réussie !")
                 st.rerun() # Recharger la page pour afficher l'app principale
             else:
@@ -49,11 +67,57 @@ def show_login_page():
             else:
                 st.error(message)
 
+# --- HISTORIQUE DES CONVERSATIONS ---
+# Enregistré en arrière-plan dans PostgreSQL (database/conversation_store.py) ;
+# à la connexion, seuls les HISTORY_PAGE_SIZE derniers messages sont chargés
+# et affichés, les plus anciens à la demande.
+HISTORY_PAGE_SIZE = int(os.getenv("HISTORY_PAGE_SIZE", "20"))
+
+def restore_history(travel_agent, history):
+    """Reprend la dernière conversation de l'utilisateur (une fois par session Streamlit)."""
+    uid = st.session_state.user_info["uid"]
+    conversation_id, messages, has_more = None, [], False
+    try:
+        conversation_id = history.latest_conversation(uid)
+        if conversation_id:
+            messages, has_more = history.load_messages(conversation_id, limit=HISTORY_PAGE_SIZE)
+    except Exception as e:
+        print(f"Erreur lors du chargement de l'historique : {e}")
+    # L'identifiant de conversation sert aussi de session pour la mémoire de l'agent.
+    st.session_state.session_id = conversation_id or str(uuid.uuid4())
+    st.session_state.messages = messages
+    st.session_state.history_has_more = has_more
+    st.session_state.history_window = HISTORY_PAGE_SIZE
+    if messages:
+        travel_agent.restore_session(st.session_state.session_id, messages)
+
+def show_older_messages(history):
+    """Élargit la fenêtre affichée ; charge une page plus ancienne si nécessaire."""
+    st.session_state.history_window += HISTORY_PAGE_SIZE
+    messages = st.session_state.messages
+    if st.session_state.history_window > len(messages) and st.session_state.history_has_more:
+        try:
+            older, has_more = history.load_messages(
+                st.session_state.session_id, before_id=messages[0]["id"], limit=HISTORY_PAGE_SIZE
+            )
+            st.session_state.messages = older + messages
+            st.session_state.history_has_more = has_more
+        except Exception as e:
+            print(f"Erreur lors du chargement de l'historique : {e}")
+
+def save_message(history, role, content):
+    """Ajoute le message à l'affichage et le confie à l'écriture différée (non bloquant)."""
+    st.session_state.messages.append({"role": role, "content": content})
+    history.append_message(st.session_state.session_id, st.session_state.user_info["uid"], role, content)
+
 # --- FONCTION POUR L'APPLICATION PRINCIPALE (VOTRE CODE ACTUEL) ---
 def show_main_app():
-    # Initialisation de la session pour le chat
-    if "messages" not in st.session_state:
-        st.session_state.messages = []
+    travel_agent = load_agent()
+    from database import conversation_store as history
+
+    # Initialisation de la session pour le chat (dernière conversation reprise)
+    if "messages" not in st.session_state or "session_id" not in st.session_state:
+        restore_history(travel_agent, history)
         
     # Titre et description
     st.title("🧳 Assistant IA de Planification de Voyage")
@@ -67,39 +131,69 @@ def show_main_app():
         duration = st.number_input("Durée du voyage (jours)", min_value=1, value=7)
         interests = st.multiselect("Vos intérêts", ["Culture", "Gastronomie", "Nature", "Sport", "Plage"])
 
-        if st.button("💾 Appliquer mes préférences"):
-            preferences_text = (
-                f"(Note : planifier un voyage avec les préférences suivantes : "
-                f"Style: {travel_style}, Budget: {budget_range}€/jour, Durée: {duration} jours, Intérêts: {', '.join(interests)})"
-            )
-            st.session_state.messages.append({"role": "user", "content": preferences_text})
-            st.success("Préférences prises en compte !")
+        # Transmises à chaque question : elles servent de filtres par défaut
+        # (prix, type d'hébergement, activités) à l'outil base de données.
+        st.session_state.preferences = {
+            "travel_style": travel_style,
+            "budget_per_day": budget_range,
+            "duration_days": duration,
+            "interests": interests,
+        }
+        st.caption("Vos préférences sont appliquées automatiquement à chaque recherche.")
 
         st.divider()
         if st.button("Se déconnecter"):
+            travel_agent.reset_session(st.session_state.session_id)
+            close_session(st.session_state.get('auth_session_id'))
+            st.session_state.pop('auth_session_id', None)
             del st.session_state['user_info']
+            del st.session_state['session_id']
+            del st.session_state['messages']
             st.rerun()
 
-    # Zone de chat principale
+    # Zone de chat principale : seuls les history_window derniers messages sont rendus
     st.divider()
-    for message in st.session_state.messages:
+    window = st.session_state.history_window
+    if len(st.session_state.messages) > window or st.session_state.history_has_more:
+        if st.button("⬆️ Messages précédents"):
+            show_older_messages(history)
+            st.rerun()
+    for message in st.session_state.messages[-window:]:
         with st.chat_message(message["role"]):
             st.markdown(message["content"])
 
     if prompt := st.chat_input("Où souhaitez-vous voyager ?"):
-        st.session_state.messages.append({"role": "user", "content": prompt})
+        save_message(history, "user", prompt)
         with st.chat_message("user"):
             st.markdown(prompt)
         
         with st.chat_message("assistant"):
-            with st.spinner("L'agent réfléchit..."):
-                response = get_response(prompt)
-                st.markdown(response)
-                st.session_state.messages.append({"role": "assistant", "content": response})
+            status = st.status("L'agent réfléchit...", expanded=False)
+
+            def answer_tokens():
+                streamed = False
+                for event in travel_agent.stream_response(
+                    prompt, session_id=st.session_state.session_id, preferences=st.session_state.preferences
+                ):
+                    if event["type"] == "tool_start":
+                        status.write(f"🔧 {event['tool']} : {event['input']}")
+                    elif event["type"] == "tool_end":
+                        status.write(f"✅ {event['tool']} terminé")
+                    elif event["type"] == "token":
+                        streamed = True
+                        yield event["text"]
+                    elif event["type"] == "final" and not streamed:
+                        yield event["text"]
+                status.update(label="Réponse prête", state="complete")
+
+            response = st.write_stream(answer_tokens())
+            save_message(history, "assistant", response)
 
 # --- ROUTEUR PRINCIPAL ---
-# C'est ce bloc qui décide quelle page afficher
-if 'user_info' in st.session_state and st.session_state.user_info is not None:
+# C'est ce bloc qui décide quelle page afficher. La session est vérifiée en
+# mémoire à chaque ré-exécution, sans appel à Firebase.
+if get_session(st.session_state.get('auth_session_id')) is not None:
     show_main_app()
 else:
+    st.session_state.pop('user_info', None)
     show_login_page()
\ No newline at end of file
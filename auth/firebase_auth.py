@@ -6,36 +6,43 @@ import pyrebase
 import os
 import json
 import base64
+import threading
+from functools import lru_cache
+from typing import Dict, Optional
+
+from auth.session import InvalidToken, SessionManager, SigningKeys, TokenVerifier
 
 # --- Configuration Firebase ---
-firebase_config = {
-    "apiKey": os.getenv("FIREBASE_API_KEY"),
-    "authDomain": os.getenv("FIREBASE_AUTH_DOMAIN"),
-    "projectId": os.getenv("FIREBASE_PROJECT_ID"),
-    "storageBucket": os.getenv("FIREBASE_STORAGE_BUCKET"),
-    "messagingSenderId": os.getenv("FIREBASE_MESSAGING_SENDER_ID"),
-    "appId": os.getenv("FIREBASE_APP_ID"),
-    "databaseURL": os.getenv("FIREBASE_DATABASE_URL") # <-- S'assurer que cette ligne est bien présente
-}
-
-# ... le reste du code d'initialisation ne change pas ...
-try:
-    # ...
-    # Le code d'initialisation que nous avons écrit précédemment
-    # ...
-    firebase = pyrebase.initialize_app(firebase_config)
-    firebase_auth = firebase.auth()
-    print("✅ Firebase initialisé avec succès")
-
-except Exception as e:
-    print(f"❌ Erreur d'initialisation Firebase : {e}")
-    firebase_auth = None
+# L'initialisation de Pyrebase est faite à la première connexion / inscription
+# (et une seule fois par processus), pas à l'import : la page de connexion
+# s'affiche sans attendre Firebase.
+def get_firebase_config():
+    return {
+        "apiKey": os.getenv("FIREBASE_API_KEY"),
+        "authDomain": os.getenv("FIREBASE_AUTH_DOMAIN"),
+        "projectId": os.getenv("FIREBASE_PROJECT_ID"),
+        "storageBucket": os.getenv("FIREBASE_STORAGE_BUCKET"),
+        "messagingSenderId": os.getenv("FIREBASE_MESSAGING_SENDER_ID"),
+        "appId": os.getenv("FIREBASE_APP_ID"),
+        "databaseURL": os.getenv("FIREBASE_DATABASE_URL") # <-- S'assurer que cette ligne est bien présente
+    }
+
+@lru_cache(maxsize=None)
+def get_firebase_auth():
+    try:
+        firebase = pyrebase.initialize_app(get_firebase_config())
+        firebase_auth = firebase.auth()
+        print("✅ Firebase initialisé avec succès")
+        return firebase_auth
+    except Exception as e:
+        print(f"❌ Erreur d'initialisation Firebase : {e}")
+        return None
 
 
 # --- Fonctions pour Streamlit (REMETTEZ CETTE VERSION) ---
 def signup_user(email, password):
     """Inscrit un nouvel utilisateur avec email/password"""
-    if not firebase_auth:
+    if not get_firebase_auth():
         return None, "Erreur: Firebase n'est pas initialisé correctement."
     try:
         # On utilise le SDK Admin pour créer l'utilisateur (c'est la bonne méthode)
@@ -47,6 +54,7 @@ def signup_user(email, password):
 
 def login_user(email, password):
     """Connecte un utilisateur avec email/password"""
+    firebase_auth = get_firebase_auth()
     if not firebase_auth:
         return None
     try:
@@ -54,4 +62,92 @@ def login_user(email, password):
         user = firebase_auth.sign_in_with_email_and_password(email, password)
         return user
     except Exception as e:
-        return None
\ No newline at end of file
+        return None
+
+
+# --- Sessions : vérification locale des jetons et renouvellement en arrière-plan ---
+# login_user reste le seul appel réseau bloquant ; ensuite, chaque ré-exécution
+# Streamlit (ou appel d'API) vérifie la session en mémoire. Voir auth/session.py.
+_session_manager: Optional[SessionManager] = None
+_session_manager_lock = threading.Lock()
+
+def _refresh_with_firebase(refresh_token: str) -> Dict:
+    firebase_auth = get_firebase_auth()
+    if not firebase_auth:
+        raise RuntimeError("Firebase n'est pas initialisé correctement.")
+    return firebase_auth.refresh(refresh_token)
+
+def get_session_manager() -> SessionManager:
+    """
+    Gestionnaire de sessions du processus (créé à la première demande).
+    Lève ValueError si Firebase n'est pas configuré (FIREBASE_PROJECT_ID).
+    """
+    global _session_manager
+    if _session_manager is None:
+        with _session_manager_lock:
+            if _session_manager is None:
+                verifier = TokenVerifier(
+                    os.getenv("FIREBASE_PROJECT_ID"),
+                    SigningKeys(),
+                    cache_size=int(os.getenv("AUTH_TOKEN_CACHE_SIZE", "1024")),
+                )
+                _session_manager = SessionManager(
+                    verifier,
+                    _refresh_with_firebase,
+                    max_sessions=int(os.getenv("AUTH_MAX_SESSIONS", "1000")),
+                    refresh_margin=float(os.getenv("AUTH_REFRESH_MARGIN", "300")),
+                    idle_ttl=float(os.getenv("AUTH_SESSION_IDLE_TTL", "86400")),
+                )
+                _session_manager.start()
+    return _session_manager
+
+def set_session_manager(manager: SessionManager) -> None:
+    """Remplace le gestionnaire (ex. LocalTokenIssuer.session_manager() hors ligne)."""
+    global _session_manager
+    with _session_manager_lock:
+        _session_manager = manager
+
+def open_session(user: Dict) -> Optional[Dict]:
+    """
+    Session à partir de la réponse de login_user, ou None si le jeton est
+    refusé. Le gestionnaire est créé ici, après une connexion réussie : une
+    configuration Firebase incomplète lève ValueError (à afficher).
+    """
+    manager = get_session_manager()
+    try:
+        return manager.open(user)
+    except (InvalidToken, KeyError, ValueError) as e:
+        print(f"❌ Jeton refusé à l'ouverture de session : {e}")
+        return None
+
+def get_session(session_id: Optional[str]) -> Optional[Dict]:
+    """
+    Session valide, sans appel réseau ; None si elle a expiré ou a été fermée.
+    Ne crée pas le gestionnaire : la page de connexion s'affiche même sans
+    configuration Firebase.
+    """
+    manager = _session_manager
+    if manager is None or not session_id:
+        return None
+    return manager.get(session_id)
+
+def close_session(session_id: Optional[str]) -> None:
+    if _session_manager is not None:
+        _session_manager.close(session_id)
+
+def verify_id_token(id_token: str) -> Optional[Dict]:
+    """
+    Claims d'un ID token vérifié localement (pour les appels d'API), ou None
+    s'il est refusé. KeysUnavailable (clés de signature injoignables) est
+    propagée : ce n'est pas le jeton qui est en cause.
+    """
+    try:
+        return get_session_manager().verifier.verify(id_token)
+    except InvalidToken:
+        return None
+
+def get_auth_stats() -> Dict:
+    manager = get_session_manager()
+    stats = manager.stats()
+    stats.update({f"token_{k}": v for k, v in manager.verifier.stats().items()})
+    return stats
@@ -0,0 +1,97 @@
+# Fichier : auth/local_issuer.py
+# Émetteur de jetons local qui imite Firebase Auth (ID tokens RS256 au même
+# format, renouvellement par refresh token, clés publiques par kid) : permet
+# d'exercer auth/session.py hors ligne, sans projet Firebase.
+#
+#   issuer = LocalTokenIssuer("demo-travel")
+#   manager = issuer.session_manager()
+#   session = manager.open(issuer.sign_in("alice@example.com"))
+
+import secrets
+import threading
+import time
+from typing import Dict, Optional, Tuple
+
+import jwt
+from cryptography.hazmat.primitives import serialization
+from cryptography.hazmat.primitives.asymmetric import rsa
+
+from auth.session import SessionManager, SigningKeys, TokenVerifier
+
+
+class LocalTokenIssuer:
+    def __init__(self, project_id: str = "demo-travel", lifetime: float = 3600.0, keys_max_age: float = 3600.0):
+        self.project_id = project_id
+        self.lifetime = lifetime
+        self.keys_max_age = keys_max_age
+        self._lock = threading.Lock()
+        self._private_keys: Dict[str, rsa.RSAPrivateKey] = {}
+        self._current_kid = ""
+        self._refresh_tokens: Dict[str, Dict] = {}  # refresh token -> {"uid", "email"}
+        self.rotate_key()
+
+    def rotate_key(self) -> str:
+        """Nouvelle clé de signature ; les anciennes restent publiées (comme chez Google)."""
+        kid = secrets.token_hex(8)
+        with self._lock:
+            self._private_keys[kid] = rsa.generate_private_key(public_exponent=65537, key_size=2048)
+            self._current_kid = kid
+        return kid
+
+    def fetch_keys(self) -> Tuple[Dict[str, str], float]:
+        """Même contrat que session.fetch_google_certs : ({kid: PEM}, max-age)."""
+        with self._lock:
+            keys = dict(self._private_keys)
+        return {
+            kid: key.public_key().public_bytes(
+                serialization.Encoding.PEM, serialization.PublicFormat.SubjectPublicKeyInfo
+            ).decode("utf-8")
+            for kid, key in keys.items()
+        }, self.keys_max_age
+
+    def issue(self, uid: str, email: Optional[str] = None, lifetime: Optional[float] = None, **claims) -> str:
+        now = int(time.time())
+        payload = {
+            "iss": f"https://securetoken.google.com/{self.project_id}",
+            "aud": self.project_id,
+            "auth_time": now,
+            "user_id": uid,
+            "sub": uid,
+            "iat": now,
+            "exp": now + int(self.lifetime if lifetime is None else lifetime),
+        }
+        if email:
+            payload["email"] = email
+        payload.update(claims)
+        with self._lock:
+            kid, key = self._current_kid, self._private_keys[self._current_kid]
+        return jwt.encode(payload, key, algorithm="RS256", headers={"kid": kid})
+
+    def sign_in(self, email: str, uid: Optional[str] = None) -> Dict:
+        """Réponse au format de pyrebase sign_in_with_email_and_password."""
+        uid = uid or secrets.token_hex(14)
+        refresh_token = secrets.token_urlsafe(32)
+        with self._lock:
+            self._refresh_tokens[refresh_token] = {"uid": uid, "email": email}
+        return {
+            "localId": uid,
+            "email": email,
+            "idToken": self.issue(uid, email),
+            "refreshToken": refresh_token,
+            "expiresIn": str(int(self.lifetime)),
+        }
+
+    def refresh(self, refresh_token: str) -> Dict:
+        """Réponse au format de pyrebase auth.refresh ; KeyError si le jeton est inconnu."""
+        with self._lock:
+            user = self._refresh_tokens[refresh_token]
+        return {"userId": user["uid"], "idToken": self.issue(user["uid"], user["email"]), "refreshToken": refresh_token}
+
+    def revoke(self, refresh_token: str) -> None:
+        with self._lock:
+            self._refresh_tokens.pop(refresh_token, None)
+
+    def session_manager(self, **kwargs) -> SessionManager:
+        """SessionManager branché sur cet émetteur au lieu de Firebase."""
+        verifier = TokenVerifier(self.project_id, SigningKeys(fetch=self.fetch_keys))
+        return SessionManager(verifier, self.refresh, **kwargs)
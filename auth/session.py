@@ -0,0 +1,288 @@
+# Fichier : auth/session.py
+# Sessions authentifiées sans aller-retour Firebase à chaque requête :
+# - les ID tokens sont vérifiés localement (signature RS256, audience, émetteur,
+#   expiration) avec les clés publiques de Google, gardées en cache ;
+# - les jetons vérifiés et les sessions ouvertes sont gardés en mémoire (bornée) ;
+# - un thread d'arrière-plan renouvelle les jetons avant leur expiration, ainsi
+#   que les clés de signature avant la fin de leur durée de cache.
+# Les fonctions réseau (clés, renouvellement) sont injectables : auth/local_issuer
+# fournit un émetteur local pour essayer le tout sans Firebase.
+
+import re
+import secrets
+import threading
+import time
+from collections import OrderedDict
+from typing import Callable, Dict, Optional, Tuple
+
+import jwt
+import requests
+from cryptography import x509
+from cryptography.hazmat.primitives.serialization import load_pem_public_key
+
+from utils.ttl_cache import TTLCache
+
+GOOGLE_CERTS_URL = "https://www.googleapis.com/robot/v1/metadata/x509/securetoken@system.gserviceaccount.com"
+
+
+class InvalidToken(Exception):
+    """ID token refusé (signature, audience, émetteur, expiration...)."""
+
+
+class KeysUnavailable(Exception):
+    """Clés de signature impossibles à charger (réseau, HTTP, réponse illisible) : réessayer plus tard."""
+
+
+def fetch_google_certs(timeout: float = 10.0) -> Tuple[Dict[str, str], float]:
+    """Certificats {kid: PEM} de Firebase Auth et leur durée de cache (Cache-Control max-age)."""
+    response = requests.get(GOOGLE_CERTS_URL, timeout=timeout)
+    response.raise_for_status()
+    match = re.search(r"max-age=(\d+)", response.headers.get("Cache-Control", ""))
+    return response.json(), float(match.group(1)) if match else 3600.0
+
+
+def _public_key(pem: str):
+    data = pem.encode("utf-8")
+    if b"BEGIN CERTIFICATE" in data:
+        return x509.load_pem_x509_certificate(data).public_key()
+    return load_pem_public_key(data)
+
+
+class SigningKeys:
+    """
+    Clés publiques par identifiant (kid), rechargées à l'expiration de leur
+    durée de cache. Un kid inconnu (rotation) provoque au plus un rechargement
+    toutes les min_refetch_interval secondes.
+    """
+
+    def __init__(self, fetch: Callable[[], Tuple[Dict[str, str], float]] = fetch_google_certs,
+                 min_refetch_interval: float = 60.0):
+        self._fetch = fetch
+        self.min_refetch_interval = min_refetch_interval
+        self._keys: Dict[str, object] = {}
+        self._expires_at = 0.0
+        self._fetched_at = float("-inf")
+        self._lock = threading.Lock()
+        self.fetches = 0
+
+    def refresh(self) -> None:
+        """Recharge les clés ; lève KeysUnavailable si elles ne peuvent pas être obtenues."""
+        try:
+            certs, max_age = self._fetch()
+            keys = {kid: _public_key(pem) for kid, pem in certs.items()}
+        except Exception as e:
+            raise KeysUnavailable(f"clés de signature indisponibles : {e}") from e
+        with self._lock:
+            self._keys = keys
+            self._fetched_at = time.monotonic()
+            self._expires_at = self._fetched_at + max_age
+            self.fetches += 1
+
+    def expires_in(self) -> float:
+        return self._expires_at - time.monotonic()
+
+    def get(self, kid: Optional[str]):
+        now = time.monotonic()
+        with self._lock:
+            key = self._keys.get(kid)
+            stale = now >= self._expires_at
+            may_refetch = now - self._fetched_at >= self.min_refetch_interval
+        if stale or (key is None and may_refetch):
+            self.refresh()
+            with self._lock:
+                key = self._keys.get(kid)
+        return key
+
+
+class TokenVerifier:
+    """
+    Vérification locale des ID tokens Firebase, selon les règles documentées
+    par Firebase (RS256, aud = projet, iss = securetoken, sub non vide,
+    auth_time dans le passé). Les jetons déjà vérifiés sont servis depuis un
+    cache LRU jusqu'à leur expiration.
+    """
+
+    def __init__(self, project_id: str, keys: Optional[SigningKeys] = None,
+                 clock_skew: float = 60.0, cache_size: int = 1024):
+        if not project_id:
+            raise ValueError("FIREBASE_PROJECT_ID n'est pas défini")
+        self.project_id = project_id
+        self.issuer = f"https://securetoken.google.com/{project_id}"
+        self.keys = keys or SigningKeys()
+        self.clock_skew = clock_skew
+        self._cache = TTLCache(max_size=cache_size, ttl=0)  # expiration lue dans les claims
+
+    def verify(self, id_token: str) -> Dict:
+        claims = self._cache.get(id_token)
+        if claims is not None and claims["exp"] > time.time() - self.clock_skew:
+            return claims
+        try:
+            header = jwt.get_unverified_header(id_token)
+        except jwt.PyJWTError as e:
+            raise InvalidToken(f"jeton illisible : {e}") from e
+        if header.get("alg") != "RS256":
+            raise InvalidToken(f"algorithme inattendu : {header.get('alg')}")
+        key = self.keys.get(header.get("kid"))
+        if key is None:
+            raise InvalidToken("clé de signature inconnue")
+        try:
+            claims = jwt.decode(
+                id_token, key, algorithms=["RS256"], audience=self.project_id, issuer=self.issuer,
+                leeway=self.clock_skew, options={"require": ["exp", "iat", "sub"]},
+            )
+        except jwt.PyJWTError as e:
+            raise InvalidToken(str(e)) from e
+        if not claims.get("sub"):
+            raise InvalidToken("sub vide")
+        if claims.get("auth_time", 0) > time.time() + self.clock_skew:
+            raise InvalidToken("auth_time dans le futur")
+        self._cache.set(id_token, claims)
+        return claims
+
+    def stats(self) -> Dict:
+        stats = self._cache.stats()
+        stats["key_fetches"] = self.keys.fetches
+        return stats
+
+
+class SessionManager:
+    """
+    Sessions ouvertes après une connexion réussie. get() ne fait jamais
+    d'appel réseau : le jeton de la session est renouvelé par le thread
+    d'arrière-plan refresh_margin secondes avant son expiration.
+
+    `refresh(refresh_token)` renvoie {"idToken", "refreshToken"} (format de
+    pyrebase auth.refresh). Les sessions inutilisées depuis idle_ttl secondes
+    ne sont plus renouvelées et sont fermées ; au-delà de max_sessions, les
+    moins récemment utilisées sont évincées.
+    """
+
+    def __init__(self, verifier: TokenVerifier, refresh: Callable[[str], Dict], max_sessions: int = 1000,
+                 refresh_margin: float = 300.0, idle_ttl: float = 86400.0, check_interval: float = 30.0):
+        self.verifier = verifier
+        self._refresh = refresh
+        self.max_sessions = max_sessions
+        self.refresh_margin = refresh_margin
+        self.idle_ttl = idle_ttl
+        self.check_interval = check_interval
+        self._sessions: "OrderedDict[str, Dict]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._thread: Optional[threading.Thread] = None
+        self._stop_event = threading.Event()
+        self._stats = {"opened": 0, "hits": 0, "misses": 0, "refreshed": 0, "refresh_errors": 0,
+                       "expired": 0, "evicted": 0}
+
+    def open(self, tokens: Dict) -> Dict:
+        """
+        Ouvre une session à partir de la réponse de connexion ({"idToken",
+        "refreshToken", ...}). Lève InvalidToken si le jeton est refusé.
+        """
+        claims = self.verifier.verify(tokens["idToken"])
+        session = {
+            "session_id": secrets.token_urlsafe(24),
+            "uid": claims["sub"],
+            "email": claims.get("email"),
+            "id_token": tokens["idToken"],
+            "refresh_token": tokens.get("refreshToken"),
+            "expires_at": claims["exp"],
+            "last_used": time.monotonic(),
+        }
+        with self._lock:
+            self._sessions[session["session_id"]] = session
+            self._stats["opened"] += 1
+            while len(self._sessions) > self.max_sessions:
+                self._sessions.popitem(last=False)
+                self._stats["evicted"] += 1
+        self.start()
+        return dict(session)
+
+    def get(self, session_id: Optional[str]) -> Optional[Dict]:
+        """Session valide (copie) ou None : inconnue, fermée ou jeton expiré."""
+        with self._lock:
+            session = self._sessions.get(session_id) if session_id else None
+            if session is None:
+                self._stats["misses"] += 1
+                return None
+            if session["expires_at"] <= time.time():
+                del self._sessions[session_id]
+                self._stats["expired"] += 1
+                self._stats["misses"] += 1
+                return None
+            session["last_used"] = time.monotonic()
+            self._sessions.move_to_end(session_id)
+            self._stats["hits"] += 1
+            return dict(session)
+
+    def close(self, session_id: Optional[str]) -> None:
+        with self._lock:
+            self._sessions.pop(session_id, None)
+
+    def refresh_due(self) -> int:
+        """
+        Renouvelle les jetons qui expirent dans moins de refresh_margin
+        secondes (et les clés de signature bientôt périmées). Renvoie le
+        nombre de sessions renouvelées. Appelé par le thread d'arrière-plan.
+        """
+        if self.verifier.keys.expires_in() < self.refresh_margin:
+            try:
+                self.verifier.keys.refresh()
+            except Exception as e:
+                print(f"Erreur lors du rechargement des clés de signature : {e}")
+        now, idle_limit = time.time(), time.monotonic() - self.idle_ttl
+        with self._lock:
+            idle = [sid for sid, s in self._sessions.items() if s["last_used"] < idle_limit]
+            for sid in idle:
+                del self._sessions[sid]
+            self._stats["expired"] += len(idle)
+            due = [(sid, s["refresh_token"]) for sid, s in self._sessions.items()
+                   if s["refresh_token"] and s["expires_at"] - now < self.refresh_margin]
+        refreshed = 0
+        for session_id, refresh_token in due:
+            try:
+                tokens = self._refresh(refresh_token)
+                claims = self.verifier.verify(tokens["idToken"])
+            except Exception as e:
+                print(f"Erreur lors du renouvellement d'une session : {e}")
+                with self._lock:
+                    self._stats["refresh_errors"] += 1
+                continue
+            with self._lock:
+                session = self._sessions.get(session_id)
+                if session is None:
+                    continue
+                session.update(id_token=tokens["idToken"], expires_at=claims["exp"],
+                               refresh_token=tokens.get("refreshToken") or refresh_token)
+                self._stats["refreshed"] += 1
+            refreshed += 1
+        return refreshed
+
+    def _run(self) -> None:
+        # Premier passage immédiat : les clés de signature sont chargées avant
+        # la première vérification.
+        while True:
+            try:
+                self.refresh_due()
+            except Exception as e:
+                print(f"Erreur dans le renouvellement des sessions : {e}")
+            if self._stop_event.wait(self.check_interval):
+                return
+
+    def start(self) -> None:
+        """Démarre le thread de renouvellement (idempotent)."""
+        with self._lock:
+            if self._thread is not None and self._thread.is_alive():
+                return
+            self._stop_event.clear()
+            self._thread = threading.Thread(target=self._run, name="auth-session-refresh", daemon=True)
+            self._thread.start()
+
+    def stop(self) -> None:
+        self._stop_event.set()
+
+    def stats(self) -> Dict:
+        with self._lock:
+            stats = dict(self._stats)
+            stats["size"] = len(self._sessions)
+            stats["max_size"] = self.max_sessions
+        stats["refresh_running"] = self._thread is not None and self._thread.is_alive()
+        return stats
@@ -0,0 +1,76 @@
+# Fichier : benchmarks/catalogue.py
+# Catalogues synthétiques de destinations (noms plausibles, pays, hébergements,
+# activités) pour les benchmarks, de taille configurable.
+
+import json
+import os
+import random
+import tempfile
+from typing import Dict, List
+
+ONSETS = ["", "b", "br", "c", "ch", "d", "f", "g", "gr", "h", "j", "k", "l", "m", "n",
+          "p", "qu", "r", "s", "st", "t", "tr", "v", "w", "z"]
+VOWELS = ["a", "e", "i", "o", "u", "é", "ou", "ai", "y", "ü"]
+CODAS = ["", "", "", "n", "r", "s", "l", "m", "k"]
+COUNTRIES = ["France", "Japon", "Pérou", "Islande", "Thaïlande", "Brésil", "Italie", "Kenya"]
+# Mêmes valeurs que database/data et les filtres de travel_database_tool.
+ACCOMMODATION_TYPES = ["hotel", "hostel", "apartment", "ryokan", "guesthouse"]
+ACTIVITY_CATEGORIES = ["culture", "food", "nature", "adventure", "beach"]
+
+
+def synthetic_catalogue(size: int, rng: random.Random) -> List[Dict]:
+    """`size` destinations aux noms distincts : {"id", "city", "country", "aliases"}."""
+    names, rows = set(), []
+    while len(rows) < size:
+        words = ["".join(rng.choice(ONSETS) + rng.choice(VOWELS) + rng.choice(CODAS)
+                         for _ in range(rng.randint(2, 4)))
+                 for _ in range(rng.choice([1, 1, 1, 2]))]
+        city = " ".join(w.capitalize() for w in words)
+        if city in names:
+            continue
+        names.add(city)
+        rows.append({"id": len(rows) + 1, "city": city, "country": rng.choice(COUNTRIES), "aliases": []})
+    return rows
+
+
+def write_catalogue(rows: List[Dict], rng: random.Random, per_city: int = 3, directory: str = None) -> str:
+    """
+    Écrit destinations / accommodations / activities .jsonl (format de
+    database/bulk_load.py) avec `per_city` hébergements et activités par
+    destination. Renvoie le dossier.
+    """
+    directory = directory or tempfile.mkdtemp(prefix="travel-catalogue-")
+    with open(os.path.join(directory, "destinations.jsonl"), "w", encoding="utf-8") as dest_file, \
+         open(os.path.join(directory, "accommodations.jsonl"), "w", encoding="utf-8") as acc_file, \
+         open(os.path.join(directory, "activities.jsonl"), "w", encoding="utf-8") as act_file:
+        for row in rows:
+            ref = {"country": row["country"], "city": row["city"]}
+            dest_file.write(json.dumps(dict(ref, **{
+                "description": f"Destination de test {row['city']}",
+                "best_time_to_visit": rng.choice(["Printemps", "Été", "Automne", "Hiver"]),
+                "average_budget_per_day": rng.randint(30, 250),
+                "visa_required": rng.random() < 0.3,
+                "visa_info": "Informations visa simulées",
+                "vaccinations": "Aucune vaccination obligatoire",
+                "safety_rating": rng.randint(1, 5),
+                "aliases": row.get("aliases") or [],
+            }), ensure_ascii=False) + "\n")
+            for i in range(per_city):
+                acc_file.write(json.dumps(dict(ref, **{
+                    "name": f"Hébergement {i + 1} de {row['city']}",
+                    "type": rng.choice(ACCOMMODATION_TYPES),
+                    "price_range": rng.choice(["€", "€€", "€€€"]),
+                    "average_price_per_night": rng.randint(15, 400),
+                    "rating": round(rng.uniform(2.5, 5.0), 1),
+                    "amenities": rng.sample(["wifi", "piscine", "spa", "parking", "petit-déjeuner"], 2),
+                }), ensure_ascii=False) + "\n")
+                act_file.write(json.dumps(dict(ref, **{
+                    "name": f"Activité {i + 1} à {row['city']}",
+                    "category": rng.choice(ACTIVITY_CATEGORIES),
+                    "description": "Activité simulée",
+                    "duration_hours": rng.choice([1, 2, 3, 4, 8]),
+                    "price": rng.randint(0, 150),
+                    "booking_required": rng.random() < 0.5,
+                    "best_time": rng.choice(["Matin", "Après-midi", "Soir"]),
+                }), ensure_ascii=False) + "\n")
+    return directory
@@ -0,0 +1,78 @@
+"""
+Mesure database.city_resolver.CityResolver sur un catalogue synthétique
+(100 000 villes par défaut, sans base de données) :
+- temps de construction de l'index et d'une mise à jour incrémentale ;
+- latence de resolve() (p50 / p99) et taux de bonnes réponses pour des
+  requêtes exactes, sans accents, avec le pays et avec une faute de frappe.
+
+Usage : python -m benchmarks.city_resolver [--cities 100000] [--queries 2000]
+"""
+
+import argparse
+import json
+import random
+import statistics
+import time
+
+from benchmarks.catalogue import synthetic_catalogue
+from database.city_resolver import CityResolver
+
+
+def typo(text: str, rng: random.Random) -> str:
+    i = rng.randrange(len(text))
+    return text[:i] + rng.choice("aeioukrst") + text[i + 1:]
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--cities", type=int, default=100_000)
+    parser.add_argument("--queries", type=int, default=2000)
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    rows = synthetic_catalogue(args.cities, rng)
+    by_city = {row["city"].lower(): row for row in rows}
+    resolver = CityResolver(load_all=lambda: rows, load_city=lambda city: [by_city[city]] if city in by_city else [])
+
+    start = time.perf_counter()
+    resolver.rebuild()
+    build_time = time.perf_counter() - start
+
+    start = time.perf_counter()
+    resolver.refresh_city(rows[0]["city"].lower())
+    refresh_time = time.perf_counter() - start
+
+    variants = {
+        "exact": lambda r: r["city"],
+        "sans_accents_minuscules": lambda r: r["city"].lower().replace("é", "e").replace("ü", "u"),
+        "avec_pays": lambda r: f"{r['city']}, {r['country']}",
+        "faute_de_frappe": lambda r: typo(r["city"], rng),
+    }
+    results = {}
+    for name, make_query in variants.items():
+        latencies, correct = [], 0
+        for row in rng.sample(rows, args.queries):
+            query = make_query(row)
+            start = time.perf_counter()
+            match = resolver.resolve(query)
+            latencies.append((time.perf_counter() - start) * 1000)
+            correct += match is not None and match["id"] == row["id"]
+        latencies.sort()
+        results[name] = {
+            "p50_ms": round(statistics.median(latencies), 4),
+            "p99_ms": round(latencies[int(len(latencies) * 0.99) - 1], 4),
+            "accuracy": round(correct / args.queries, 3),
+        }
+
+    print(json.dumps({
+        "cities": args.cities,
+        "index": {k: v for k, v in resolver.stats().items() if k in ("names", "trigrams")},
+        "build_s": round(build_time, 2),
+        "incremental_refresh_ms": round(refresh_time * 1000, 3),
+        "queries": results,
+    }, indent=2, ensure_ascii=False))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,80 @@
+"""
+Compare les modes d'agent "react" (prompt texte) et "tools" (appel de fonctions
+natif) sur une question multi-villes, avec un modèle scripté et des outils
+factices : nombre d'appels LLM par réponse et latence de bout en bout.
+
+Usage : python -m benchmarks.compare_agent_modes [--llm-latency 0.8] [--tool-latency 0.3] [--runs 5]
+"""
+
+import argparse
+import asyncio
+import json
+import statistics
+import time
+
+from langchain.agents import AgentExecutor
+from langchain_core.messages import AIMessage
+
+from agent.factory import build_agent
+from benchmarks.fakes import ScriptedChatModel, make_fake_tool
+
+QUESTION = "Paris ou Tokyo pour 10 jours ?"
+
+SCRIPTS = {
+    # ReAct : une ville par itération, puis la réponse finale (3 appels LLM).
+    "react": [
+        AIMessage(content="Thought: je consulte la base\nAction: travel_database_tool\nAction Input: Paris"),
+        AIMessage(content="Thought: puis Tokyo\nAction: travel_database_tool\nAction Input: Tokyo"),
+        AIMessage(content="Thought: Je connais maintenant la réponse finale\nFinal Answer: Comparaison Paris / Tokyo."),
+    ],
+    # Appel de fonctions : les deux villes dans le même tour (2 appels LLM).
+    "tools": [
+        AIMessage(content="", tool_calls=[
+            {"name": "travel_database_tool", "args": {"query": "Paris"}, "id": "call_1"},
+            {"name": "travel_database_tool", "args": {"query": "Tokyo"}, "id": "call_2"},
+        ]),
+        AIMessage(content="Comparaison Paris / Tokyo."),
+    ],
+}
+
+
+async def run_mode(mode: str, llm_latency: float, tool_latency: float, runs: int) -> dict:
+    tools = [
+        make_fake_tool("travel_database_tool", "Informations sur une ville.", tool_latency),
+        make_fake_tool("internet_search", "Recherche sur internet.", tool_latency),
+    ]
+    latencies, llm_calls = [], []
+    for _ in range(runs):
+        llm = ScriptedChatModel(responses=SCRIPTS[mode], latency=llm_latency)
+        executor = AgentExecutor(
+            agent=build_agent(llm, tools, mode), tools=tools,
+            max_iterations=6, handle_parsing_errors=True,
+        )
+        start = time.perf_counter()
+        await executor.ainvoke({"input": QUESTION, "chat_history": ""})
+        latencies.append(time.perf_counter() - start)
+        llm_calls.append(llm.calls)
+    return {
+        "mode": mode,
+        "llm_calls_per_answer": statistics.mean(llm_calls),
+        "latency_mean_s": round(statistics.mean(latencies), 4),
+        "latency_max_s": round(max(latencies), 4),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--llm-latency", type=float, default=0.8)
+    parser.add_argument("--tool-latency", type=float, default=0.3)
+    parser.add_argument("--runs", type=int, default=5)
+    args = parser.parse_args()
+
+    results = [
+        asyncio.run(run_mode(mode, args.llm_latency, args.tool_latency, args.runs))
+        for mode in ("react", "tools")
+    ]
+    print(json.dumps(results, indent=2, ensure_ascii=False))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,126 @@
+"""
+Compare, sur un PostgreSQL local rempli d'un catalogue synthétique, les deux
+chemins de get_info_for_city :
+- assemblage : CITY_DETAILS_QUERY (jointures + json_agg) puis format_city_info ;
+- fiche : lecture par clé primaire de destination_digests (texte déjà rendu) ;
+  et, pour information, lecture de la fiche JSON (fetch_city_details).
+Latence p50 / p99 sur des villes tirées au hasard, puis coût des triggers :
+modification d'un hébergement (une fiche recalculée) et mise à jour en masse.
+
+La base indiquée est VIDÉE puis rechargée (sauf --no-seed), comme pour
+benchmarks.agent_suite : utiliser une base dédiée (service postgres_bench).
+
+Usage : python -m benchmarks.digests [--cities 2000] [--per-city 40] [--queries 500]
+"""
+
+import argparse
+import json
+import os
+import random
+import statistics
+import time
+
+from benchmarks.agent_suite import DEFAULT_DATABASE_URL, seed_database
+
+
+def percentile(latencies, q):
+    return round(latencies[max(int(len(latencies) * q) - 1, 0)], 3)
+
+
+def measure(lookup, cities, rng, queries):
+    latencies = []
+    for _ in range(queries):
+        city = rng.choice(cities)
+        start = time.perf_counter()
+        lookup(city)
+        latencies.append((time.perf_counter() - start) * 1000)
+    latencies.sort()
+    return {"p50_ms": round(statistics.median(latencies), 3), "p99_ms": percentile(latencies, 0.99)}
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--database-url", default=os.getenv("BENCHMARK_DATABASE_URL", DEFAULT_DATABASE_URL))
+    parser.add_argument("--cities", type=int, default=2000)
+    parser.add_argument("--per-city", type=int, default=40, help="hébergements et activités par destination")
+    parser.add_argument("--queries", type=int, default=500)
+    parser.add_argument("--no-seed", action="store_true", help="garde le contenu actuel de la base")
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+    os.environ["DATABASE_URL"] = args.database_url
+
+    from psycopg2.extras import RealDictCursor
+    from database.digests import check_digests
+    from database.postgres_db import (
+        CITY_DETAILS_QUERY, apply_schema, fetch_city_digest, fetch_city_digest_text, format_city_info,
+        format_city_text, get_db_connection,
+    )
+
+    if args.no_seed:
+        apply_schema()
+    else:
+        seed_database(args)
+    with get_db_connection() as conn:
+        with conn.cursor() as cur:
+            cur.execute("SELECT city FROM destinations;")
+            cities = [row[0] for row in cur.fetchall()]
+            cur.execute("SELECT count(*) FROM accommodations;")
+            accommodations = cur.fetchone()[0]
+
+    def assembled(city):
+        with get_db_connection() as conn:
+            with conn.cursor(cursor_factory=RealDictCursor) as cur:
+                cur.execute(CITY_DETAILS_QUERY, (city,))
+                return format_city_info(city, dict(cur.fetchone()))
+
+    def digest(city):
+        return format_city_text(city, fetch_city_digest_text(city))
+
+    rng = random.Random(args.seed)
+    for city in cities[:20]:  # chauffe : pool et cache de PostgreSQL
+        assembled(city), digest(city)
+    results = {
+        "assembly": measure(assembled, cities, random.Random(args.seed), args.queries),
+        "digest": measure(digest, cities, random.Random(args.seed), args.queries),
+        "digest_json": measure(fetch_city_digest, cities, random.Random(args.seed), args.queries),
+    }
+
+    # Coût d'écriture : les triggers recalculent les fiches touchées dans la transaction.
+    single = []
+    with get_db_connection() as conn:
+        with conn.cursor() as cur:
+            for _ in range(50):
+                city = rng.choice(cities)
+                start = time.perf_counter()
+                cur.execute(
+                    "UPDATE accommodations SET rating = round((random() * 2.5 + 2.5)::numeric, 1) "
+                    "WHERE id = (SELECT a.id FROM accommodations a JOIN destinations d ON d.id = a.destination_id "
+                    "WHERE d.city = %s LIMIT 1);",
+                    (city,),
+                )
+                conn.commit()
+                single.append((time.perf_counter() - start) * 1000)
+            start = time.perf_counter()
+            cur.execute("UPDATE accommodations SET rating = rating WHERE id % 10 = 0;")
+            bulk_rows = cur.rowcount
+            conn.commit()
+            bulk_time = time.perf_counter() - start
+    single.sort()
+
+    start = time.perf_counter()
+    report = check_digests()
+    check_time = time.perf_counter() - start
+
+    print(json.dumps({
+        "cities": len(cities),
+        "accommodations": accommodations,
+        "lookup": results,
+        "speedup_p50": round(results["assembly"]["p50_ms"] / results["digest"]["p50_ms"], 2),
+        "update_one_ms": {"p50": round(statistics.median(single), 3), "p99": percentile(single, 0.99)},
+        "bulk_update": {"rows": bulk_rows, "seconds": round(bulk_time, 2)},
+        "check": {"consistent": report["consistent"], "seconds": round(check_time, 2)},
+    }, indent=2, ensure_ascii=False))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,61 @@
+# Fichier : benchmarks/fakes.py
+# Doublures locales de Gemini et des outils, pour mesurer l'agent sans quota
+# ni réseau.
+
+import asyncio
+import time
+from typing import Any, List, Optional
+
+from langchain_core.callbacks import AsyncCallbackManagerForLLMRun, CallbackManagerForLLMRun
+from langchain_core.language_models.chat_models import BaseChatModel
+from langchain_core.messages import AIMessage, BaseMessage
+from langchain_core.outputs import ChatGeneration, ChatResult
+from langchain_core.tools import StructuredTool
+
+
+class ScriptedChatModel(BaseChatModel):
+    """
+    Modèle de chat qui rejoue une liste de réponses (AIMessage, éventuellement
+    avec tool_calls) en boucle, avec une latence simulée par appel.
+    """
+
+    responses: List[AIMessage]
+    latency: float = 0.0
+    calls: int = 0
+
+    @property
+    def _llm_type(self) -> str:
+        return "scripted-fake"
+
+    def bind_tools(self, tools, **kwargs):
+        # Les réponses sont scriptées : les schémas d'outils sont ignorés.
+        return self
+
+    def _next_response(self) -> AIMessage:
+        message = self.responses[self.calls % len(self.responses)]
+        self.calls += 1
+        return message
+
+    def _generate(self, messages: List[BaseMessage], stop: Optional[List[str]] = None,
+                  run_manager: Optional[CallbackManagerForLLMRun] = None, **kwargs: Any) -> ChatResult:
+        time.sleep(self.latency)
+        return ChatResult(generations=[ChatGeneration(message=self._next_response())])
+
+    async def _agenerate(self, messages: List[BaseMessage], stop: Optional[List[str]] = None,
+                         run_manager: Optional[AsyncCallbackManagerForLLMRun] = None, **kwargs: Any) -> ChatResult:
+        await asyncio.sleep(self.latency)
+        return ChatResult(generations=[ChatGeneration(message=self._next_response())])
+
+
+def make_fake_tool(name: str, description: str, latency: float = 0.0, reply: str = "Résultat simulé pour {query}") -> StructuredTool:
+    """Outil factice (synchrone et asynchrone) avec latence simulée."""
+
+    def run(query: str) -> str:
+        time.sleep(latency)
+        return reply.format(query=query)
+
+    async def arun(query: str) -> str:
+        await asyncio.sleep(latency)
+        return reply.format(query=query)
+
+    return StructuredTool.from_function(func=run, coroutine=arun, name=name, description=description)
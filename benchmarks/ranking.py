@@ -0,0 +1,95 @@
+"""
+Mesure database.ranking (sans base de données) sur des hébergements et
+activités synthétiques (1 000 000 de lignes par défaut) :
+- construction des colonnes NumPy ;
+- latence de rank_table (p50 / p99) par tri, avec des préférences tirées au
+  hasard (budget, type, catégories, note minimale) ;
+- rechargement incrémental d'une seule destination (callback d'invalidation).
+
+Usage : python -m benchmarks.ranking [--rows 1000000] [--queries 200]
+"""
+
+import argparse
+import json
+import random
+import statistics
+import time
+
+from benchmarks.catalogue import ACCOMMODATION_TYPES, ACTIVITY_CATEGORIES
+from database.ranking import PreferenceRanker, rank_table
+
+
+def synthetic_rows(count: int, rng: random.Random):
+    accommodations = [
+        (f"Hébergement {i}", rng.choice(ACCOMMODATION_TYPES),
+         None if rng.random() < 0.02 else round(rng.uniform(15, 400), 2),
+         None if rng.random() < 0.05 else round(rng.uniform(2.5, 5.0), 1))
+        for i in range(count)
+    ]
+    activities = [
+        (f"Activité {i}", rng.choice(ACTIVITY_CATEGORIES), round(rng.uniform(0.5, 8), 1),
+         None if rng.random() < 0.05 else round(rng.uniform(0, 150), 2))
+        for i in range(count)
+    ]
+    return {"destination": {"city": "Bench", "country": "France"},
+            "accommodations": accommodations, "activities": activities}
+
+
+def percentile(latencies, q):
+    return round(latencies[max(int(len(latencies) * q) - 1, 0)], 3)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rows", type=int, default=1_000_000, help="hébergements (et autant d'activités)")
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--limit", type=int, default=5)
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    big = synthetic_rows(args.rows, rng)
+    small = synthetic_rows(50, rng)
+    ranker = PreferenceRanker(load_city=lambda city: big if city == "bench" else small)
+
+    start = time.perf_counter()
+    columns = ranker.load("bench")
+    build_time = time.perf_counter() - start
+
+    results = {}
+    for sort in ("best", "rating", "price"):
+        latencies = []
+        for _ in range(args.queries):
+            budget = rng.choice([None, 40, 80, 150])
+            kinds = ranker.vocabulary.codes([rng.choice(ACCOMMODATION_TYPES)] if rng.random() < 0.7 else [])
+            categories = ranker.vocabulary.codes(rng.sample(ACTIVITY_CATEGORIES, rng.randint(0, 2)))
+            min_rating = rng.choice([None, None, 4.0])
+            start = time.perf_counter()
+            rank_table(columns.accommodations, kinds, sort=sort, max_price=budget, min_rating=min_rating,
+                       budget=budget, limit=args.limit)
+            rank_table(columns.activities, categories, sort=sort if sort == "best" else "price",
+                       budget=budget, limit=args.limit)
+            latencies.append((time.perf_counter() - start) * 1000)
+        latencies.sort()
+        results[sort] = {"p50_ms": round(statistics.median(latencies), 3), "p99_ms": percentile(latencies, 0.99)}
+
+    ranker.load("other")
+    start = time.perf_counter()
+    ranker.refresh_city("other")
+    ranker.load("other")
+    refresh_time = time.perf_counter() - start
+
+    print(json.dumps({
+        "rows": 2 * args.rows,
+        "columns_mb": round(sum(
+            column.nbytes for table in (columns.accommodations, columns.activities)
+            for column in vars(table).values() if hasattr(column, "nbytes")
+        ) / 1e6, 1),
+        "build_s": round(build_time, 2),
+        "rank": results,
+        "incremental_refresh_ms": round(refresh_time * 1000, 3),
+    }, indent=2, ensure_ascii=False))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,68 @@
+"""
+Mesure le démarrage à froid de l'application, chaque mesure dans un
+processus Python neuf :
+- temps d'import des modules (auth, agent) ;
+- temps jusqu'au premier rendu de la page de connexion (exécution complète
+  de app/main.py via streamlit.testing) et temps d'une ré-exécution.
+
+Usage : python -m benchmarks.startup [--runs 3]
+"""
+
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+IMPORT_SNIPPET = """
+import time
+start = time.perf_counter()
+import {module}
+print(time.perf_counter() - start)
+"""
+
+RENDER_SNIPPET = """
+import time
+from streamlit.testing.v1 import AppTest
+start = time.perf_counter()
+app = AppTest.from_file("app/main.py", default_timeout=120).run()
+first = time.perf_counter() - start
+assert not app.exception, app.exception
+assert app.title[0].value.startswith("Bienvenue"), "la page de connexion n'a pas été rendue"
+start = time.perf_counter()
+app.run()
+print(first, time.perf_counter() - start)
+"""
+
+
+def _run(snippet: str) -> list:
+    result = subprocess.run(
+        [sys.executable, "-c", snippet], cwd=ROOT, capture_output=True, text=True, check=True,
+    )
+    return [float(x) for x in result.stdout.strip().splitlines()[-1].split()]
+
+
+def _summary(values: list) -> dict:
+    return {"median_s": round(statistics.median(values), 4), "min_s": round(min(values), 4)}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--runs", type=int, default=3)
+    args = parser.parse_args()
+
+    results = {"import": {}}
+    for module in ("auth.firebase_auth", "agent.travel_agent"):
+        results["import"][module] = _summary([_run(IMPORT_SNIPPET.format(module=module))[0] for _ in range(args.runs)])
+
+    renders = [_run(RENDER_SNIPPET) for _ in range(args.runs)]
+    results["login_page_first_render"] = _summary([r[0] for r in renders])
+    results["login_page_rerun"] = _summary([r[1] for r in renders])
+    print(json.dumps(results, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,272 @@
+"""
+Chargement en masse des catalogues (destinations, hébergements, activités)
+depuis des fichiers CSV ou JSONL.
+
+Chaque fichier est lu en flux, par lots : un lot est copié (COPY) dans une
+table de transit temporaire, puis fusionné dans la table cible par clé
+naturelle (upsert). Les hébergements et activités désignent leur destination
+par `country` + `city` ; l'identifiant est résolu par jointure, lot par lot.
+
+Le chargement est idempotent (une ligne inchangée n'est pas réécrite) et
+reprenable : l'avancement de chaque fichier est enregistré dans
+bulk_load_progress dans la même transaction que le lot.
+
+Usage : python -m database.bulk_load [--dir database/data] [--batch-size 50000] [--restart]
+"""
+
+import argparse
+import csv
+import io
+import json
+import os
+import time
+from itertools import islice
+from typing import Dict, Iterator, List, Optional
+
+from database.postgres_db import get_db_connection
+
+DEFAULT_DATA_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "data")
+
+TABLES = {
+    "destinations": {
+        "key": ["country", "city"],
+        "columns": ["country", "city", "description", "best_time_to_visit", "average_budget_per_day",
+                    "visa_required", "visa_info", "vaccinations", "safety_rating", "aliases"],
+    },
+    "accommodations": {
+        "key": ["name"],
+        "columns": ["name", "type", "price_range", "average_price_per_night", "rating",
+                    "amenities", "address", "booking_url"],
+    },
+    "activities": {
+        "key": ["name"],
+        "columns": ["name", "category", "description", "duration_hours", "price",
+                    "booking_required", "best_time"],
+    },
+}
+LOAD_ORDER = ("destinations", "accommodations", "activities")
+ARRAY_COLUMNS = {"amenities", "aliases"}
+ARRAY_SEPARATOR = "|"  # dans les CSV : "wifi|pool|spa"
+
+
+# --- Lecture des fichiers ---
+
+def find_source(directory: str, table: str) -> Optional[str]:
+    for extension in (".jsonl", ".csv"):
+        path = os.path.join(directory, table + extension)
+        if os.path.exists(path):
+            return path
+    return None
+
+
+def read_records(path: str) -> Iterator[Dict]:
+    """Lit un fichier JSONL ou CSV ligne à ligne, sans tout charger en mémoire."""
+    with open(path, encoding="utf-8", newline="") as f:
+        if path.endswith(".jsonl"):
+            for line in f:
+                if line.strip():
+                    yield json.loads(line)
+        else:
+            for row in csv.DictReader(f):
+                yield {k: (v if v != "" else None) for k, v in row.items()}
+
+
+def _pg_array(values) -> str:
+    items = ('"' + str(v).replace("\\", "\\\\").replace('"', '\\"') + '"' for v in values)
+    return "{" + ",".join(items) + "}"
+
+
+def _copy_value(column: str, value):
+    if value is None:
+        return None
+    if column in ARRAY_COLUMNS:
+        if isinstance(value, str):
+            value = [v.strip() for v in value.split(ARRAY_SEPARATOR) if v.strip()]
+        return _pg_array(value)
+    if isinstance(value, bool):
+        return "t" if value else "f"
+    return value
+
+
+def _csv_field(value) -> str:
+    """
+    Champ CSV pour COPY : un champ vide sans guillemets est lu comme NULL, le
+    texte est donc toujours entre guillemets (une chaîne vide reste vide au
+    lieu de devenir NULL, ce qui ferait réécrire la ligne à chaque chargement).
+    """
+    if value is None:
+        return ""
+    if isinstance(value, (int, float)):
+        return str(value)
+    return '"' + str(value).replace('"', '""') + '"'
+
+
+def _to_csv_buffer(batch: List[Dict], start_seq: int, columns: List[str]) -> io.StringIO:
+    buffer = io.StringIO()
+    for offset, record in enumerate(batch):
+        values = [start_seq + offset] + [_copy_value(c, record.get(c)) for c in columns]
+        buffer.write(",".join(_csv_field(v) for v in values) + "\n")
+    buffer.seek(0)
+    return buffer
+
+
+# --- SQL ---
+
+def _staging_columns(table: str) -> List[str]:
+    columns = TABLES[table]["columns"]
+    return columns if table == "destinations" else ["country", "city"] + columns
+
+
+def _create_staging_table(cur, table: str) -> None:
+    """Table de transit typée comme la cible, vidée à chaque commit."""
+    stage = f"stage_{table}"
+    cur.execute(f"DROP TABLE IF EXISTS {stage}")
+    cur.execute(f"CREATE TEMP TABLE {stage} (LIKE {table}) ON COMMIT DELETE ROWS")
+    cur.execute(f"ALTER TABLE {stage} DROP COLUMN id")
+    if table != "destinations":
+        cur.execute(f"ALTER TABLE {stage} DROP COLUMN destination_id, ADD COLUMN country TEXT, ADD COLUMN city TEXT")
+    cur.execute(f"ALTER TABLE {stage} ADD COLUMN seq BIGINT")
+
+
+def _upsert_sql(table: str) -> str:
+    columns = TABLES[table]["columns"]
+    key = TABLES[table]["key"]
+    updated = [c for c in columns if c not in key]
+    set_clause = ", ".join(f"{c} = EXCLUDED.{c}" for c in updated)
+    # Une ligne identique n'est pas réécrite : pas de trigger, pas de bloat.
+    changed = (f"({', '.join(f'{table}.{c}' for c in updated)}) "
+               f"IS DISTINCT FROM ({', '.join(f'EXCLUDED.{c}' for c in updated)})")
+    if table == "destinations":
+        conflict = ", ".join(key)
+        return f"""
+            INSERT INTO destinations ({', '.join(columns)})
+            SELECT DISTINCT ON ({conflict}) {', '.join(columns)}
+            FROM stage_destinations
+            ORDER BY {conflict}, seq DESC
+            ON CONFLICT ({conflict}) DO UPDATE SET {set_clause}
+            WHERE {changed}
+        """
+    # La dernière occurrence d'une clé dans le lot l'emporte (DISTINCT ON ... seq DESC).
+    return f"""
+        INSERT INTO {table} (destination_id, {', '.join(columns)})
+        SELECT DISTINCT ON (d.id, {', '.join('s.' + k for k in key)})
+               d.id, {', '.join('s.' + c for c in columns)}
+        FROM stage_{table} s
+        JOIN destinations d ON d.country = s.country AND d.city = s.city
+        ORDER BY d.id, {', '.join('s.' + k for k in key)}, s.seq DESC
+        ON CONFLICT (destination_id, {', '.join(key)}) DO UPDATE SET {set_clause}
+        WHERE {changed}
+    """
+
+
+def _unresolved_sql(table: str) -> str:
+    return f"""
+        SELECT count(*) FROM stage_{table} s
+        WHERE NOT EXISTS (SELECT 1 FROM destinations d WHERE d.country = s.country AND d.city = s.city)
+    """
+
+
+def _fingerprint(path: str) -> str:
+    stat = os.stat(path)
+    return f"{stat.st_size}:{int(stat.st_mtime)}"
+
+
+# --- Chargement ---
+
+def load_file(conn, table: str, path: str, batch_size: int = 50_000, restart: bool = False) -> Dict:
+    source = f"{table}:{os.path.abspath(path)}"
+    fingerprint = _fingerprint(path)
+    staging_columns = _staging_columns(table)
+    upsert_sql = _upsert_sql(table)
+    report = {"table": table, "source": path, "rows_read": 0, "rows_written": 0,
+              "rows_unresolved": 0, "rows_skipped": 0}
+
+    with conn.cursor() as cur:
+        _create_staging_table(cur, table)
+        cur.execute("SELECT fingerprint, rows_done, completed FROM bulk_load_progress WHERE source = %s", (source,))
+        progress = cur.fetchone()
+    conn.commit()
+
+    rows_done = 0
+    if progress and not restart and progress[0] == fingerprint:
+        if progress[2]:
+            report["rows_skipped"] = progress[1]
+            report["status"] = "déjà chargé"
+            return report
+        rows_done = progress[1]
+
+    start = time.perf_counter()
+    records = read_records(path)
+    if rows_done:
+        # Reprise : les lots déjà validés ne sont pas rechargés.
+        report["rows_skipped"] = sum(1 for _ in islice(records, rows_done))
+
+    while True:
+        batch = list(islice(records, batch_size))
+        if not batch:
+            break
+        with conn.cursor() as cur:
+            buffer = _to_csv_buffer(batch, rows_done, staging_columns)
+            cur.copy_expert(
+                f"COPY stage_{table} (seq, {', '.join(staging_columns)}) FROM STDIN WITH (FORMAT csv)", buffer
+            )
+            cur.execute(upsert_sql)
+            report["rows_written"] += cur.rowcount
+            if table != "destinations":
+                cur.execute(_unresolved_sql(table))
+                report["rows_unresolved"] += cur.fetchone()[0]
+            rows_done += len(batch)
+            cur.execute("""
+                INSERT INTO bulk_load_progress (source, fingerprint, rows_done, completed, updated_at)
+                VALUES (%s, %s, %s, FALSE, now())
+                ON CONFLICT (source) DO UPDATE
+                SET fingerprint = EXCLUDED.fingerprint, rows_done = EXCLUDED.rows_done,
+                    completed = FALSE, updated_at = now()
+            """, (source, fingerprint, rows_done))
+        conn.commit()
+        report["rows_read"] += len(batch)
+
+    with conn.cursor() as cur:
+        cur.execute("""
+            INSERT INTO bulk_load_progress (source, fingerprint, rows_done, completed, updated_at)
+            VALUES (%s, %s, %s, TRUE, now())
+            ON CONFLICT (source) DO UPDATE
+            SET fingerprint = EXCLUDED.fingerprint, rows_done = EXCLUDED.rows_done,
+                completed = TRUE, updated_at = now()
+        """, (source, fingerprint, rows_done))
+    conn.commit()
+
+    elapsed = time.perf_counter() - start
+    report["elapsed_s"] = round(elapsed, 3)
+    report["rows_per_s"] = round(report["rows_read"] / elapsed) if elapsed > 0 else 0
+    report["status"] = "terminé"
+    return report
+
+
+def bulk_load(directory: str = DEFAULT_DATA_DIR, batch_size: int = 50_000, restart: bool = False) -> List[Dict]:
+    """Charge tous les fichiers trouvés dans `directory`, destinations d'abord."""
+    reports = []
+    with get_db_connection() as conn:
+        for table in LOAD_ORDER:
+            path = find_source(directory, table)
+            if path is None:
+                continue
+            report = load_file(conn, table, path, batch_size=batch_size, restart=restart)
+            reports.append(report)
+            print(f"✅ {table} : {report['rows_read']} lignes lues, {report['rows_written']} écrites, "
+                  f"{report['rows_unresolved']} sans destination, {report['rows_skipped']} déjà chargées "
+                  f"({report.get('rows_per_s', 0)} lignes/s) — {report['status']}")
+    return reports
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--dir", default=DEFAULT_DATA_DIR, help="dossier contenant destinations/accommodations/activities .jsonl ou .csv")
+    parser.add_argument("--batch-size", type=int, default=50_000)
+    parser.add_argument("--restart", action="store_true", help="ignore l'avancement enregistré et recharge tout")
+    args = parser.parse_args()
+    bulk_load(args.dir, batch_size=args.batch_size, restart=args.restart)
+
+
+if __name__ == "__main__":
+    main()
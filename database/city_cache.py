@@ -0,0 +1,385 @@
+# Fichier : database/city_cache.py
+
+import asyncio
+import os
+import select
+import threading
+from typing import Dict, List, Optional, Tuple, Union
+
+import psycopg2
+
+from database.postgres_db import (
+    CITY_DIGESTS, _get_db_uri, fetch_cities_comparison, fetch_city_details, fetch_city_details_filtered,
+    fetch_city_digest_text, format_cities_comparison, format_city_info, format_city_summary, format_city_text,
+)
+from database.postgres_async import (
+    afetch_cities_comparison, afetch_city_details, afetch_city_details_filtered, afetch_city_digest_text,
+)
+from database.city_resolver import CityResolver
+from database.ranking import CityColumns, PreferenceRanker
+from utils.singleflight import SingleFlight
+from utils.ttl_cache import TTLCache
+
+NOTIFY_CHANNEL = "destination_changed"
+
+_cache = TTLCache(
+    max_size=int(os.getenv("CITY_CACHE_MAX_SIZE", "512")),
+    ttl=float(os.getenv("CITY_CACHE_TTL", "900")),
+)
+_resolver = CityResolver()
+# Regroupe les lectures simultanées d'une même ville (et mêmes filtres) manquant
+# du cache : une seule requête, partagée entre threads et coroutines.
+_flight = SingleFlight()
+# Incrémenté à chaque invalidation : une lecture commencée avant n'écrit pas
+# son résultat (peut-être périmé) dans le cache, et les lectures suivantes ne
+# s'y joignent pas (la génération fait partie de la clé de regroupement).
+_generation = 0
+_generation_lock = threading.Lock()
+# Noms approchés en cache (« pariss » -> « paris ») : clé de cache -> ville
+# trouvée, pour les invalider avec elle.
+_redirects: Dict = {}
+# Listes filtrées de l'outil : classement NumPy en mémoire (numpy) ou en SQL (sql).
+RANKING_MODE = os.getenv("RANKING_MODE", "numpy")
+_ranker = PreferenceRanker(max_cities=int(os.getenv("RANKING_MAX_CITIES", "2048")))
+_invalidation_callbacks = [_resolver.refresh_city, _ranker.refresh_city]
+# En dessous de ce score, un nom approché n'est pas considéré comme la même ville.
+RESOLVER_MIN_CONFIDENCE = float(os.getenv("CITY_RESOLVER_MIN_CONFIDENCE", "0.6"))
+# Taille maximale de la réponse filtrée de l'outil (~4 caractères par token).
+TOOL_OUTPUT_MAX_CHARS = 4 * int(os.getenv("TRAVEL_TOOL_TOKEN_BUDGET", "600"))
+_listener_thread = None
+_listener_lock = threading.Lock()
+_stop_event = threading.Event()
+
+
+def normalize_city(city_name: str) -> str:
+    """Clé de cache : minuscules, espaces superflus supprimés (comme lower(city) en SQL)."""
+    return " ".join(city_name.lower().split())
+
+
+def _cache_key(key: str, filters: Optional[Dict]):
+    """Sans filtres : le nom seul ; avec filtres : (nom, filtres triés)."""
+    if filters is None:
+        return key
+    return key, tuple(sorted((k, tuple(v) if isinstance(v, list) else v) for k, v in filters.items()))
+
+
+def _render(city_name: str, details: Optional[Dict], filters: Optional[Dict]) -> str:
+    if details is None:
+        return f"Je n'ai trouvé aucune information pour la ville de {city_name} dans la base de données."
+    if filters is None:
+        # Fiche précalculée : le texte est déjà rendu.
+        if isinstance(details, str):
+            return format_city_text(city_name, details)
+        return format_city_info(city_name, details)
+    return format_city_summary(city_name, details, filters, max_chars=TOOL_OUTPUT_MAX_CHARS)
+
+
+def _fetch_details(key: str, filters: Optional[Dict]) -> Union[Dict, str, None]:
+    if filters is None:
+        return fetch_city_digest_text(key) if CITY_DIGESTS else fetch_city_details(key)
+    if RANKING_MODE == "numpy":
+        return _ranker.rank(key, filters)
+    return fetch_city_details_filtered(key, filters)
+
+
+async def _afetch_details(key: str, filters: Optional[Dict]) -> Union[Dict, str, None]:
+    if filters is None:
+        return await afetch_city_digest_text(key) if CITY_DIGESTS else await afetch_city_details(key)
+    if RANKING_MODE == "numpy":
+        # Classement en mémoire (quelques ms) ; seul le premier chargement de la ville passe par un thread.
+        return _ranker.rank(key, filters) if _ranker.is_loaded(key) else await asyncio.to_thread(_ranker.rank, key, filters)
+    return await afetch_city_details_filtered(key, filters)
+
+
+def _store(cache_key, output: str, generation: int, target: Optional[str] = None) -> None:
+    """
+    Met output en cache, sauf si une invalidation est arrivée depuis le début
+    de la lecture. target : ville trouvée pour un nom approché (l'entrée est
+    alors invalidée avec elle).
+    """
+    with _generation_lock:
+        if generation != _generation:
+            return
+        if target is not None:
+            _redirects[cache_key] = target
+            if len(_redirects) > _cache.max_size:
+                # Entrées évincées du cache entre-temps.
+                for evicted in [k for k in _redirects if k not in _cache and k != cache_key]:
+                    del _redirects[evicted]
+        _cache.set(cache_key, output)
+
+
+def get_cached_info_for_city(city_name: str, filters: Optional[Dict] = None) -> str:
+    """
+    Équivalent de get_info_for_city, servi depuis le cache en mémoire quand
+    c'est possible. Les réponses « ville inconnue » sont aussi mises en cache
+    (une insertion ultérieure les invalide), comme celles d'un nom approché
+    (invalidées avec la ville trouvée) ; les erreurs ne le sont jamais, ni les
+    réponses d'une lecture pendant laquelle une invalidation est arrivée.
+
+    Avec `filters` (voir postgres_db.filter_params), les hébergements et
+    activités sont filtrés et classés (database/ranking.py, ou la requête
+    filtrée si RANKING_MODE=sql) et la réponse est le résumé compact de
+    format_city_summary.
+    """
+    key = normalize_city(city_name)
+    cache_key = _cache_key(key, filters)
+    cached = _cache.get(cache_key)
+    if cached is not None:
+        return cached
+
+    generation = _generation
+    try:
+        details = _flight.do((generation, cache_key), lambda: _fetch_details(key, filters))
+    except Exception as e:
+        print(f"Erreur lors de la connexion ou de la requête à la base de données : {e}")
+        return "Erreur lors de la récupération des informations de la base de données."
+
+    if details is None:
+        match = resolve_city(city_name)
+        if match is not None and normalize_city(match["city"]) != key:
+            target = normalize_city(match["city"])
+            output = _approximate_note(city_name, match) + get_cached_info_for_city(match["city"], filters)
+            # Gardée sous le nom demandé si la réponse de la ville trouvée l'est (pas d'erreur).
+            if _cache_key(target, filters) in _cache:
+                _store(cache_key, output, generation, target)
+            return output
+    output = _render(city_name, details, filters)
+    _store(cache_key, output, generation)
+    return output
+
+
+async def aget_cached_info_for_city(city_name: str, filters: Optional[Dict] = None) -> str:
+    """Version asynchrone de get_cached_info_for_city (requête via asyncpg)."""
+    key = normalize_city(city_name)
+    cache_key = _cache_key(key, filters)
+    cached = _cache.get(cache_key)
+    if cached is not None:
+        return cached
+
+    generation = _generation
+    try:
+        details = await _flight.ado((generation, cache_key), lambda: _afetch_details(key, filters))
+    except Exception as e:
+        print(f"Erreur lors de la connexion ou de la requête à la base de données : {e}")
+        return "Erreur lors de la récupération des informations de la base de données."
+
+    if details is None:
+        # La première résolution construit l'index (requête synchrone).
+        match = await asyncio.to_thread(resolve_city, city_name)
+        if match is not None and normalize_city(match["city"]) != key:
+            target = normalize_city(match["city"])
+            output = _approximate_note(city_name, match) + await aget_cached_info_for_city(match["city"], filters)
+            if _cache_key(target, filters) in _cache:
+                _store(cache_key, output, generation, target)
+            return output
+    output = _render(city_name, details, filters)
+    _store(cache_key, output, generation)
+    return output
+
+
+async def afetch_ranked_city(city_name: str, filters: Dict) -> Optional[Dict]:
+    """
+    Fiche filtrée et classée d'une ville, comme pour l'outil avec `filters`
+    (sans mise en cache du texte ni résolution approchée). Les erreurs de
+    base de données sont propagées.
+    """
+    return await _afetch_details(normalize_city(city_name), filters)
+
+
+def load_city_columns(city_name: str) -> Tuple[Optional[CityColumns], str]:
+    """
+    Hébergements et activités d'une ville (colonnes du classement, en
+    mémoire après la première demande), ou de la destination approchée : dans
+    ce cas, le second élément est la note à afficher. Les erreurs de base de
+    données sont propagées.
+    """
+    columns = _ranker.load(normalize_city(city_name))
+    if columns is not None:
+        return columns, ""
+    match = resolve_city(city_name)
+    if match is None or normalize_city(match["city"]) == normalize_city(city_name):
+        return None, ""
+    return _ranker.load(normalize_city(match["city"])), _approximate_note(city_name, match)
+
+
+def resolve_city(city_name: str) -> Optional[Dict]:
+    """
+    Destination la plus proche de city_name (accents, alias, pays, fautes de
+    frappe), ou None si rien n'atteint CITY_RESOLVER_MIN_CONFIDENCE.
+    """
+    try:
+        match = _resolver.resolve(city_name)
+    except Exception as e:
+        print(f"Erreur lors de la résolution du nom de ville : {e}")
+        return None
+    if match is None or match["confidence"] < RESOLVER_MIN_CONFIDENCE:
+        return None
+    return match
+
+
+def _approximate_note(city_name: str, match: Dict) -> str:
+    return (
+        f"(« {city_name} » ne figure pas tel quel dans la base ; destination la plus proche : "
+        f"{match['city']} ({match['country']}), confiance {match['confidence']:.2f}.)\n"
+    )
+
+
+def _unique_cities(city_names: List[str]) -> List[str]:
+    seen, cities = set(), []
+    for name in city_names:
+        if name.strip() and normalize_city(name) not in seen:
+            seen.add(normalize_city(name))
+            cities.append(name.strip())
+    return cities
+
+
+def _resolve_missing(cities: List[str], rows: Dict[str, Dict]) -> Dict[str, Dict]:
+    """Villes absentes de `rows` -> destination approchée (resolve_city), si elle existe."""
+    matches = {}
+    for name in cities:
+        if normalize_city(name) not in rows:
+            match = resolve_city(name)
+            if match is not None and normalize_city(match["city"]) != normalize_city(name):
+                matches[name] = match
+    return matches
+
+
+def _render_comparison(cities: List[str], rows: Dict[str, Dict], matches: Dict[str, Dict]) -> str:
+    ordered, missing, notes = [], [], []
+    for name in cities:
+        key = normalize_city(matches[name]["city"]) if name in matches else normalize_city(name)
+        row = rows.get(key)
+        if row is None:
+            missing.append(name)
+            continue
+        if name in matches:
+            notes.append(_approximate_note(name, matches[name]))
+        if row not in ordered:
+            ordered.append(row)
+    return "".join(notes) + format_cities_comparison(cities, ordered, missing)
+
+
+def compare_cities(city_names: List[str], filters: Optional[Dict] = None) -> str:
+    """
+    Comparatif de plusieurs villes en une requête (deux si certains noms
+    doivent être résolus de façon approchée). Non mis en cache : la
+    combinaison de villes se répète rarement.
+    """
+    cities = _unique_cities(city_names)
+    try:
+        rows = fetch_cities_comparison(cities, filters)
+        matches = _resolve_missing(cities, rows)
+        if matches:
+            rows.update(fetch_cities_comparison([m["city"] for m in matches.values()], filters))
+    except Exception as e:
+        print(f"Erreur lors de la connexion ou de la requête à la base de données : {e}")
+        return "Erreur lors de la récupération des informations de la base de données."
+    return _render_comparison(cities, rows, matches)
+
+
+async def acompare_cities(city_names: List[str], filters: Optional[Dict] = None) -> str:
+    """Version asynchrone de compare_cities (requêtes via asyncpg)."""
+    cities = _unique_cities(city_names)
+    try:
+        rows = await afetch_cities_comparison(cities, filters)
+        matches = await asyncio.to_thread(_resolve_missing, cities, rows)
+        if matches:
+            rows.update(await afetch_cities_comparison([m["city"] for m in matches.values()], filters))
+    except Exception as e:
+        print(f"Erreur lors de la connexion ou de la requête à la base de données : {e}")
+        return "Erreur lors de la récupération des informations de la base de données."
+    return _render_comparison(cities, rows, matches)
+
+
+def get_city_resolver_stats() -> Dict:
+    return _resolver.stats()
+
+
+def get_ranking_stats() -> Dict:
+    return _ranker.stats()
+
+
+def add_invalidation_callback(callback) -> None:
+    """Enregistre callback(city) appelé à chaque invalidation ('*' = toutes les villes)."""
+    _invalidation_callbacks.append(callback)
+
+
+def invalidate_city(city_name: str) -> None:
+    global _generation
+    # Avant de vider le cache : une lecture en cours ne peut plus y écrire.
+    with _generation_lock:
+        _generation += 1
+        if city_name == "*":
+            _redirects.clear()
+        else:
+            key = normalize_city(city_name)
+            redirected = {k for k, target in _redirects.items() if target == key}
+            for k in redirected:
+                del _redirects[k]
+    if city_name == "*":
+        _cache.clear()
+    else:
+        _cache.invalidate_where(lambda k: k == key or (isinstance(k, tuple) and k[0] == key) or k in redirected)
+    for callback in _invalidation_callbacks:
+        try:
+            callback(city_name)
+        except Exception as e:
+            print(f"Erreur dans un callback d'invalidation : {e}")
+
+
+def get_city_cache_stats() -> Dict:
+    stats = _cache.stats()
+    stats["listener_running"] = _listener_thread is not None and _listener_thread.is_alive()
+    flight = _flight.stats()
+    stats["coalesced_lookups"] = flight["shared"]
+    stats["lookups_in_flight"] = flight["in_flight"]
+    return stats
+
+
+def _listen_forever():
+    """
+    Écoute NOTIFY sur une connexion dédiée (hors pool, en autocommit).
+    À chaque (re)connexion le cache est vidé : des notifications ont pu être
+    manquées pendant la coupure.
+    """
+    backoff = 1
+    while not _stop_event.is_set():
+        conn = None
+        try:
+            conn = psycopg2.connect(_get_db_uri())
+            conn.set_session(autocommit=True)
+            with conn.cursor() as cur:
+                cur.execute(f"LISTEN {NOTIFY_CHANNEL};")
+            invalidate_city("*")
+            backoff = 1
+            while not _stop_event.is_set():
+                if select.select([conn], [], [], 5) == ([], [], []):
+                    continue
+                conn.poll()
+                while conn.notifies:
+                    invalidate_city(conn.notifies.pop(0).payload)
+        except Exception as e:
+            print(f"Erreur de l'écoute des invalidations du cache : {e}")
+            _stop_event.wait(backoff)
+            backoff = min(backoff * 2, 60)
+        finally:
+            if conn is not None:
+                conn.close()
+
+
+def start_invalidation_listener() -> None:
+    """Démarre (une seule fois par processus) le thread d'écoute LISTEN/NOTIFY."""
+    global _listener_thread
+    with _listener_lock:
+        if _listener_thread is not None and _listener_thread.is_alive():
+            return
+        _stop_event.clear()
+        _listener_thread = threading.Thread(
+            target=_listen_forever, name="city-cache-listener", daemon=True
+        )
+        _listener_thread.start()
+
+
+def stop_invalidation_listener() -> None:
+    _stop_event.set()
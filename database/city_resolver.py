@@ -0,0 +1,302 @@
+# Fichier : database/city_resolver.py
+# Résolution approximative des noms de villes ("tokio", "Reykjavík",
+# "bangkok thailand", fautes de frappe) vers une destination de la base,
+# à partir d'un index en mémoire de trigrammes (listes d'identifiants
+# NumPy pour le comptage des trigrammes partagés).
+
+import threading
+import time
+from typing import Callable, Dict, Iterable, List, Optional, Set
+
+import numpy as np
+
+from database.postgres_db import get_all_cities, get_cities_by_name
+from utils.text import normalize_text
+
+
+def trigrams(text: str) -> Set[str]:
+    """Trigrammes de chaque mot, complété comme pg_trgm ('  mot ')."""
+    grams = set()
+    for word in text.split():
+        padded = f"  {word} "
+        grams.update(padded[i:i + 3] for i in range(len(padded) - 2))
+    return grams
+
+
+def edit_ratio(a: str, b: str, floor: float = 0.0) -> Optional[float]:
+    """
+    1 - distance de Levenshtein / longueur de la plus longue chaîne, ou None
+    si le ratio ne peut pas dépasser `floor` : seule une bande de la matrice
+    est calculée et le calcul s'arrête dès que la distance est trop grande.
+    """
+    if a == b:
+        return 1.0
+    longest = max(len(a), len(b))
+    if not a or not b:
+        return 0.0 if floor <= 0.0 else None
+    max_distance = int((1.0 - floor) * longest)
+    if abs(len(a) - len(b)) > max_distance:
+        return None
+    too_far = longest + 1
+    previous = list(range(len(b) + 1))
+    for i, ca in enumerate(a, 1):
+        current = [too_far] * (len(b) + 1)
+        current[0] = i if i <= max_distance else too_far
+        row_min = current[0]
+        for j in range(max(1, i - max_distance), min(len(b), i + max_distance) + 1):
+            value = min(previous[j] + 1, current[j - 1] + 1, previous[j - 1] + (ca != b[j - 1]))
+            current[j] = value
+            row_min = min(row_min, value)
+        if row_min > max_distance:
+            return None
+        previous = current
+    distance = previous[-1]
+    return None if distance > max_distance else 1.0 - distance / longest
+
+
+# Sentinelle en fin de liste : np.searchsorted ne sort jamais du tableau.
+_SENTINEL = np.iinfo(np.int32).max
+
+
+class CityResolver:
+    """
+    Index des noms normalisés (ville, ville + pays, alias, alias + pays) de
+    toutes les destinations. resolve() renvoie la destination la plus proche
+    et un score de confiance entre 0 et 1.
+
+    L'index complet est construit à la première demande ; ensuite
+    refresh_city() le met à jour pour une seule ville (notifications
+    'destination_changed'), '*' le reconstruit entièrement.
+    """
+
+    def __init__(
+        self,
+        load_all: Callable[[], List[Dict]] = get_all_cities,
+        load_city: Callable[[str], List[Dict]] = get_cities_by_name,
+        candidates: int = 3,
+        shortlist: int = 64,
+        seed_postings: int = 6,
+        max_postings: int = 3000,
+    ):
+        self.load_all = load_all
+        self.load_city = load_city
+        self.candidates = candidates
+        # Présélection : les noms présents dans les listes des trigrammes les
+        # plus rares (au moins seed_postings listes, puis d'autres tant que
+        # le budget de max_postings entrées le permet). Une faute de frappe
+        # ne retire que trois trigrammes au bon nom : il figure dans presque
+        # toutes ces listes. Les `shortlist` noms qui y apparaissent le plus
+        # souvent sont ensuite comptés sur tous les trigrammes de la requête,
+        # fréquents compris, avant le score exact.
+        self.shortlist = shortlist
+        self.seed_postings = seed_postings
+        self.max_postings = max_postings
+        self._lock = threading.RLock()
+        self._loaded = False
+        self._reset()
+        self._stats = {
+            "lookups": 0, "exact": 0, "fuzzy": 0, "misses": 0,
+            "lookup_time_total": 0.0, "rebuilds": 0, "incremental_updates": 0,
+        }
+
+    def _reset(self) -> None:
+        self._destinations: Dict[int, Dict] = {}
+        self._by_city: Dict[str, Set[int]] = {}
+        self._names: Dict[int, tuple] = {}
+        self._name_ids_by_dest: Dict[int, List[int]] = {}
+        self._exact: Dict[str, Set[int]] = {}
+        self._postings: Dict[str, Set[int]] = {}
+        self._posting_arrays: Dict[str, np.ndarray] = {}  # listes triées, reconstruites à la demande
+        self._shared = np.zeros(0, dtype=np.int16)  # compteurs par nom, remis à zéro après chaque recherche
+        self._next_name_id = 0
+
+    # --- Construction de l'index ---
+
+    def _add_destination(self, row: Dict) -> None:
+        dest_id = row["id"]
+        country = normalize_text(row.get("country") or "")
+        names = set()
+        for name in [row["city"]] + list(row.get("aliases") or []):
+            key = normalize_text(name)
+            if key:
+                names.add(key)
+                if country:
+                    names.add(f"{key} {country}")
+        self._destinations[dest_id] = {"id": dest_id, "city": row["city"], "country": row.get("country")}
+        self._by_city.setdefault(row["city"].lower(), set()).add(dest_id)
+        name_ids = []
+        for key in names:
+            name_id = self._next_name_id
+            self._next_name_id += 1
+            grams = trigrams(key)
+            self._names[name_id] = (key, dest_id, len(grams))
+            self._exact.setdefault(key, set()).add(name_id)
+            for gram in grams:
+                self._postings.setdefault(gram, set()).add(name_id)
+                self._posting_arrays.pop(gram, None)
+            name_ids.append(name_id)
+        self._name_ids_by_dest[dest_id] = name_ids
+
+    def _remove_destination(self, dest_id: int) -> None:
+        dest = self._destinations.pop(dest_id, None)
+        if dest is None:
+            return
+        city_ids = self._by_city.get(dest["city"].lower())
+        if city_ids is not None:
+            city_ids.discard(dest_id)
+            if not city_ids:
+                del self._by_city[dest["city"].lower()]
+        for name_id in self._name_ids_by_dest.pop(dest_id, []):
+            key, _, _ = self._names.pop(name_id)
+            self._exact[key].discard(name_id)
+            if not self._exact[key]:
+                del self._exact[key]
+            for gram in trigrams(key):
+                posting = self._postings.get(gram)
+                if posting is not None:
+                    posting.discard(name_id)
+                    self._posting_arrays.pop(gram, None)
+                    if not posting:
+                        del self._postings[gram]
+
+    def rebuild(self, rows: Optional[Iterable[Dict]] = None) -> None:
+        rows = list(self.load_all() if rows is None else rows)
+        with self._lock:
+            self._reset()
+            for row in rows:
+                self._add_destination(row)
+            for gram in self._postings:
+                self._posting_array(gram)
+            self._loaded = True
+            self._stats["rebuilds"] += 1
+
+    def refresh_city(self, city: str) -> None:
+        """Callback d'invalidation : city = lower(city) ou '*'."""
+        with self._lock:
+            if not self._loaded:
+                return  # l'index sera construit complet à la première demande
+        if city == "*":
+            self.rebuild()
+            return
+        rows = self.load_city(city)
+        with self._lock:
+            for dest_id in set(self._by_city.get(city.lower(), ())) | {row["id"] for row in rows}:
+                self._remove_destination(dest_id)
+            for row in rows:
+                self._add_destination(row)
+            self._stats["incremental_updates"] += 1
+
+    def _ensure_loaded(self) -> None:
+        if not self._loaded:
+            with self._lock:
+                if not self._loaded:
+                    self.rebuild()
+
+    # --- Recherche ---
+
+    def resolve(self, query: str) -> Optional[Dict]:
+        """
+        Destination la plus proche de `query` :
+        {"id", "city", "country", "confidence", "matched"} ou None.
+        """
+        start = time.perf_counter()
+        self._ensure_loaded()
+        key = normalize_text(query)
+        with self._lock:
+            result = self._resolve(key) if key else None
+            self._stats["lookups"] += 1
+            if result is None:
+                self._stats["misses"] += 1
+            elif result["confidence"] == 1.0:
+                self._stats["exact"] += 1
+            else:
+                self._stats["fuzzy"] += 1
+            self._stats["lookup_time_total"] += time.perf_counter() - start
+        return result
+
+    def _result(self, dest_id: int, confidence: float, matched: str) -> Dict:
+        return dict(self._destinations[dest_id], confidence=round(confidence, 3), matched=matched)
+
+    def _resolve(self, key: str) -> Optional[Dict]:
+        exact = self._exact.get(key)
+        if exact:
+            dest_ids = {self._names[name_id][1] for name_id in exact}
+            # Plusieurs destinations du même nom : la confiance est partagée.
+            return self._result(min(dest_ids), 1.0 / len(dest_ids), key)
+
+        grams = trigrams(key)
+        postings = sorted((self._posting_array(g) for g in grams if g in self._postings), key=len)
+        if not postings:
+            return None
+
+        # Comptage vectorisé sur les listes les plus rares.
+        seeds, used = [], 0
+        for posting in postings:
+            if len(seeds) >= self.seed_postings and used + len(posting) > self.max_postings:
+                break
+            seeds.append(posting[:-1])
+            used += len(posting) - 1
+        if len(self._shared) < self._next_name_id:
+            self._shared = np.zeros(max(self._next_name_id, 2 * len(self._shared)), dtype=np.int16)
+        for posting in seeds:
+            self._shared[posting] += 1
+        seen = np.concatenate(seeds)
+        counts = self._shared[seen]
+        self._shared[seen] = 0
+        # Un nom apparaît au plus len(seeds) fois dans `seen` : les
+        # shortlist * len(seeds) meilleures occurrences contiennent les
+        # `shortlist` meilleurs noms, dédoublonnés ensuite sur peu d'entrées.
+        keep = self.shortlist * len(seeds)
+        if len(seen) > keep:
+            top = np.argpartition(-counts, keep - 1)[:keep]
+            seen, counts = seen[top], counts[top]
+        names, first = np.unique(seen, return_index=True)
+        shared = counts[first]
+        if len(names) > self.shortlist:
+            top = np.argpartition(-shared, self.shortlist - 1)[:self.shortlist]
+            names, shared = names[top], shared[top]
+
+        # Trigrammes partagés exacts des finalistes : listes restantes (triées).
+        shared = shared.astype(np.int32)
+        for posting in postings[len(seeds):]:
+            shared += posting[np.searchsorted(posting, names)] == names
+
+        # Score exact (Dice), puis distance d'édition sur les meilleures destinations.
+        sizes = np.fromiter((self._names[name_id][2] for name_id in names.tolist()), dtype=np.int32, count=len(names))
+        dice = 2.0 * shared / (len(grams) + sizes)
+        best, scored = None, set()
+        for i in np.argsort(-dice, kind="stable").tolist():
+            name, dest_id, _ = self._names[int(names[i])]
+            if dest_id in scored:
+                continue
+            scored.add(dest_id)
+            score = float(dice[i])
+            ratio = edit_ratio(key, name, best[0] if best is not None and best[0] > score else score)
+            if ratio is not None:
+                score = max(score, ratio)
+            if best is None or score > best[0]:
+                best = (score, dest_id, name)
+            if len(scored) >= self.candidates:
+                break
+        return self._result(best[1], best[0], best[2])
+
+    def _posting_array(self, gram: str) -> np.ndarray:
+        """Liste du trigramme sous forme de tableau trié, terminé par la sentinelle."""
+        array = self._posting_arrays.get(gram)
+        if array is None:
+            posting = self._postings[gram]
+            array = np.empty(len(posting) + 1, dtype=np.int32)
+            array[:-1] = np.fromiter(posting, dtype=np.int32, count=len(posting))
+            array[:-1].sort()
+            array[-1] = _SENTINEL
+            self._posting_arrays[gram] = array
+        return array
+
+    def stats(self) -> Dict:
+        with self._lock:
+            stats = dict(self._stats)
+            stats["destinations"] = len(self._destinations)
+            stats["names"] = len(self._names)
+            stats["trigrams"] = len(self._postings)
+        stats["lookup_avg"] = stats["lookup_time_total"] / stats["lookups"] if stats["lookups"] else 0.0
+        return stats
@@ -0,0 +1,197 @@
+# Fichier : database/conversation_store.py
+# Historique des conversations dans PostgreSQL (06_conversations.sql).
+# Écriture en « write-behind » : append() dépose le message dans une file en
+# mémoire et rend la main aussitôt ; un thread l'écrit ensuite par lots, une
+# transaction par lot. Lecture paginée : les N derniers messages, puis les
+# pages plus anciennes à la demande.
+
+import atexit
+import os
+import queue
+import threading
+import time
+from datetime import datetime, timezone
+from typing import Callable, Dict, List, Optional, Tuple
+
+from psycopg2.extras import RealDictCursor, execute_values
+
+from database.postgres_db import get_db_connection
+
+# (conversation_id, user_id, rôle, contenu, horodatage)
+Message = Tuple[str, str, str, str, datetime]
+
+
+def write_messages(batch: List[Message]) -> None:
+    """Écrit un lot de messages (et met à jour leurs conversations) en une transaction."""
+    conversations = {}
+    for conversation_id, user_id, _, _, created_at in batch:
+        conversations[conversation_id] = (user_id, created_at)
+    with get_db_connection() as conn:
+        with conn.cursor() as cur:
+            execute_values(
+                cur,
+                """
+                INSERT INTO conversations (id, user_id, created_at, updated_at) VALUES %s
+                ON CONFLICT (id) DO UPDATE
+                SET updated_at = GREATEST(conversations.updated_at, EXCLUDED.updated_at)
+                """,
+                [(cid, user_id, ts, ts) for cid, (user_id, ts) in conversations.items()],
+            )
+            execute_values(
+                cur,
+                "INSERT INTO conversation_messages (conversation_id, role, content, created_at) VALUES %s",
+                [(cid, role, content, ts) for cid, _, role, content, ts in batch],
+                page_size=len(batch),
+            )
+
+
+class ConversationWriter:
+    """
+    File d'écriture en arrière-plan. Un seul thread écrit, dans l'ordre
+    d'arrivée : l'ordre des messages d'une conversation est conservé. Un lot
+    part dès qu'il atteint batch_size messages ou flush_interval secondes
+    après son premier message. En cas d'erreur, le lot est retenté
+    (max_retries fois, avec attente croissante) puis abandonné.
+
+    append() ne bloque jamais : si la file est pleine (base indisponible
+    longtemps), le message est compté comme perdu plutôt que de ralentir le tour.
+    """
+
+    def __init__(self, write_batch: Callable[[List[Message]], None] = write_messages, batch_size: int = 100,
+                 flush_interval: float = 0.2, max_queue: int = 10_000, max_retries: int = 5):
+        self._write_batch = write_batch
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.max_retries = max_retries
+        self._queue: "queue.Queue[Message]" = queue.Queue(maxsize=max_queue)
+        self._cond = threading.Condition()
+        self._pending = 0
+        self._thread: Optional[threading.Thread] = None
+        self._stats = {"queued": 0, "written": 0, "batches": 0, "errors": 0, "dropped": 0}
+
+    def append(self, conversation_id: str, user_id: str, role: str, content: str) -> bool:
+        item = (conversation_id, user_id, role, content, datetime.now(timezone.utc))
+        with self._cond:
+            try:
+                self._queue.put_nowait(item)
+            except queue.Full:
+                self._stats["dropped"] += 1
+                print("Historique : file d'écriture pleine, message non enregistré.")
+                return False
+            self._pending += 1
+            self._stats["queued"] += 1
+        self.start()
+        return True
+
+    def _next_batch(self) -> List[Message]:
+        batch = [self._queue.get()]
+        deadline = time.monotonic() + self.flush_interval
+        while len(batch) < self.batch_size:
+            remaining = deadline - time.monotonic()
+            try:
+                batch.append(self._queue.get(timeout=remaining) if remaining > 0 else self._queue.get_nowait())
+            except queue.Empty:
+                break
+        return batch
+
+    def _write(self, batch: List[Message]) -> None:
+        for attempt in range(self.max_retries + 1):
+            try:
+                self._write_batch(batch)
+                outcome = "written"
+                break
+            except Exception as e:
+                print(f"Erreur lors de l'écriture de l'historique (essai {attempt + 1}) : {e}")
+                with self._cond:
+                    self._stats["errors"] += 1
+                if attempt < self.max_retries:  # pas d'attente après le dernier essai
+                    time.sleep(min(0.1 * 2 ** attempt, 5.0))
+        else:
+            outcome = "dropped"
+        with self._cond:
+            self._stats[outcome] += len(batch)
+            self._stats["batches"] += outcome == "written"
+            self._pending -= len(batch)
+            self._cond.notify_all()
+
+    def _run(self) -> None:
+        while True:
+            self._write(self._next_batch())
+
+    def start(self) -> None:
+        """Démarre le thread d'écriture (idempotent)."""
+        with self._cond:
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name="conversation-writer", daemon=True)
+                self._thread.start()
+
+    def flush(self, timeout: Optional[float] = None) -> bool:
+        """Attend que tous les messages déposés soient écrits (ou abandonnés)."""
+        with self._cond:
+            return self._cond.wait_for(lambda: self._pending == 0, timeout)
+
+    def stats(self) -> Dict:
+        with self._cond:
+            stats = dict(self._stats)
+            stats["pending"] = self._pending
+        return stats
+
+
+_writer: Optional[ConversationWriter] = None
+_writer_lock = threading.Lock()
+
+
+def get_conversation_writer() -> ConversationWriter:
+    """File d'écriture du processus ; vidée (5 s max) à l'arrêt de l'interpréteur."""
+    global _writer
+    if _writer is None:
+        with _writer_lock:
+            if _writer is None:
+                _writer = ConversationWriter(
+                    batch_size=int(os.getenv("HISTORY_WRITE_BATCH", "100")),
+                    flush_interval=float(os.getenv("HISTORY_FLUSH_INTERVAL", "0.2")),
+                    max_queue=int(os.getenv("HISTORY_QUEUE_MAX", "10000")),
+                )
+                atexit.register(_writer.flush, 5.0)
+    return _writer
+
+
+def append_message(conversation_id: str, user_id: str, role: str, content: str) -> bool:
+    """Enregistre un message en arrière-plan ; ne bloque pas le tour."""
+    return get_conversation_writer().append(conversation_id, user_id, role, content)
+
+
+def load_messages(conversation_id: str, before_id: Optional[int] = None, limit: int = 20) -> Tuple[List[Dict], bool]:
+    """
+    Les `limit` messages précédant before_id (les derniers si None), dans
+    l'ordre de la conversation, et un booléen : reste-t-il des messages plus anciens ?
+    """
+    with get_db_connection() as conn:
+        with conn.cursor(cursor_factory=RealDictCursor) as cur:
+            cur.execute(
+                """
+                SELECT id, role, content FROM conversation_messages
+                WHERE conversation_id = %s AND (%s::bigint IS NULL OR id < %s::bigint)
+                ORDER BY id DESC
+                LIMIT %s;
+                """,
+                (conversation_id, before_id, before_id, limit + 1),
+            )
+            rows = [dict(row) for row in cur.fetchall()]
+    return rows[:limit][::-1], len(rows) > limit
+
+
+def latest_conversation(user_id: str) -> Optional[str]:
+    """Conversation la plus récemment active de l'utilisateur, ou None."""
+    with get_db_connection() as conn:
+        with conn.cursor() as cur:
+            cur.execute(
+                "SELECT id FROM conversations WHERE user_id = %s ORDER BY updated_at DESC LIMIT 1;",
+                (user_id,),
+            )
+            row = cur.fetchone()
+    return row[0] if row else None
+
+
+def get_history_stats() -> Dict:
+    return get_conversation_writer().stats()
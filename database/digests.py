@@ -0,0 +1,104 @@
+"""
+Fiches de destination précalculées (table destination_digests, maintenue par
+les triggers de database/init/08_destination_digests.sql).
+
+- check : compare chaque fiche au chemin d'assemblage (même JSON que
+  CITY_DETAILS_QUERY, recalculé en SQL) et son texte au rendu Python de
+  format_city_body ; signale les villes sans fiche, les fiches orphelines,
+  périmées ou dont le texte diverge. Code de sortie 1 si une fiche est fausse.
+- refresh : recalcule les fiches (toutes, ou celles des villes indiquées),
+  par exemple après une modification de format_city_body.
+
+Usage : python -m database.digests check | refresh [--city Paris --city Lyon]
+"""
+
+import argparse
+import json
+import sys
+from typing import Dict, List, Optional
+
+from database.postgres_db import format_city_body, get_db_connection
+
+# Fiches attendues, calculées comme CITY_DETAILS_QUERY (première destination
+# de chaque nom), comparées en JSONB (ordre des clés indifférent).
+CHECK_QUERY = """
+    WITH expected AS (
+        SELECT DISTINCT ON (lower(d.city))
+            lower(d.city) AS city_key,
+            d.id AS destination_id,
+            jsonb_build_object(
+                'destination', to_jsonb(d),
+                'accommodations', COALESCE((SELECT jsonb_agg(to_jsonb(a) ORDER BY a.id) FROM accommodations a
+                                            WHERE a.destination_id = d.id), '[]'::jsonb),
+                'activities', COALESCE((SELECT jsonb_agg(to_jsonb(t) ORDER BY t.id) FROM activities t
+                                        WHERE t.destination_id = d.id), '[]'::jsonb)
+            ) AS digest
+        FROM destinations d
+        ORDER BY lower(d.city), d.id
+    )
+    SELECT
+        COALESCE(e.city_key, g.city_key) AS city_key,
+        CASE WHEN g.city_key IS NULL THEN 'missing'
+             WHEN e.city_key IS NULL THEN 'orphaned'
+             ELSE 'stale' END AS problem
+    FROM expected e
+    FULL JOIN destination_digests g ON g.city_key = e.city_key
+    WHERE g.city_key IS NULL OR e.city_key IS NULL
+       OR g.destination_id <> e.destination_id OR g.digest <> e.digest
+    ORDER BY 1;
+"""
+
+
+def check_digests(max_examples: int = 20) -> Dict:
+    """
+    Rapport de cohérence : nombre de fiches, villes par problème (au plus
+    max_examples exemples chacun) et 'consistent'.
+    """
+    problems: Dict[str, List[str]] = {"missing": [], "orphaned": [], "stale": [], "text_mismatch": []}
+    with get_db_connection() as conn:
+        with conn.cursor() as cur:
+            cur.execute(CHECK_QUERY)
+            for city_key, problem in cur.fetchall():
+                problems[problem].append(city_key)
+        # Curseur côté serveur : le texte de toutes les fiches sans tout charger en mémoire.
+        checked = 0
+        with conn.cursor(name="digest_text_check") as cur:
+            cur.itersize = 2000
+            cur.execute("SELECT city_key, digest, digest_text FROM destination_digests ORDER BY city_key;")
+            for city_key, digest, digest_text in cur:
+                checked += 1
+                if format_city_body(digest) != digest_text:
+                    problems["text_mismatch"].append(city_key)
+    return {
+        "digests": checked,
+        "consistent": not any(problems.values()),
+        **{name: len(keys) for name, keys in problems.items()},
+        "examples": {name: keys[:max_examples] for name, keys in problems.items() if keys},
+    }
+
+
+def refresh_digests(cities: Optional[List[str]] = None) -> int:
+    """Recalcule les fiches des villes données (toutes si None) ; renvoie le nombre de fiches écrites."""
+    keys = [" ".join(city.lower().split()) for city in cities] if cities else None
+    with get_db_connection() as conn:
+        with conn.cursor() as cur:
+            cur.execute("SELECT refresh_destination_digests(%s::text[]);", (keys,))
+            return cur.fetchone()[0]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("command", choices=("check", "refresh"))
+    parser.add_argument("--city", action="append", help="ville à recalculer (répétable ; défaut : toutes)")
+    args = parser.parse_args()
+    if args.command == "refresh":
+        print(f"✅ {refresh_digests(args.city)} fiche(s) recalculée(s)")
+        return
+    report = check_digests()
+    print(json.dumps(report, indent=2, ensure_ascii=False))
+    if not report["consistent"]:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,49 @@
+-- Fichier : database/init/01_schema.sql
+-- Schéma de base (exécuté automatiquement par l'image postgres au premier
+-- démarrage via /docker-entrypoint-initdb.d, ou par postgres_db.apply_schema()).
+
+CREATE TABLE IF NOT EXISTS destinations (
+    id SERIAL PRIMARY KEY,
+    country VARCHAR(100) NOT NULL,
+    city VARCHAR(100) NOT NULL,
+    description TEXT,
+    best_time_to_visit VARCHAR(255),
+    average_budget_per_day NUMERIC(10, 2),
+    visa_required BOOLEAN DEFAULT FALSE,
+    visa_info TEXT,
+    vaccinations TEXT,
+    safety_rating INTEGER CHECK (safety_rating BETWEEN 1 AND 5)
+);
+
+CREATE TABLE IF NOT EXISTS accommodations (
+    id SERIAL PRIMARY KEY,
+    destination_id INTEGER NOT NULL REFERENCES destinations(id) ON DELETE CASCADE,
+    name VARCHAR(255) NOT NULL,
+    type VARCHAR(50),
+    price_range VARCHAR(10),
+    average_price_per_night NUMERIC(10, 2),
+    rating NUMERIC(2, 1),
+    amenities TEXT[],
+    address TEXT,
+    booking_url TEXT
+);
+
+CREATE TABLE IF NOT EXISTS activities (
+    id SERIAL PRIMARY KEY,
+    destination_id INTEGER NOT NULL REFERENCES destinations(id) ON DELETE CASCADE,
+    name VARCHAR(255) NOT NULL,
+    category VARCHAR(50),
+    description TEXT,
+    duration_hours NUMERIC(4, 1),
+    price NUMERIC(10, 2),
+    booking_required BOOLEAN DEFAULT FALSE,
+    best_time VARCHAR(255)
+);
+
+-- Recherche de ville insensible à la casse : get_info_for_city filtre sur
+-- lower(city), ce qui permet un Index Scan au lieu d'un parcours complet.
+CREATE INDEX IF NOT EXISTS idx_destinations_city_lower ON destinations (lower(city));
+
+-- PostgreSQL n'indexe pas automatiquement les clés étrangères.
+CREATE INDEX IF NOT EXISTS idx_accommodations_destination_id ON accommodations (destination_id);
+CREATE INDEX IF NOT EXISTS idx_activities_destination_id ON activities (destination_id);
@@ -0,0 +1,70 @@
+-- Fichier : database/init/02_cache_invalidation.sql
+-- Notifie le canal 'destination_changed' (payload : lower(city), ou '*' pour
+-- tout invalider) à chaque modification d'une destination ou de ses
+-- hébergements / activités. Écouté par database/city_cache.py.
+-- PostgreSQL dédoublonne les notifications identiques d'une même transaction.
+
+CREATE OR REPLACE FUNCTION notify_destination_change() RETURNS trigger AS $$
+DECLARE
+    changed_city TEXT;
+BEGIN
+    IF TG_OP = 'TRUNCATE' THEN
+        PERFORM pg_notify('destination_changed', '*');
+        RETURN NULL;
+    END IF;
+
+    IF TG_TABLE_NAME = 'destinations' THEN
+        IF TG_OP IN ('UPDATE', 'DELETE') THEN
+            PERFORM pg_notify('destination_changed', lower(OLD.city));
+        END IF;
+        IF TG_OP IN ('INSERT', 'UPDATE') THEN
+            PERFORM pg_notify('destination_changed', lower(NEW.city));
+        END IF;
+        RETURN NULL;
+    END IF;
+
+    IF TG_OP IN ('UPDATE', 'DELETE') THEN
+        SELECT lower(city) INTO changed_city FROM destinations WHERE id = OLD.destination_id;
+        IF changed_city IS NOT NULL THEN
+            PERFORM pg_notify('destination_changed', changed_city);
+        END IF;
+    END IF;
+    IF TG_OP IN ('INSERT', 'UPDATE') THEN
+        SELECT lower(city) INTO changed_city FROM destinations WHERE id = NEW.destination_id;
+        IF changed_city IS NOT NULL THEN
+            PERFORM pg_notify('destination_changed', changed_city);
+        END IF;
+    END IF;
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+DROP TRIGGER IF EXISTS destinations_notify_change ON destinations;
+CREATE TRIGGER destinations_notify_change
+    AFTER INSERT OR UPDATE OR DELETE ON destinations
+    FOR EACH ROW EXECUTE FUNCTION notify_destination_change();
+
+DROP TRIGGER IF EXISTS accommodations_notify_change ON accommodations;
+CREATE TRIGGER accommodations_notify_change
+    AFTER INSERT OR UPDATE OR DELETE ON accommodations
+    FOR EACH ROW EXECUTE FUNCTION notify_destination_change();
+
+DROP TRIGGER IF EXISTS activities_notify_change ON activities;
+CREATE TRIGGER activities_notify_change
+    AFTER INSERT OR UPDATE OR DELETE ON activities
+    FOR EACH ROW EXECUTE FUNCTION notify_destination_change();
+
+DROP TRIGGER IF EXISTS destinations_notify_truncate ON destinations;
+CREATE TRIGGER destinations_notify_truncate
+    AFTER TRUNCATE ON destinations
+    FOR EACH STATEMENT EXECUTE FUNCTION notify_destination_change();
+
+DROP TRIGGER IF EXISTS accommodations_notify_truncate ON accommodations;
+CREATE TRIGGER accommodations_notify_truncate
+    AFTER TRUNCATE ON accommodations
+    FOR EACH STATEMENT EXECUTE FUNCTION notify_destination_change();
+
+DROP TRIGGER IF EXISTS activities_notify_truncate ON activities;
+CREATE TRIGGER activities_notify_truncate
+    AFTER TRUNCATE ON activities
+    FOR EACH STATEMENT EXECUTE FUNCTION notify_destination_change();
@@ -0,0 +1,17 @@
+-- Fichier : database/init/03_natural_keys.sql
+-- Clés naturelles utilisées par le chargement en masse (database/bulk_load.py)
+-- pour les upserts : une ville par pays, un nom d'hébergement / d'activité
+-- par destination.
+
+CREATE UNIQUE INDEX IF NOT EXISTS uq_destinations_country_city ON destinations (country, city);
+CREATE UNIQUE INDEX IF NOT EXISTS uq_accommodations_destination_name ON accommodations (destination_id, name);
+CREATE UNIQUE INDEX IF NOT EXISTS uq_activities_destination_name ON activities (destination_id, name);
+
+-- Avancement des chargements, pour reprendre un fichier là où il s'est arrêté.
+CREATE TABLE IF NOT EXISTS bulk_load_progress (
+    source TEXT PRIMARY KEY,
+    fingerprint TEXT NOT NULL,
+    rows_done BIGINT NOT NULL DEFAULT 0,
+    completed BOOLEAN NOT NULL DEFAULT FALSE,
+    updated_at TIMESTAMPTZ NOT NULL DEFAULT now()
+);
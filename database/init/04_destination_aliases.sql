@@ -0,0 +1,5 @@
+-- Fichier : database/init/04_destination_aliases.sql
+-- Autres noms d'une destination ("Tokio", "Cuzco"...), indexés avec le nom
+-- principal par database/city_resolver.py.
+
+ALTER TABLE destinations ADD COLUMN IF NOT EXISTS aliases TEXT[];
@@ -0,0 +1,10 @@
+-- Fichier : database/init/05_filter_indexes.sql
+-- Index de l'outil filtré (CITY_FILTERED_QUERIES) : top-k des hébergements
+-- d'une destination par note ou par prix, activités par catégorie.
+
+CREATE INDEX IF NOT EXISTS idx_accommodations_destination_rating
+    ON accommodations (destination_id, rating DESC NULLS LAST);
+CREATE INDEX IF NOT EXISTS idx_accommodations_destination_price
+    ON accommodations (destination_id, average_price_per_night);
+CREATE INDEX IF NOT EXISTS idx_activities_destination_category
+    ON activities (destination_id, lower(category));
@@ -0,0 +1,22 @@
+-- Fichier : database/init/06_conversations.sql
+-- Historique des conversations (database/conversation_store.py). Les messages
+-- sont écrits par lots en arrière-plan ; l'ordre d'écriture (id) est l'ordre
+-- de la conversation, et l'index (conversation_id, id DESC) sert la lecture
+-- des N derniers messages puis des pages plus anciennes.
+
+CREATE TABLE IF NOT EXISTS conversations (
+    id TEXT PRIMARY KEY,
+    user_id TEXT NOT NULL,
+    created_at TIMESTAMPTZ NOT NULL DEFAULT now(),
+    updated_at TIMESTAMPTZ NOT NULL DEFAULT now()
+);
+CREATE INDEX IF NOT EXISTS idx_conversations_user_updated ON conversations (user_id, updated_at DESC);
+
+CREATE TABLE IF NOT EXISTS conversation_messages (
+    id BIGSERIAL PRIMARY KEY,
+    conversation_id TEXT NOT NULL REFERENCES conversations(id) ON DELETE CASCADE,
+    role VARCHAR(16) NOT NULL CHECK (role IN ('user', 'assistant')),
+    content TEXT NOT NULL,
+    created_at TIMESTAMPTZ NOT NULL DEFAULT now()
+);
+CREATE INDEX IF NOT EXISTS idx_conversation_messages_page ON conversation_messages (conversation_id, id DESC);
@@ -0,0 +1,13 @@
+-- Fichier : database/init/07_llm_cache.sql
+-- Cache des réponses du LLM partagé par les réplicas (agent/llm_cache.py,
+-- LLM_CACHE=postgres). La clé est l'empreinte SHA-256 du modèle, de ses
+-- paramètres et du prompt ; last_access sert à supprimer les entrées les
+-- moins récemment lues au-delà de LLM_CACHE_MAX_ENTRIES.
+
+CREATE TABLE IF NOT EXISTS llm_cache (
+    cache_key CHAR(64) PRIMARY KEY,
+    completion TEXT NOT NULL,
+    created_at TIMESTAMPTZ NOT NULL DEFAULT now(),
+    last_access TIMESTAMPTZ NOT NULL DEFAULT now()
+);
+CREATE INDEX IF NOT EXISTS idx_llm_cache_last_access ON llm_cache (last_access);
@@ -0,0 +1,172 @@
+-- Fichier : database/init/08_destination_digests.sql
+-- Fiches de destination précalculées : pour chaque lower(city), la réponse
+-- de get_info_for_city déjà assemblée (texte, sans la ligne d'en-tête) et ses
+-- données (JSON, même forme que CITY_DETAILS_QUERY). Une recherche de ville
+-- devient une lecture par clé primaire.
+--
+-- Les triggers (niveau instruction, tables de transition) recalculent dans
+-- la même transaction les seules fiches des destinations touchées, une fois
+-- par instruction : un chargement en masse ne refait pas une fiche par ligne.
+-- Vérification : python -m database.digests check
+
+CREATE TABLE IF NOT EXISTS destination_digests (
+    city_key TEXT PRIMARY KEY,        -- lower(city), comme les recherches de l'outil
+    destination_id INTEGER NOT NULL,  -- première destination (plus petit id) de ce nom
+    digest JSONB NOT NULL,            -- {destination, accommodations, activities}
+    digest_text TEXT NOT NULL,        -- corps de format_city_info
+    refreshed_at TIMESTAMPTZ NOT NULL DEFAULT now()
+);
+
+-- Nombre tel que Python l'affiche après json.loads (180.00 -> '180.0', 26.10 -> '26.1').
+CREATE OR REPLACE FUNCTION digest_number(value NUMERIC) RETURNS TEXT AS $$
+    SELECT CASE
+        WHEN value IS NULL THEN 'N/A'
+        WHEN value = trunc(value) THEN trunc(value)::text || '.0'
+        ELSE rtrim(value::text, '0')
+    END;
+$$ LANGUAGE sql IMMUTABLE;
+
+-- Recalcule les fiches des villes `keys` (lower(city)) ; NULL = toutes.
+-- Deux transactions qui modifient la même ville sont sérialisées par un
+-- verrou consultatif par ville (toutes les villes pour NULL) : la seconde
+-- calcule sa fiche après la validation de la première, donc avec ses
+-- changements, et l'upsert ne se heurte jamais à la clé primaire.
+CREATE OR REPLACE FUNCTION refresh_destination_digests(keys TEXT[]) RETURNS INTEGER AS $$
+DECLARE
+    refreshed INTEGER;
+    key TEXT;
+BEGIN
+    IF keys IS NULL THEN
+        PERFORM pg_advisory_xact_lock(hashtext('destination_digests'));
+    ELSE
+        PERFORM pg_advisory_xact_lock_shared(hashtext('destination_digests'));
+        FOR key IN SELECT DISTINCT k FROM unnest(keys) AS k ORDER BY k LOOP
+            PERFORM pg_advisory_xact_lock(hashtext('destination_digests'), hashtext(key));
+        END LOOP;
+    END IF;
+
+    -- Seules disparaissent les fiches des villes qui n'existent plus.
+    DELETE FROM destination_digests g
+    WHERE (keys IS NULL OR g.city_key = ANY(keys))
+      AND NOT EXISTS (SELECT 1 FROM destinations d WHERE lower(d.city) = g.city_key);
+
+    INSERT INTO destination_digests (city_key, destination_id, digest, digest_text)
+    SELECT DISTINCT ON (lower(d.city))
+        lower(d.city),
+        d.id,
+        jsonb_build_object(
+            'destination', to_jsonb(d),
+            'accommodations', COALESCE(acc.items, '[]'::jsonb),
+            'activities', COALESCE(act.items, '[]'::jsonb)
+        ),
+        '- Description: ' || COALESCE(NULLIF(d.description, ''), 'N/A') || E'\n'
+            || '- Vaccins: ' || COALESCE(NULLIF(d.vaccinations, ''), 'N/A') || E'\n'
+            || COALESCE(E'\nHébergements:\n' || acc.lines, '')
+            || COALESCE(E'\nActivités:\n' || act.lines, '')
+    FROM destinations d
+    LEFT JOIN LATERAL (
+        SELECT
+            jsonb_agg(to_jsonb(a) ORDER BY a.id) AS items,
+            string_agg(
+                '  - ' || a.name || ' (' || COALESCE(NULLIF(a.type, ''), 'N/A') || '), Prix: '
+                    || digest_number(a.average_price_per_night) || '€, Note: ' || digest_number(a.rating) || E'\n',
+                '' ORDER BY a.id
+            ) AS lines
+        FROM accommodations a
+        WHERE a.destination_id = d.id
+    ) acc ON TRUE
+    LEFT JOIN LATERAL (
+        SELECT
+            jsonb_agg(to_jsonb(t) ORDER BY t.id) AS items,
+            string_agg('  - ' || t.name || ' (' || COALESCE(NULLIF(t.category, ''), 'N/A') || E')\n', '' ORDER BY t.id) AS lines
+        FROM activities t
+        WHERE t.destination_id = d.id
+    ) act ON TRUE
+    WHERE keys IS NULL OR lower(d.city) = ANY(keys)
+    ORDER BY lower(d.city), d.id
+    ON CONFLICT (city_key) DO UPDATE SET
+        destination_id = EXCLUDED.destination_id,
+        digest = EXCLUDED.digest,
+        digest_text = EXCLUDED.digest_text,
+        refreshed_at = now();
+
+    GET DIAGNOSTICS refreshed = ROW_COUNT;
+    RETURN refreshed;
+END;
+$$ LANGUAGE plpgsql;
+
+-- Villes touchées par l'instruction (anciennes et nouvelles valeurs), puis
+-- recalcul de leurs seules fiches.
+CREATE OR REPLACE FUNCTION refresh_digests_after_change() RETURNS trigger AS $$
+DECLARE
+    keys TEXT[];
+BEGIN
+    IF TG_OP = 'TRUNCATE' THEN
+        PERFORM refresh_destination_digests(NULL);
+        RETURN NULL;
+    END IF;
+
+    IF TG_TABLE_NAME = 'destinations' THEN
+        IF TG_OP = 'INSERT' THEN
+            SELECT array_agg(DISTINCT lower(city)) INTO keys FROM new_rows;
+        ELSIF TG_OP = 'UPDATE' THEN
+            SELECT array_agg(DISTINCT key) INTO keys FROM (
+                SELECT lower(city) AS key FROM old_rows UNION SELECT lower(city) FROM new_rows
+            ) changed;
+        ELSE
+            SELECT array_agg(DISTINCT lower(city)) INTO keys FROM old_rows;
+        END IF;
+    ELSE
+        IF TG_OP = 'INSERT' THEN
+            SELECT array_agg(DISTINCT lower(d.city)) INTO keys
+            FROM destinations d WHERE d.id IN (SELECT destination_id FROM new_rows);
+        ELSIF TG_OP = 'UPDATE' THEN
+            SELECT array_agg(DISTINCT lower(d.city)) INTO keys
+            FROM destinations d
+            WHERE d.id IN (SELECT destination_id FROM old_rows UNION SELECT destination_id FROM new_rows);
+        ELSE
+            -- Suppression en cascade d'une destination : sa fiche est gérée par le trigger de destinations.
+            SELECT array_agg(DISTINCT lower(d.city)) INTO keys
+            FROM destinations d WHERE d.id IN (SELECT destination_id FROM old_rows);
+        END IF;
+    END IF;
+
+    IF keys IS NOT NULL THEN
+        PERFORM refresh_destination_digests(keys);
+    END IF;
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+DO $$
+DECLARE
+    tbl TEXT;
+BEGIN
+    FOREACH tbl IN ARRAY ARRAY['destinations', 'accommodations', 'activities'] LOOP
+        EXECUTE format('DROP TRIGGER IF EXISTS %1$s_digest_insert ON %1$s', tbl);
+        EXECUTE format('CREATE TRIGGER %1$s_digest_insert AFTER INSERT ON %1$s
+                        REFERENCING NEW TABLE AS new_rows
+                        FOR EACH STATEMENT EXECUTE FUNCTION refresh_digests_after_change()', tbl);
+        EXECUTE format('DROP TRIGGER IF EXISTS %1$s_digest_update ON %1$s', tbl);
+        EXECUTE format('CREATE TRIGGER %1$s_digest_update AFTER UPDATE ON %1$s
+                        REFERENCING OLD TABLE AS old_rows NEW TABLE AS new_rows
+                        FOR EACH STATEMENT EXECUTE FUNCTION refresh_digests_after_change()', tbl);
+        EXECUTE format('DROP TRIGGER IF EXISTS %1$s_digest_delete ON %1$s', tbl);
+        EXECUTE format('CREATE TRIGGER %1$s_digest_delete AFTER DELETE ON %1$s
+                        REFERENCING OLD TABLE AS old_rows
+                        FOR EACH STATEMENT EXECUTE FUNCTION refresh_digests_after_change()', tbl);
+        EXECUTE format('DROP TRIGGER IF EXISTS %1$s_digest_truncate ON %1$s', tbl);
+        EXECUTE format('CREATE TRIGGER %1$s_digest_truncate AFTER TRUNCATE ON %1$s
+                        FOR EACH STATEMENT EXECUTE FUNCTION refresh_digests_after_change()', tbl);
+    END LOOP;
+END;
+$$;
+
+-- Première installation sur une base existante : toutes les fiches.
+DO $$
+BEGIN
+    IF NOT EXISTS (SELECT 1 FROM destination_digests) THEN
+        PERFORM refresh_destination_digests(NULL);
+    END IF;
+END;
+$$;
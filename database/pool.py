@@ -0,0 +1,268 @@
+# Fichier : database/pool.py
+
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+
+import psycopg2
+from psycopg2 import extensions
+
+from utils.tracing import record_span
+
+
+class PoolTimeout(Exception):
+    """Levée quand aucune connexion n'est disponible avant la fin du délai d'attente."""
+
+
+class ConnectionPool:
+    """
+    Pool de connexions psycopg2 partagé par tous les threads du processus.
+
+    - min_size connexions sont ouvertes au démarrage (warm_up) et conservées ;
+    - au plus max_size connexions existent en même temps, les appelants
+      suivants attendent jusqu'à `timeout` secondes ;
+    - une connexion inactive depuis plus de `health_check_after` secondes
+      est vérifiée par un `SELECT 1` avant d'être rendue ;
+    - les connexions cassées, trop vieilles (max_lifetime) ou inactives trop
+      longtemps (max_idle) sont fermées et remplacées.
+    """
+
+    def __init__(self, dsn, min_size=1, max_size=10, timeout=30.0,
+                 max_idle=300.0, max_lifetime=3600.0, health_check_after=5.0):
+        if min_size < 0 or max_size < 1 or min_size > max_size:
+            raise ValueError("Tailles de pool invalides : 0 <= min_size <= max_size et max_size >= 1")
+        self.dsn = dsn
+        self.min_size = min_size
+        self.max_size = max_size
+        self.timeout = timeout
+        self.max_idle = max_idle
+        self.max_lifetime = max_lifetime
+        self.health_check_after = health_check_after
+
+        self._cond = threading.Condition()
+        self._idle = deque()  # (connexion, créée_à, dernière_utilisation)
+        self._created_at = {}  # id(connexion) -> date de création, pour les connexions empruntées
+        self._size = 0
+        self._closed = False
+        self._stats = {
+            "checkouts": 0,
+            "wait_time_total": 0.0,
+            "wait_time_max": 0.0,
+            "timeouts": 0,
+            "connections_created": 0,
+            "connections_recycled": 0,
+            "health_check_failures": 0,
+        }
+
+    # --- Cycle de vie des connexions ---
+
+    def _connect(self):
+        start = time.perf_counter()
+        try:
+            conn = psycopg2.connect(self.dsn)
+        except Exception as e:
+            record_span("db", "connect", time.perf_counter() - start, status="error",
+                        driver="psycopg2", error=type(e).__name__)
+            raise
+        record_span("db", "connect", time.perf_counter() - start, driver="psycopg2")
+        with self._cond:
+            self._stats["connections_created"] += 1
+        return conn
+
+    def _close_quietly(self, conn):
+        try:
+            conn.close()
+        except Exception:
+            pass
+
+    def _discard(self, conn):
+        """Ferme une connexion et libère sa place dans le pool."""
+        self._close_quietly(conn)
+        with self._cond:
+            self._size -= 1
+            self._stats["connections_recycled"] += 1
+            self._cond.notify()
+
+    def _is_expired(self, created_at, last_used, now):
+        if self.max_lifetime and now - created_at > self.max_lifetime:
+            return True
+        if self.max_idle and now - last_used > self.max_idle:
+            return True
+        return False
+
+    def _is_healthy(self, conn, last_used, now):
+        if conn.closed:
+            return False
+        if now - last_used < self.health_check_after:
+            return True
+        try:
+            with conn.cursor() as cur:
+                cur.execute("SELECT 1")
+            conn.rollback()
+            return True
+        except Exception:
+            with self._cond:
+                self._stats["health_check_failures"] += 1
+            return False
+
+    def warm_up(self):
+        """Ouvre des connexions jusqu'à atteindre min_size. Idempotent."""
+        while True:
+            with self._cond:
+                if self._closed or self._size >= self.min_size:
+                    return
+                self._size += 1
+            try:
+                conn = self._connect()
+            except Exception:
+                with self._cond:
+                    self._size -= 1
+                    self._cond.notify()
+                raise
+            now = time.monotonic()
+            with self._cond:
+                self._idle.append((conn, now, now))
+                self._cond.notify()
+
+    # --- Emprunt / restitution ---
+
+    def getconn(self):
+        start = time.monotonic()
+        deadline = start + self.timeout
+        while True:
+            entry = None
+            with self._cond:
+                while True:
+                    if self._closed:
+                        raise PoolTimeout("Le pool de connexions est fermé")
+                    if self._idle:
+                        entry = self._idle.pop()  # LIFO : la connexion la plus « chaude »
+                        break
+                    if self._size < self.max_size:
+                        self._size += 1
+                        break
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        self._stats["timeouts"] += 1
+                        raise PoolTimeout(
+                            f"Aucune connexion disponible après {self.timeout}s (max_size={self.max_size})"
+                        )
+                    self._cond.wait(remaining)
+
+            now = time.monotonic()
+            if entry is None:
+                try:
+                    conn = self._connect()
+                except Exception:
+                    with self._cond:
+                        self._size -= 1
+                        self._cond.notify()
+                    raise
+                created_at = now
+            else:
+                conn, created_at, last_used = entry
+                if self._is_expired(created_at, last_used, now) or not self._is_healthy(conn, last_used, now):
+                    self._discard(conn)
+                    continue
+
+            waited = time.monotonic() - start
+            with self._cond:
+                self._created_at[id(conn)] = created_at
+                self._stats["checkouts"] += 1
+                self._stats["wait_time_total"] += waited
+                self._stats["wait_time_max"] = max(self._stats["wait_time_max"], waited)
+            return conn
+
+    def putconn(self, conn, broken=False):
+        with self._cond:
+            created_at = self._created_at.pop(id(conn), None)
+        if created_at is None:
+            # Connexion inconnue du pool : on se contente de la fermer.
+            self._close_quietly(conn)
+            return
+
+        if not broken and not conn.closed:
+            try:
+                status = conn.get_transaction_status()
+                if status == extensions.TRANSACTION_STATUS_UNKNOWN:
+                    broken = True
+                elif status != extensions.TRANSACTION_STATUS_IDLE:
+                    conn.rollback()
+            except Exception:
+                broken = True
+
+        now = time.monotonic()
+        if broken or conn.closed or self._closed or self._is_expired(created_at, now, now):
+            self._discard(conn)
+            return
+
+        with self._cond:
+            self._idle.append((conn, created_at, now))
+            self._cond.notify()
+        self._prune_idle()
+
+    def _prune_idle(self):
+        """Ferme les connexions inactives depuis trop longtemps au-delà de min_size."""
+        now = time.monotonic()
+        stale = []
+        with self._cond:
+            # Les plus anciennes sont au début de la file.
+            while self._idle and self._size - len(stale) > self.min_size:
+                conn, created_at, last_used = self._idle[0]
+                if not self._is_expired(created_at, last_used, now):
+                    break
+                self._idle.popleft()
+                stale.append(conn)
+        for conn in stale:
+            self._discard(conn)
+
+    @contextmanager
+    def connection(self):
+        """
+        Emprunte une connexion pour la durée du bloc `with`.
+        Commit en sortie normale, rollback en cas d'exception.
+        """
+        requested = time.perf_counter()
+        conn = self.getconn()
+        acquired = time.perf_counter()
+        broken = False
+        status = "ok"
+        try:
+            yield conn
+            conn.commit()
+        except Exception as e:
+            status = "error"
+            broken = isinstance(e, (psycopg2.OperationalError, psycopg2.InterfaceError))
+            if not conn.closed and not broken:
+                conn.rollback()
+            raise
+        finally:
+            self.putconn(conn, broken=broken)
+            record_span("db", "transaction", time.perf_counter() - acquired, status=status,
+                        driver="psycopg2", pool_wait_ms=round((acquired - requested) * 1000, 2))
+
+    def close(self):
+        with self._cond:
+            self._closed = True
+            idle = list(self._idle)
+            self._idle.clear()
+            self._size -= len(idle)
+            self._cond.notify_all()
+        for conn, _, _ in idle:
+            self._close_quietly(conn)
+
+    def stats(self):
+        """Statistiques du pool, utiles pour dimensionner min/max par réplica."""
+        with self._cond:
+            stats = dict(self._stats)
+            stats.update({
+                "size": self._size,
+                "idle": len(self._idle),
+                "in_use": len(self._created_at),
+                "min_size": self.min_size,
+                "max_size": self.max_size,
+            })
+        checkouts = stats["checkouts"]
+        stats["wait_time_avg"] = stats["wait_time_total"] / checkouts if checkouts else 0.0
+        return stats
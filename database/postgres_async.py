@@ -0,0 +1,151 @@
+# Fichier : database/postgres_async.py
+# Chemin asynchrone (asyncpg) vers la base, utilisé par aget_response.
+
+import asyncio
+import json
+import os
+from typing import Dict, List, Optional, Tuple
+
+import asyncpg
+
+from database.postgres_db import (
+    CITIES_COMPARISON_QUERY, CITY_DETAILS_QUERY, CITY_DIGEST_QUERY, CITY_DIGEST_TEXT_QUERY, CITY_DIGESTS,
+    CITY_FILTERED_QUERIES, COMPARISON_PARAMS, FILTER_PARAMS, _get_db_uri, comparison_params, filter_params,
+    format_city_body, format_city_text,
+)
+from utils.deadline import time_left
+from utils.tracing import record_span
+
+# asyncpg attend des paramètres $1, $2... au lieu de %s.
+ASYNC_CITY_DETAILS_QUERY = CITY_DETAILS_QUERY.replace("%s", "$1")
+ASYNC_CITY_DIGEST_QUERY = CITY_DIGEST_QUERY.replace("%s", "$1")
+ASYNC_CITY_DIGEST_TEXT_QUERY = CITY_DIGEST_TEXT_QUERY.replace("%s", "$1")
+
+
+def _numbered(query: str, names=FILTER_PARAMS) -> str:
+    for position, name in enumerate(names, 1):
+        query = query.replace(f"%({name})s", f"${position}")
+    return query
+
+
+ASYNC_CITY_FILTERED_QUERIES = {sort: _numbered(query) for sort, query in CITY_FILTERED_QUERIES.items()}
+ASYNC_CITIES_COMPARISON_QUERY = _numbered(CITIES_COMPARISON_QUERY, COMPARISON_PARAMS)
+
+# Un pool asyncpg est lié à la boucle d'événements qui l'a créé. Tous les
+# tours s'exécutent dans la boucle d'arrière-plan de l'agent
+# (travel_agent._get_background_loop, partagée avec l'API) : un seul pool.
+# Il n'est recréé que si une autre boucle le demande (asyncio.run successifs
+# des benchmarks, la boucle précédente étant alors fermée).
+_pool: Optional["asyncio.Task[asyncpg.Pool]"] = None
+_pool_loop: Optional[asyncio.AbstractEventLoop] = None
+
+
+def _log_query(record) -> None:
+    """Journal de requêtes asyncpg : une étape 'db' par requête."""
+    if record.exception is not None:
+        record_span("db", "query", record.elapsed, status="error", driver="asyncpg",
+                    error=type(record.exception).__name__, query=" ".join(record.query.split())[:120])
+    else:
+        record_span("db", "query", record.elapsed, driver="asyncpg", query=" ".join(record.query.split())[:120])
+
+
+async def _init_connection(conn):
+    await conn.set_type_codec("json", encoder=json.dumps, decoder=json.loads, schema="pg_catalog")
+    await conn.set_type_codec("jsonb", encoder=json.dumps, decoder=json.loads, schema="pg_catalog")
+    conn.add_query_logger(_log_query)
+
+
+def _timeouts() -> Tuple[float, Optional[float]]:
+    """
+    (attente d'une connexion, durée de la requête) : bornées par l'échéance du
+    tour en cours ; asyncpg annule côté serveur une requête qui la dépasse.
+    """
+    query_timeout = time_left("db")
+    acquire_timeout = float(os.getenv("DB_POOL_TIMEOUT", "30"))
+    return (acquire_timeout if query_timeout is None else min(acquire_timeout, query_timeout)), query_timeout
+
+
+async def _create_pool() -> asyncpg.Pool:
+    return await asyncpg.create_pool(
+        _get_db_uri(),
+        min_size=int(os.getenv("DB_ASYNC_POOL_MIN_SIZE", "1")),
+        max_size=int(os.getenv("DB_ASYNC_POOL_MAX_SIZE", "10")),
+        max_inactive_connection_lifetime=float(os.getenv("DB_POOL_MAX_IDLE", "300")),
+        init=_init_connection,
+    )
+
+
+async def get_async_pool() -> asyncpg.Pool:
+    # La création est une tâche partagée : des tours simultanés au démarrage
+    # attendent le même pool au lieu d'en ouvrir un chacun.
+    global _pool, _pool_loop
+    loop = asyncio.get_running_loop()
+    if _pool is None or _pool_loop is not loop:
+        _pool_loop = loop
+        _pool = loop.create_task(_create_pool())
+    creation = _pool
+    try:
+        return await asyncio.shield(creation)
+    except Exception:
+        if _pool is creation and creation.done():
+            _pool = None  # échec de connexion : le prochain appel réessaie
+        raise
+
+
+async def afetch_city_details(city_name: str) -> Optional[Dict]:
+    """Équivalent asynchrone de postgres_db.fetch_city_details."""
+    acquire_timeout, query_timeout = _timeouts()
+    pool = await get_async_pool()
+    async with pool.acquire(timeout=acquire_timeout) as conn:
+        if CITY_DIGESTS:
+            return await conn.fetchval(ASYNC_CITY_DIGEST_QUERY, city_name.strip(), timeout=query_timeout)
+        row = await conn.fetchrow(ASYNC_CITY_DETAILS_QUERY, city_name.strip(), timeout=query_timeout)
+    return dict(row) if row else None
+
+
+async def afetch_city_digest_text(city_name: str) -> Optional[str]:
+    """Équivalent asynchrone de postgres_db.fetch_city_digest_text."""
+    acquire_timeout, query_timeout = _timeouts()
+    pool = await get_async_pool()
+    async with pool.acquire(timeout=acquire_timeout) as conn:
+        return await conn.fetchval(ASYNC_CITY_DIGEST_TEXT_QUERY, city_name.strip(), timeout=query_timeout)
+
+
+async def afetch_city_details_filtered(city_name: str, filters: Dict) -> Optional[Dict]:
+    """Équivalent asynchrone de postgres_db.fetch_city_details_filtered."""
+    params = filter_params(city_name, filters)
+    query = ASYNC_CITY_FILTERED_QUERIES[filters.get("sort") or "rating"]
+    acquire_timeout, query_timeout = _timeouts()
+    pool = await get_async_pool()
+    async with pool.acquire(timeout=acquire_timeout) as conn:
+        row = await conn.fetchrow(query, *(params[name] for name in FILTER_PARAMS), timeout=query_timeout)
+    return dict(row) if row else None
+
+
+async def afetch_cities_comparison(city_names: List[str], filters: Optional[Dict] = None) -> Dict[str, Dict]:
+    """Équivalent asynchrone de postgres_db.fetch_cities_comparison."""
+    params = comparison_params(city_names, filters)
+    acquire_timeout, query_timeout = _timeouts()
+    pool = await get_async_pool()
+    async with pool.acquire(timeout=acquire_timeout) as conn:
+        rows = await conn.fetch(ASYNC_CITIES_COMPARISON_QUERY, *(params[name] for name in COMPARISON_PARAMS),
+                                timeout=query_timeout)
+    return {row["key"]: dict(row) for row in rows}
+
+
+async def aget_info_for_city(city_name: str) -> str:
+    """Équivalent asynchrone de postgres_db.get_info_for_city."""
+    try:
+        if CITY_DIGESTS:
+            body = await afetch_city_digest_text(city_name)
+        else:
+            details = await afetch_city_details(city_name)
+            body = format_city_body(details) if details is not None else None
+    except Exception as e:
+        print(f"Erreur lors de la connexion ou de la requête à la base de données : {e}")
+        return "Erreur lors de la récupération des informations de la base de données."
+
+    if body is None:
+        return f"Je n'ai trouvé aucune information pour la ville de {city_name} dans la base de données."
+
+    return format_city_text(city_name, body)
@@ -2,83 +2,512 @@
 
 import os
 import json
+import threading
 from contextlib import contextmanager
 import psycopg2
+import psycopg2.errors
 from psycopg2.extras import RealDictCursor
 from dotenv import load_dotenv
 from langchain_community.utilities import SQLDatabase
+from sqlalchemy.pool import NullPool
 from typing import Dict, List, Optional
 
+from database.pool import ConnectionPool
+from utils.deadline import DeadlineExceeded, record_hit, statement_timeout_ms
+
 load_dotenv()
 
-def get_db_connection():
-    """
-    Fonction utilitaire pour obtenir une connexion à la base de données
-    en utilisant la variable d'environnement DATABASE_URL.
-    """
+_pool: Optional[ConnectionPool] = None
+_pool_lock = threading.Lock()
+_langchain_db: Optional[SQLDatabase] = None
+
+def _get_db_uri() -> str:
     db_uri = os.getenv("DATABASE_URL")
     if not db_uri:
         raise ValueError("DATABASE_URL n'est pas définie dans le fichier .env")
     if "?sslmode" not in db_uri:
         db_uri += "?sslmode=require"
-    return psycopg2.connect(db_uri)
+    return db_uri
 
-def get_info_for_city(city_name: str) -> str:
+def get_pool() -> ConnectionPool:
     """
-    Récupère toutes les informations pour une ville donnée.
+    Renvoie le pool de connexions du processus, créé à la première demande.
+    La taille et le recyclage se règlent via les variables DB_POOL_*.
     """
-    destination_id = None
-    details = {}
+    global _pool
+    if _pool is None:
+        with _pool_lock:
+            if _pool is None:
+                _pool = ConnectionPool(
+                    _get_db_uri(),
+                    min_size=int(os.getenv("DB_POOL_MIN_SIZE", "1")),
+                    max_size=int(os.getenv("DB_POOL_MAX_SIZE", "10")),
+                    timeout=float(os.getenv("DB_POOL_TIMEOUT", "30")),
+                    max_idle=float(os.getenv("DB_POOL_MAX_IDLE", "300")),
+                    max_lifetime=float(os.getenv("DB_POOL_MAX_LIFETIME", "3600")),
+                    health_check_after=float(os.getenv("DB_POOL_HEALTH_CHECK_AFTER", "5")),
+                )
+    return _pool
 
+def warm_up_pool() -> bool:
+    """
+    Ouvre les connexions minimales du pool au démarrage, pour que la première
+    question ne paie pas l'établissement TCP/TLS. Renvoie False en cas d'échec.
+    """
     try:
-        with get_db_connection() as conn:
-            with conn.cursor(cursor_factory=RealDictCursor) as cur:
-                # 1. Trouver l'ID de la destination
-                cur.execute("SELECT id FROM destinations WHERE city ILIKE %s", (city_name,))
-                result = cur.fetchone()
-                if result:
-                    destination_id = result['id']
-                else:
-                    return f"Je n'ai trouvé aucune information pour la ville de {city_name} dans la base de données."
-
-                # 2. Récupérer tous les détails
-                cur.execute("SELECT * FROM destinations WHERE id = %s;", (destination_id,))
-                details['destination'] = cur.fetchone()
-                cur.execute("SELECT * FROM accommodations WHERE destination_id = %s;", (destination_id,))
-                details['accommodations'] = cur.fetchall()
-                cur.execute("SELECT * FROM activities WHERE destination_id = %s;", (destination_id,))
-                details['activities'] = cur.fetchall()
-
+        get_pool().warm_up()
+        return True
     except Exception as e:
-        print(f"Erreur lors de la connexion ou de la requête à la base de données : {e}")
-        return "Erreur lors de la récupération des informations de la base de données."
+        print(f"Erreur lors du préchauffage du pool de connexions : {e}")
+        return False
+
+def get_pool_stats() -> Dict:
+    """Statistiques du pool (emprunts, temps d'attente, taille)."""
+    return get_pool().stats()
+
+@contextmanager
+def get_db_connection():
+    """
+    Fonction utilitaire pour emprunter une connexion du pool partagé
+    (configuré via la variable d'environnement DATABASE_URL).
+    La connexion est rendue au pool en sortie du bloc `with`.
+
+    Pendant un tour de l'agent, la transaction est bornée par l'échéance du
+    tour (SET LOCAL statement_timeout) : une requête trop lente est annulée
+    par PostgreSQL et lève DeadlineExceeded.
+    """
+    timeout_ms = statement_timeout_ms()
+    with get_pool().connection() as conn:
+        if timeout_ms is not None:
+            with conn.cursor() as cur:
+                cur.execute("SET LOCAL statement_timeout = %s;", (timeout_ms,))
+        try:
+            yield conn
+        except psycopg2.errors.QueryCanceled as e:
+            if timeout_ms is None:
+                raise
+            record_hit("db")
+            error = DeadlineExceeded(f"requête annulée à l'échéance du tour : {e}")
+            error.stage = "db"
+            raise error from e
+
+SCHEMA_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "init")
+
+def apply_schema() -> None:
+    """
+    Exécute les scripts SQL de database/init dans l'ordre (tables, index...).
+    Les scripts sont idempotents : utile pour mettre à jour une base existante,
+    que docker-entrypoint-initdb.d ne rejoue pas.
+    """
+    with get_db_connection() as conn:
+        with conn.cursor() as cur:
+            for filename in sorted(os.listdir(SCHEMA_DIR)):
+                if filename.endswith(".sql"):
+                    with open(os.path.join(SCHEMA_DIR, filename), encoding="utf-8") as f:
+                        cur.execute(f.read())
+
+# Un seul aller-retour : la destination et ses hébergements / activités
+# imbriqués en JSON. Le filtre lower(city) utilise idx_destinations_city_lower
+# et les sous-requêtes les index sur destination_id.
+CITY_DETAILS_QUERY = """
+    SELECT
+        row_to_json(d) AS destination,
+        COALESCE((SELECT json_agg(a ORDER BY a.id) FROM accommodations a
+                  WHERE a.destination_id = d.id), '[]'::json) AS accommodations,
+        COALESCE((SELECT json_agg(t ORDER BY t.id) FROM activities t
+                  WHERE t.destination_id = d.id), '[]'::json) AS activities
+    FROM destinations d
+    WHERE lower(d.city) = lower(%s)
+    ORDER BY d.id
+    LIMIT 1;
+"""
+
+# Fiches précalculées (database/init/08_destination_digests.sql), maintenues
+# par des triggers : une lecture par clé primaire au lieu des jointures et de
+# l'agrégation JSON. get_info_for_city ne lit que le texte déjà rendu.
+# CITY_DIGESTS=off revient à l'assemblage à chaque demande.
+CITY_DIGESTS = os.getenv("CITY_DIGESTS", "on") != "off"
+
+CITY_DIGEST_QUERY = "SELECT digest FROM destination_digests WHERE city_key = lower(%s);"
+CITY_DIGEST_TEXT_QUERY = "SELECT digest_text FROM destination_digests WHERE city_key = lower(%s);"
+
+def fetch_city_digest(city_name: str) -> Optional[Dict]:
+    """Même résultat que CITY_DETAILS_QUERY, depuis destination_digests."""
+    with get_db_connection() as conn:
+        with conn.cursor() as cur:
+            cur.execute(CITY_DIGEST_QUERY, (city_name.strip(),))
+            row = cur.fetchone()
+    return row[0] if row else None
+
+def fetch_city_digest_text(city_name: str) -> Optional[str]:
+    """Corps de format_city_info déjà rendu pour une ville, ou None si elle n'existe pas."""
+    with get_db_connection() as conn:
+        with conn.cursor() as cur:
+            cur.execute(CITY_DIGEST_TEXT_QUERY, (city_name.strip(),))
+            row = cur.fetchone()
+    return row[0] if row else None
+
+def fetch_city_details(city_name: str) -> Optional[Dict]:
+    """
+    Renvoie {'destination', 'accommodations', 'activities'} pour une ville,
+    ou None si elle n'existe pas. Les erreurs de base de données sont propagées.
+    """
+    if CITY_DIGESTS:
+        return fetch_city_digest(city_name)
+    with get_db_connection() as conn:
+        with conn.cursor(cursor_factory=RealDictCursor) as cur:
+            cur.execute(CITY_DETAILS_QUERY, (city_name.strip(),))
+            row = cur.fetchone()
+    return dict(row) if row else None
+
+# Variante filtrée pour l'outil de l'agent : seuls les hébergements / activités
+# qui passent les filtres, triés et limités (top-k) côté SQL, avec les colonnes
+# utiles à la réponse. Les index (destination_id, rating / prix / catégorie)
+# de 05_filter_indexes.sql servent le tri et le filtre.
+FILTER_SORTS = {
+    # tri : (hébergements, activités) ; "best" (classement par préférences,
+    # database/ranking.py) se replie ici sur le tri par note.
+    "best": ("a.rating DESC NULLS LAST, a.average_price_per_night", "t.price NULLS LAST, t.id"),
+    "rating": ("a.rating DESC NULLS LAST, a.average_price_per_night", "t.price NULLS LAST, t.id"),
+    "price": ("a.average_price_per_night NULLS LAST, a.rating DESC NULLS LAST", "t.price NULLS LAST, t.id"),
+}
+FILTER_PARAMS = ("city", "max_price", "accommodation_type", "min_rating", "categories", "limit")
+
+CITY_FILTERED_QUERY_TEMPLATE = """
+    SELECT
+        json_build_object(
+            'city', d.city, 'country', d.country, 'description', d.description,
+            'best_time_to_visit', d.best_time_to_visit, 'average_budget_per_day', d.average_budget_per_day,
+            'visa_info', d.visa_info, 'vaccinations', d.vaccinations
+        ) AS destination,
+        COALESCE((SELECT json_agg(a) FROM (
+            SELECT a.name, a.type, a.average_price_per_night, a.rating
+            FROM accommodations a
+            WHERE a.destination_id = d.id
+              AND (%(max_price)s::numeric IS NULL OR a.average_price_per_night <= %(max_price)s::numeric)
+              AND (%(accommodation_type)s::text IS NULL OR lower(a.type) = lower(%(accommodation_type)s::text))
+              AND (%(min_rating)s::numeric IS NULL OR a.rating >= %(min_rating)s::numeric)
+            ORDER BY {accommodation_order}
+            LIMIT %(limit)s::int
+        ) a), '[]'::json) AS accommodations,
+        (SELECT count(*) FROM accommodations a WHERE a.destination_id = d.id) AS accommodations_total,
+        COALESCE((SELECT json_agg(t) FROM (
+            SELECT t.name, t.category, t.duration_hours, t.price
+            FROM activities t
+            WHERE t.destination_id = d.id
+              AND (%(categories)s::text[] IS NULL OR lower(t.category) = ANY(%(categories)s::text[]))
+            ORDER BY {activity_order}
+            LIMIT %(limit)s::int
+        ) t), '[]'::json) AS activities,
+        (SELECT count(*) FROM activities t WHERE t.destination_id = d.id) AS activities_total
+    FROM destinations d
+    WHERE lower(d.city) = lower(%(city)s::text)
+    ORDER BY d.id
+    LIMIT 1;
+"""
+
+CITY_FILTERED_QUERIES = {
+    sort: CITY_FILTERED_QUERY_TEMPLATE.format(accommodation_order=acc_order, activity_order=act_order)
+    for sort, (acc_order, act_order) in FILTER_SORTS.items()
+}
+
+def filter_params(city_name: str, filters: Dict) -> Dict:
+    """Paramètres de CITY_FILTERED_QUERIES à partir des filtres de l'outil."""
+    categories = filters.get("activity_categories")
+    return {
+        "city": city_name.strip(),
+        "max_price": filters.get("max_price_per_night"),
+        "accommodation_type": filters.get("accommodation_type"),
+        "min_rating": filters.get("min_rating"),
+        "categories": [c.lower() for c in categories] if categories else None,
+        "limit": int(filters.get("limit") or 5),
+    }
+
+def fetch_city_details_filtered(city_name: str, filters: Dict) -> Optional[Dict]:
+    """Comme fetch_city_details, avec filtres, tri (filters['sort']) et top-k appliqués en SQL."""
+    query = CITY_FILTERED_QUERIES[filters.get("sort") or "rating"]
+    with get_db_connection() as conn:
+        with conn.cursor(cursor_factory=RealDictCursor) as cur:
+            cur.execute(query, filter_params(city_name, filters))
+            row = cur.fetchone()
+    return dict(row) if row else None
+
+# Colonnes utiles au classement en mémoire (database/ranking.py) : une ligne
+# compacte [nom, type, prix, note] par hébergement et [nom, catégorie, durée,
+# prix] par activité, dans l'ordre des id.
+CITY_COLUMNS_QUERY = """
+    SELECT
+        json_build_object(
+            'city', d.city, 'country', d.country, 'description', d.description,
+            'best_time_to_visit', d.best_time_to_visit, 'average_budget_per_day', d.average_budget_per_day,
+            'visa_info', d.visa_info, 'vaccinations', d.vaccinations
+        ) AS destination,
+        COALESCE((SELECT json_agg(json_build_array(a.name, a.type, a.average_price_per_night, a.rating) ORDER BY a.id)
+                  FROM accommodations a WHERE a.destination_id = d.id), '[]'::json) AS accommodations,
+        COALESCE((SELECT json_agg(json_build_array(t.name, t.category, t.duration_hours, t.price) ORDER BY t.id)
+                  FROM activities t WHERE t.destination_id = d.id), '[]'::json) AS activities
+    FROM destinations d
+    WHERE lower(d.city) = lower(%s)
+    ORDER BY d.id
+    LIMIT 1;
+"""
+
+def fetch_city_columns(city_name: str) -> Optional[Dict]:
+    """{'destination', 'accommodations', 'activities'} (lignes compactes) ou None."""
+    with get_db_connection() as conn:
+        with conn.cursor(cursor_factory=RealDictCursor) as cur:
+            cur.execute(CITY_COLUMNS_QUERY, (city_name.strip(),))
+            row = cur.fetchone()
+    return dict(row) if row else None
+
+# Comparaison de plusieurs villes en un seul aller-retour : = ANY(array) sur
+# lower(city) reste servi par idx_destinations_city_lower. Pour chaque ville,
+# l'hébergement le moins cher et le mieux noté (filtres facultatifs du tour).
+COMPARISON_PARAMS = ("cities", "max_price", "accommodation_type")
+
+CITIES_COMPARISON_QUERY = """
+    SELECT DISTINCT ON (lower(d.city))
+        lower(d.city) AS key, d.city, d.country, d.average_budget_per_day,
+        d.safety_rating, d.best_time_to_visit,
+        (SELECT row_to_json(a) FROM (
+            SELECT a.name, a.type, a.average_price_per_night, a.rating
+            FROM accommodations a
+            WHERE a.destination_id = d.id
+              AND (%(max_price)s::numeric IS NULL OR a.average_price_per_night <= %(max_price)s::numeric)
+              AND (%(accommodation_type)s::text IS NULL OR lower(a.type) = lower(%(accommodation_type)s::text))
+            ORDER BY a.average_price_per_night NULLS LAST, a.rating DESC NULLS LAST
+            LIMIT 1
+        ) a) AS cheapest,
+        (SELECT row_to_json(a) FROM (
+            SELECT a.name, a.type, a.average_price_per_night, a.rating
+            FROM accommodations a
+            WHERE a.destination_id = d.id
+              AND (%(max_price)s::numeric IS NULL OR a.average_price_per_night <= %(max_price)s::numeric)
+              AND (%(accommodation_type)s::text IS NULL OR lower(a.type) = lower(%(accommodation_type)s::text))
+            ORDER BY a.rating DESC NULLS LAST, a.average_price_per_night
+            LIMIT 1
+        ) a) AS top_rated
+    FROM destinations d
+    WHERE lower(d.city) = ANY(%(cities)s::text[])
+    ORDER BY lower(d.city), d.id;
+"""
+
+def comparison_params(city_names: List[str], filters: Optional[Dict] = None) -> Dict:
+    filters = filters or {}
+    return {
+        "cities": [name.strip().lower() for name in city_names],
+        "max_price": filters.get("max_price_per_night"),
+        "accommodation_type": filters.get("accommodation_type"),
+    }
+
+def fetch_cities_comparison(city_names: List[str], filters: Optional[Dict] = None) -> Dict[str, Dict]:
+    """
+    Une requête pour toutes les villes : {lower(city): ligne}. Les villes
+    absentes de la base ne figurent pas dans le résultat.
+    """
+    with get_db_connection() as conn:
+        with conn.cursor(cursor_factory=RealDictCursor) as cur:
+            cur.execute(CITIES_COMPARISON_QUERY, comparison_params(city_names, filters))
+            return {row["key"]: dict(row) for row in cur.fetchall()}
+
+def get_all_cities() -> List[Dict]:
+    """Liste (id, city, country, aliases) de toutes les destinations, pour les index en mémoire."""
+    with get_db_connection() as conn:
+        with conn.cursor(cursor_factory=RealDictCursor) as cur:
+            cur.execute("SELECT id, city, country, aliases FROM destinations;")
+            return [dict(row) for row in cur.fetchall()]
+
+def get_cities_by_name(city_name: str) -> List[Dict]:
+    """Comme get_all_cities, limité aux destinations dont lower(city) = lower(city_name)."""
+    with get_db_connection() as conn:
+        with conn.cursor(cursor_factory=RealDictCursor) as cur:
+            cur.execute(
+                "SELECT id, city, country, aliases FROM destinations WHERE lower(city) = lower(%s);",
+                (city_name,),
+            )
+            return [dict(row) for row in cur.fetchall()]
+
+def explain_city_lookup(city_name: str) -> str:
+    """Plan d'exécution (EXPLAIN ANALYZE) de la requête de get_info_for_city."""
+    query = CITY_DIGEST_TEXT_QUERY if CITY_DIGESTS else CITY_DETAILS_QUERY
+    with get_db_connection() as conn:
+        with conn.cursor() as cur:
+            cur.execute("EXPLAIN (ANALYZE, BUFFERS) " + query, (city_name,))
+            return "\n".join(row[0] for row in cur.fetchall())
+
+def _or_na(value) -> str:
+    return "N/A" if value is None or value == "" else str(value)
+
+def format_city_body(details: Dict) -> str:
+    """
+    Corps de format_city_info (sans la ligne d'en-tête). Reproduit à
+    l'identique par refresh_destination_digests en SQL : toute modification
+    ici doit y être reportée (python -m database.digests check le vérifie).
+    """
+    output = ""
+    dest = details.get('destination')
+    if dest:
+        output += f"- Description: {_or_na(dest.get('description'))}\n"
+        output += f"- Vaccins: {_or_na(dest.get('vaccinations'))}\n"
 
-    # 3. Formater le résultat pour l'IA
-    output = f"Voici les informations trouvées pour {city_name}:\n"
-    if details.get('destination'):
-        output += f"- Description: {details['destination'].get('description', 'N/A')}\n"
-        output += f"- Vaccins: {details['destination'].get('vaccinations', 'N/A')}\n"
-    
     if details.get('accommodations'):
         output += "\nHébergements:\n"
         for acc in details['accommodations']:
-            output += f"  - {acc.get('name')} ({acc.get('type')}), Prix: {acc.get('average_price_per_night')}€, Note: {acc.get('rating')}\n"
-            
+            output += (f"  - {acc.get('name')} ({_or_na(acc.get('type'))}), "
+                       f"Prix: {_or_na(acc.get('average_price_per_night'))}€, Note: {_or_na(acc.get('rating'))}\n")
+
     if details.get('activities'):
         output += "\nActivités:\n"
         for act in details['activities']:
-            output += f"  - {act.get('name')} ({act.get('category')})\n"
-            
+            output += f"  - {act.get('name')} ({_or_na(act.get('category'))})\n"
+
+    return output
+
+def format_city_info(city_name: str, details: Dict) -> str:
+    """Formate les détails d'une ville en texte pour l'IA."""
+    return format_city_text(city_name, format_city_body(details))
+
+def format_city_text(city_name: str, body: str) -> str:
+    """Réponse de get_info_for_city à partir du corps (format_city_body ou fiche précalculée)."""
+    return f"Voici les informations trouvées pour {city_name}:\n" + body
+
+SORT_LABELS = {"best": "préférences", "rating": "note", "price": "prix"}
+
+def _describe_filters(filters: Dict) -> str:
+    parts = []
+    if filters.get("max_price_per_night") is not None:
+        parts.append(f"≤ {filters['max_price_per_night']}€/nuit")
+    if filters.get("accommodation_type"):
+        parts.append(f"type {filters['accommodation_type']}")
+    if filters.get("min_rating") is not None:
+        parts.append(f"note ≥ {filters['min_rating']}")
+    if filters.get("activity_categories"):
+        parts.append(f"activités {'/'.join(filters['activity_categories'])}")
+    parts.append(f"tri par {SORT_LABELS.get(filters.get('sort'), 'note')}")
+    return ", ".join(parts)
+
+def format_city_summary(city_name: str, details: Dict, filters: Dict, max_chars: int = 2400) -> str:
+    """
+    Version compacte de format_city_info pour l'outil filtré : une ligne par
+    élément, description tronquée, et sortie bornée à max_chars caractères
+    (environ max_chars / 4 tokens) en retirant les dernières lignes.
+    """
+    dest = details.get("destination") or {}
+    description = dest.get("description") or ""
+    if len(description) > 300:
+        description = description[:297].rstrip() + "..."
+    lines = [f"{dest.get('city', city_name)} ({dest.get('country')}) — filtres : {_describe_filters(filters)}"]
+    if description:
+        lines.append(description)
+    facts = [
+        f"budget {dest['average_budget_per_day']}€/j" if dest.get("average_budget_per_day") is not None else None,
+        f"saison {dest['best_time_to_visit']}" if dest.get("best_time_to_visit") else None,
+        f"visa : {dest['visa_info']}" if dest.get("visa_info") else None,
+        f"vaccins : {dest['vaccinations']}" if dest.get("vaccinations") else None,
+    ]
+    if any(facts):
+        lines.append(" | ".join(f for f in facts if f))
+
+    accommodations = details.get("accommodations") or []
+    lines.append(f"Hébergements ({len(accommodations)} affichés sur {details.get('accommodations_total', len(accommodations))}) :")
+    lines += [
+        f"- {a.get('name')} ({a.get('type')}) {a.get('average_price_per_night')}€/nuit, note {a.get('rating')}"
+        for a in accommodations
+    ] or ["- aucun ne correspond aux filtres"]
+    activities = details.get("activities") or []
+    lines.append(f"Activités ({len(activities)} affichées sur {details.get('activities_total', len(activities))}) :")
+    for t in activities:
+        extra = [f"{t['duration_hours']}h" if t.get("duration_hours") is not None else None,
+                 f"{t['price']}€" if t.get("price") is not None else None]
+        lines.append(f"- {t.get('name')} ({t.get('category')}) " + ", ".join(e for e in extra if e))
+    if not activities:
+        lines.append("- aucune ne correspond aux filtres")
+
+    output = "\n".join(lines)
+    while len(output) > max_chars and len(lines) > 1:
+        lines.pop()
+        output = "\n".join(lines + ["(liste tronquée)"])
     return output
 
+def _lodging(acc: Optional[Dict]) -> str:
+    if not acc:
+        return "—"
+    parts = [f"{acc.get('name')} ({acc.get('type')})"]
+    if acc.get("average_price_per_night") is not None:
+        parts.append(f"{acc['average_price_per_night']}€")
+    if acc.get("rating") is not None:
+        parts.append(f"{acc['rating']}/5")
+    return " ".join(parts)
+
+def format_cities_comparison(city_names: List[str], rows: List[Dict], missing: List[str]) -> str:
+    """
+    Tableau comparatif (une colonne par ville) : budget par jour, sécurité,
+    meilleure période, hébergements le moins cher et le mieux noté.
+    """
+    if not rows:
+        return f"Aucune de ces villes n'est dans la base de données : {', '.join(city_names)}."
+    def cell(value) -> str:
+        return str(value).replace("|", "/") if value not in (None, "") else "—"
+    lines = [
+        "| | " + " | ".join(f"{row['city']} ({row['country']})" for row in rows) + " |",
+        "|---" * (len(rows) + 1) + "|",
+    ]
+    for label, render in (
+        ("Budget / jour", lambda r: f"{r['average_budget_per_day']}€" if r.get("average_budget_per_day") is not None else None),
+        ("Sécurité", lambda r: f"{r['safety_rating']}/5" if r.get("safety_rating") is not None else None),
+        ("Meilleure période", lambda r: r.get("best_time_to_visit")),
+        ("Moins cher", lambda r: _lodging(r.get("cheapest"))),
+        ("Mieux noté", lambda r: _lodging(r.get("top_rated"))),
+    ):
+        lines.append(f"| {label} | " + " | ".join(cell(render(row)) for row in rows) + " |")
+    if missing:
+        lines.append(f"Absentes de la base (utiliser internet_search) : {', '.join(missing)}.")
+    return "\n".join(lines)
+
+def get_info_for_city(city_name: str) -> str:
+    """
+    Récupère toutes les informations pour une ville donnée.
+    """
+    try:
+        if CITY_DIGESTS:
+            body = fetch_city_digest_text(city_name)
+        else:
+            details = fetch_city_details(city_name)
+            body = format_city_body(details) if details is not None else None
+    except Exception as e:
+        print(f"Erreur lors de la connexion ou de la requête à la base de données : {e}")
+        return "Erreur lors de la récupération des informations de la base de données."
+
+    if body is None:
+        return f"Je n'ai trouvé aucune information pour la ville de {city_name} dans la base de données."
+
+    return format_city_text(city_name, body)
+
 # La fonction get_langchain_db est conservée pour la compatibilité future
 # mais n'est plus utilisée par l'agent actuel.
+class _SharedPool(NullPool):
+    """
+    Pool SQLAlchemy sans connexions propres : chaque emprunt passe par
+    get_pool() et la connexion lui est rendue au lieu d'être fermée, pour
+    que DB_POOL_MAX_SIZE reste le plafond du processus.
+    """
+
+    def _close_connection(self, connection, *, terminate: bool = False) -> None:
+        get_pool().putconn(connection, broken=terminate)
+
+_langchain_db_lock = threading.Lock()
+
 def get_langchain_db() -> SQLDatabase:
-    db_uri = os.getenv("DATABASE_URL")
-    if not db_uri:
-        raise ValueError("DATABASE_URL n'est pas définie !")
-    if "?sslmode" not in db_uri:
-        db_uri += "?sslmode=require"
-    if "postgresql+psycopg2://" not in db_uri:
-        db_uri = db_uri.replace("postgresql://", "postgresql+psycopg2://", 1)
-    return SQLDatabase.from_uri(db_uri)
\ No newline at end of file
+    """Renvoie une instance SQLDatabase unique par processus, branchée sur get_pool()."""
+    global _langchain_db
+    if _langchain_db is None:
+        with _langchain_db_lock:
+            if _langchain_db is None:
+                db_uri = _get_db_uri()
+                if "postgresql+psycopg2://" not in db_uri:
+                    db_uri = db_uri.replace("postgresql://", "postgresql+psycopg2://", 1)
+                _langchain_db = SQLDatabase.from_uri(db_uri, engine_args={
+                    "creator": lambda: get_pool().getconn(),
+                    "poolclass": _SharedPool,
+                })
+    return _langchain_db
@@ -0,0 +1,272 @@
+# Fichier : database/ranking.py
+# Classement des hébergements et activités d'une destination selon les
+# préférences du voyageur (budget, style, intérêts, note), en une passe NumPy
+# sur des colonnes compactes chargées une fois par destination. Seul le top-k
+# est rendu dans la réponse de travel_database_tool.
+
+import threading
+import time
+from dataclasses import dataclass
+from typing import Callable, Dict, List, Optional, Sequence
+
+import numpy as np
+
+from database.postgres_db import fetch_city_columns
+from utils.ttl_cache import TTLCache
+
+# Poids du score "best" : un type / une catégorie correspondant aux
+# préférences passe devant tout le reste ; puis la note, puis le prix par
+# rapport au budget.
+KIND_WEIGHT = 4.0
+RATING_WEIGHT = 2.0
+VALUE_WEIGHT = 1.0
+UNKNOWN_RATING = 2.5  # note absente : neutre
+# Prix absent dans le tri "price" : après tous les autres, mais fini (une clé
+# infinie signifie « écarté par les filtres »).
+MISSING_PRICE_KEY = 1e12
+
+
+class Vocabulary:
+    """Types d'hébergement / catégories d'activité -> codes entiers (minuscules)."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._codes: Dict[str, int] = {}
+
+    def code(self, value: Optional[str]) -> int:
+        if not value:
+            return -1
+        key = value.strip().lower()
+        with self._lock:
+            return self._codes.setdefault(key, len(self._codes))
+
+    def codes(self, values: Sequence[str]) -> np.ndarray:
+        return np.array([self.code(v) for v in values], dtype=np.int16)
+
+
+@dataclass
+class Table:
+    """
+    Hébergements ou activités d'une destination : les lignes d'origine (pour
+    la réponse), leurs colonnes numériques (float32, NaN = valeur absente) et
+    les clés de tri qui ne dépendent pas des préférences, calculées une fois
+    au chargement.
+    """
+    rows: List[Sequence]
+    kind: np.ndarray          # int16 : code du type / de la catégorie (-1 = absent)
+    price: np.ndarray         # prix, +inf si absent
+    rating: np.ndarray        # note, NaN si absente (toujours pour les activités)
+    rating_score: np.ndarray  # part de la note dans le score "best"
+    rating_key: np.ndarray    # tri "rating" : note décroissante, puis prix
+    price_key: np.ndarray     # tri "price" : prix croissant, puis note
+
+    @classmethod
+    def from_rows(cls, rows: List[Sequence], vocabulary: Vocabulary, kind: int, price: int,
+                  rating: Optional[int] = None) -> "Table":
+        def column(i):
+            if i is None:
+                return np.full(len(rows), np.nan, dtype=np.float64)
+            return np.array([np.nan if row[i] is None else float(row[i]) for row in rows], dtype=np.float64)
+
+        prices, ratings = column(price), column(rating)
+        known = ~np.isnan(prices)
+        ceiling = prices[known].max() + 1 if known.any() else 1.0
+        filled = np.where(known, prices, np.inf)
+        return cls(
+            rows=rows,
+            kind=np.array([vocabulary.code(row[kind]) for row in rows], dtype=np.int16),
+            price=filled.astype(np.float32),
+            rating=ratings.astype(np.float32),
+            rating_score=(RATING_WEIGHT * np.nan_to_num(ratings, nan=UNKNOWN_RATING) / 5).astype(np.float32),
+            # Note absente en dernier ; l'écart dû au prix (< 0.01) ne franchit pas un dixième de note.
+            rating_key=(-np.nan_to_num(ratings, nan=-1.0) + 0.01 * np.where(known, prices, ceiling) / ceiling
+                        ).astype(np.float32),
+            # Prix absent en dernier ; l'écart dû à la note (< 0.001) ne franchit pas un centime.
+            # float64 : la précision de float32 ne suffit pas à départager au-delà de quelques centaines d'euros.
+            price_key=np.where(known, prices, MISSING_PRICE_KEY) + 0.0002 * (5 - np.nan_to_num(ratings, nan=0.0)),
+        )
+
+    def __len__(self) -> int:
+        return len(self.rows)
+
+
+def top_k(key: np.ndarray, k: int) -> np.ndarray:
+    """Indices des k plus petites valeurs finies de key, triées (à égalité : ordre d'origine)."""
+    if key.size > k:
+        candidates = np.argpartition(key, k - 1)[:k]
+        candidates.sort()
+    else:
+        candidates = np.arange(key.size)
+    candidates = candidates[np.argsort(key[candidates], kind="stable")]
+    return candidates[np.isfinite(key[candidates])]
+
+
+def rank_table(table: Table, kinds: np.ndarray, sort: str = "best", max_price: Optional[float] = None,
+               min_rating: Optional[float] = None, budget: Optional[float] = None, limit: int = 5) -> np.ndarray:
+    """
+    Indices du top-`limit` de `table`, en une passe vectorisée.
+
+    - max_price et min_rating filtrent (comme le SQL : valeur absente = exclue) ;
+    - sort="best" : score = type / catégorie préféré (`kinds`) + note + marge
+      sous `budget` ; les autres types ne servent qu'à compléter la liste ;
+    - sort="rating" / "price" : mêmes filtres stricts (`kinds` compris) et
+      même ordre que CITY_FILTERED_QUERIES.
+    """
+    if not len(table):
+        return np.empty(0, dtype=np.intp)
+    # Les lignes écartées reçoivent une clé infinie plutôt que d'être extraites :
+    # une seule passe sur les colonnes, sans copie indexée.
+    excluded = None
+    if max_price is not None:
+        excluded = table.price > np.float32(max_price)
+    if min_rating is not None:
+        below = ~(table.rating >= np.float32(min_rating))
+        excluded = below if excluded is None else excluded | below
+    matches = None
+    if kinds.size == 1:
+        matches = table.kind == kinds[0]
+    elif kinds.size:
+        # Table de correspondance code -> booléen : plus rapide que np.isin.
+        wanted = np.zeros(max(int(kinds.max()), int(table.kind.max(initial=0))) + 2, dtype=bool)
+        wanted[kinds] = True
+        matches = wanted[table.kind]
+
+    if sort in ("price", "rating"):
+        if matches is not None:
+            excluded = ~matches if excluded is None else excluded | ~matches
+        key = table.price_key if sort == "price" else table.rating_key
+        if excluded is not None:
+            key = np.where(excluded, np.inf, key)
+        return top_k(key, max(1, limit))
+
+    score = table.rating_score.copy()
+    if matches is not None:
+        score += np.float32(KIND_WEIGHT) * matches
+    if budget:
+        value = np.float32(1) - table.price * np.float32(1 / budget)
+        np.clip(value, 0, 1, out=value)
+        score += np.float32(VALUE_WEIGHT) * value
+    key = np.negative(score, out=score)
+    if excluded is not None:
+        np.copyto(key, np.float32(np.inf), where=excluded)
+    return top_k(key, max(1, limit))
+
+
+ACCOMMODATION_FIELDS = ("name", "type", "average_price_per_night", "rating")
+ACTIVITY_FIELDS = ("name", "category", "duration_hours", "price")
+
+
+@dataclass
+class CityColumns:
+    destination: Dict
+    accommodations: Table
+    activities: Table
+
+    def accommodation_records(self, indices: Optional[Sequence[int]] = None) -> List[Dict]:
+        rows = self.accommodations.rows
+        return [dict(zip(ACCOMMODATION_FIELDS, rows[i])) for i in (range(len(rows)) if indices is None else indices)]
+
+    def activity_records(self, indices: Optional[Sequence[int]] = None) -> List[Dict]:
+        rows = self.activities.rows
+        return [dict(zip(ACTIVITY_FIELDS, rows[i])) for i in (range(len(rows)) if indices is None else indices)]
+
+
+class PreferenceRanker:
+    """
+    Colonnes des destinations consultées, chargées à la première demande
+    (une requête) et gardées en mémoire (LRU de max_cities destinations).
+    refresh_city() — callback d'invalidation de city_cache — ne recharge que
+    la destination modifiée ; '*' vide tout. Un chargement pendant lequel une
+    invalidation arrive n'est pas gardé (compteur de générations).
+    """
+
+    def __init__(self, load_city: Callable[[str], Optional[Dict]] = fetch_city_columns, max_cities: int = 2048):
+        self.load_city = load_city
+        self.vocabulary = Vocabulary()
+        self._cities = TTLCache(max_size=max_cities, ttl=0)
+        self._lock = threading.Lock()
+        self._generation = 0  # incrémenté par chaque refresh_city
+        self._stats = {"rankings": 0, "rows_ranked": 0, "rank_time_total": 0.0, "loads": 0, "refreshes": 0}
+
+    def columns(self, row: Dict) -> CityColumns:
+        """Colonnes NumPy d'une ligne de fetch_city_columns."""
+        return CityColumns(
+            destination=row["destination"],
+            accommodations=Table.from_rows(row["accommodations"], self.vocabulary, kind=1, price=2, rating=3),
+            activities=Table.from_rows(row["activities"], self.vocabulary, kind=1, price=3),
+        )
+
+    def is_loaded(self, city: str) -> bool:
+        return city in self._cities
+
+    def load(self, city: str) -> Optional[CityColumns]:
+        columns = self._cities.get(city)
+        if columns is None:
+            with self._lock:
+                generation = self._generation
+            row = self.load_city(city)
+            if row is None:
+                return None
+            columns = self.columns(row)
+            with self._lock:
+                # Invalidation reçue pendant la requête : les colonnes sont peut-être
+                # périmées, elles servent à cet appel mais ne sont pas gardées.
+                if generation == self._generation:
+                    self._cities.set(city, columns)
+                self._stats["loads"] += 1
+        return columns
+
+    def rank(self, city: str, filters: Dict) -> Optional[Dict]:
+        """
+        Même contrat que fetch_city_details_filtered (détails pour
+        format_city_summary), ou None si la ville n'existe pas.
+        """
+        columns = self.load(city)
+        if columns is None:
+            return None
+        start = time.perf_counter()
+        sort = filters.get("sort") or "best"
+        limit = int(filters.get("limit") or 5)
+        accommodation_type = filters.get("accommodation_type")
+        categories = filters.get("activity_categories") or []
+        budget = filters.get("max_price_per_night")
+        accommodations = rank_table(
+            columns.accommodations,
+            self.vocabulary.codes([accommodation_type] if accommodation_type else []),
+            sort=sort, max_price=budget, min_rating=filters.get("min_rating"), budget=budget, limit=limit,
+        )
+        # Les activités ne sont pas filtrées par prix (comme en SQL, triées
+        # par prix) ; en "best", le budget fait seulement préférer les moins chères.
+        activities = rank_table(
+            columns.activities, self.vocabulary.codes(categories),
+            sort="best" if sort == "best" else "price", budget=budget, limit=limit,
+        )
+        with self._lock:
+            self._stats["rankings"] += 1
+            self._stats["rows_ranked"] += len(columns.accommodations) + len(columns.activities)
+            self._stats["rank_time_total"] += time.perf_counter() - start
+        return {
+            "destination": columns.destination,
+            "accommodations": columns.accommodation_records(accommodations),
+            "accommodations_total": len(columns.accommodations),
+            "activities": columns.activity_records(activities),
+            "activities_total": len(columns.activities),
+        }
+
+    def refresh_city(self, city: str) -> None:
+        """Callback d'invalidation : city = lower(city) ou '*'."""
+        with self._lock:
+            # Avant de vider : un chargement en cours ne peut plus rien y écrire.
+            self._generation += 1
+            self._stats["refreshes"] += 1
+        if city == "*":
+            self._cities.clear()
+        else:
+            self._cities.invalidate(city)
+
+    def stats(self) -> Dict:
+        with self._lock:
+            stats = dict(self._stats)
+        stats["cities_loaded"] = len(self._cities)
+        stats["avg_rank_ms"] = round(stats["rank_time_total"] / stats["rankings"] * 1000, 4) if stats["rankings"] else 0.0
+        return stats
@@ -1,10 +1,13 @@
 # Fichier : test_agent_cli.py
-from agent.travel_agent import get_response
+from agent.travel_agent import stream_response, warm_up
 import warnings
 
 # On ignore les avertissements de dépréciation de LangChain pour un affichage plus propre
 warnings.filterwarnings("ignore")
 
+# Construction de l'agent et préchauffage des connexions avant la première question
+warm_up()
+
 print("🤖 Agent de voyage activé. Tapez 'exit' pour quitter.")
 print("---")
 
@@ -14,9 +17,21 @@ while True:
         if user_input.lower() == 'exit':
             break
         
-        # Appel de la fonction principale de l'agent
-        response = get_response(user_input)
-        print(f"Assistant: {response}")
+        # Appel de l'agent en streaming : étapes et réponse affichées au fil de l'eau
+        streamed = False
+        for event in stream_response(user_input):
+            if event["type"] == "tool_start":
+                print(f"  🔧 {event['tool']} : {event['input']}", flush=True)
+            elif event["type"] == "tool_end":
+                print(f"  ✅ {event['tool']} terminé", flush=True)
+            elif event["type"] == "token":
+                if not streamed:
+                    print("Assistant: ", end="", flush=True)
+                    streamed = True
+                print(event["text"], end="", flush=True)
+            elif event["type"] == "final" and not streamed:
+                print(f"Assistant: {event['text']}", end="")
+        print()
         print("---")
     except Exception as e:
         print(f"Une erreur est survenue: {e}")
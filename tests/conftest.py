@@ -0,0 +1,48 @@
+# Fichier : tests/conftest.py
+# Les tests qui ont besoin de PostgreSQL utilisent la fixture `database` :
+# base jetable TEST_DATABASE_URL (défaut : le service docker compose
+# postgres_bench), schéma appliqué au début de la session ; ils sont ignorés
+# si elle ne répond pas. Les autres tests tournent hors ligne.
+
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmarks.agent_suite import DEFAULT_DATABASE_URL  # noqa: E402
+
+TEST_DATABASE_URL = os.getenv("TEST_DATABASE_URL", DEFAULT_DATABASE_URL)
+
+
+@pytest.fixture(scope="session")
+def database_url():
+    """URL de la base de test ; ignore le test si elle ne répond pas."""
+    import psycopg2
+
+    try:
+        psycopg2.connect(TEST_DATABASE_URL, connect_timeout=3).close()
+    except psycopg2.OperationalError as e:
+        pytest.skip(f"PostgreSQL de test indisponible ({TEST_DATABASE_URL}) : {e}")
+    return TEST_DATABASE_URL
+
+
+@pytest.fixture(scope="session")
+def database(database_url):
+    """Module database.postgres_db branché sur la base de test (schéma à jour)."""
+    from database import postgres_db
+
+    previous = os.environ.get("DATABASE_URL")
+    os.environ["DATABASE_URL"] = database_url
+    if postgres_db._pool is not None:
+        postgres_db._pool.close()
+    postgres_db._pool = None
+    postgres_db.apply_schema()
+    yield postgres_db
+    postgres_db._pool.close()
+    postgres_db._pool = None
+    if previous is None:
+        os.environ.pop("DATABASE_URL", None)
+    else:
+        os.environ["DATABASE_URL"] = previous
@@ -0,0 +1,148 @@
+# Fichier : tests/test_api_server.py
+# API HTTP (api/server.py) sur un port local, avec des sessions d'agent
+# factices : authentification et concurrence des tours.
+
+import asyncio
+import json
+import threading
+import urllib.error
+import urllib.request
+from http.server import ThreadingHTTPServer
+from types import SimpleNamespace
+
+import pytest
+import requests
+
+from agent import travel_agent
+from api import server
+
+
+class FakeSessions:
+    """Sessions de l'agent : chaque tour dure `latency` s, la concurrence maximale est relevée."""
+
+    def __init__(self, latency=0.5):
+        self.latency = latency
+        self.active = 0
+        self.peak = 0
+        self._lock = threading.Lock()
+
+    def get(self, session_id):
+        memory = SimpleNamespace(chat_memory=SimpleNamespace(messages=[]), moving_summary_buffer="")
+        return SimpleNamespace(memory=memory, ainvoke=self._ainvoke)
+
+    async def _ainvoke(self, inputs, config=None):
+        with self._lock:
+            self.active += 1
+            self.peak = max(self.peak, self.active)
+        try:
+            await asyncio.sleep(self.latency)
+        finally:
+            with self._lock:
+                self.active -= 1
+        return {"output": f"réponse à {inputs['input']}"}
+
+    def stats(self):
+        return {}
+
+
+@pytest.fixture
+def api(monkeypatch):
+    sessions = FakeSessions()
+    monkeypatch.setattr(travel_agent, "sessions", sessions)
+    monkeypatch.setattr(travel_agent, "warm_up", lambda: None)
+    monkeypatch.setattr(travel_agent, "FAST_PATH_MODE", "off")
+    monkeypatch.setattr(travel_agent, "COALESCE_FIRST_TURNS", False)
+    monkeypatch.setattr(server, "API_AUTH", "off")
+    planning = server.PlanningAPI(workers=8, max_queue=8)
+    planning.pool.start()
+    httpd = ThreadingHTTPServer(("127.0.0.1", 0), server.make_handler(planning))
+    httpd.daemon_threads = True
+    threading.Thread(target=httpd.serve_forever, daemon=True).start()
+    yield SimpleNamespace(url=f"http://127.0.0.1:{httpd.server_address[1]}", sessions=sessions, planning=planning)
+    httpd.shutdown()
+    httpd.server_close()
+    planning.pool.stop()
+
+
+def post_turn(url, body, headers=None):
+    request = urllib.request.Request(f"{url}/v1/turns", data=json.dumps(body).encode("utf-8"),
+                                     headers=dict(headers or {}, **{"Content-Type": "application/json"}))
+    try:
+        with urllib.request.urlopen(request, timeout=30) as response:
+            return response.status, json.loads(response.read()), dict(response.headers)
+    except urllib.error.HTTPError as e:
+        return e.code, json.loads(e.read()), dict(e.headers)
+
+
+def test_anonymous_jobs_are_not_capped_as_one_user(api):
+    # Sans X-User-Id, chaque session compte pour elle-même dans le limiteur (2 tours par utilisateur).
+    assert travel_agent.limiter.max_per_user < 4
+    results = []
+
+    def call(i):
+        results.append(post_turn(api.url, {"message": f"question {i}", "session_id": f"s{i}", "deadline_ms": 20000}))
+
+    threads = [threading.Thread(target=call, args=(i,)) for i in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert sorted(status for status, _, _ in results) == [200] * 4
+    assert api.sessions.peak == 4
+
+
+def test_user_header_is_still_capped(api):
+    results = []
+    threads = [
+        threading.Thread(target=lambda i=i: results.append(
+            post_turn(api.url, {"message": f"question {i}", "session_id": f"s{i}"}, {"X-User-Id": "alice"})
+        ))
+        for i in range(4)
+    ]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert sorted(status for status, _, _ in results) == [200] * 4
+    assert api.sessions.peak == travel_agent.limiter.max_per_user
+
+
+@pytest.fixture
+def firebase_api(api, monkeypatch):
+    """API en mode firebase, vérifiant les jetons d'un émetteur local."""
+    from auth import firebase_auth
+    from auth.local_issuer import LocalTokenIssuer
+    from auth.session import SessionManager, SigningKeys, TokenVerifier
+
+    issuer = LocalTokenIssuer("demo-travel")
+    state = {"down": False}
+
+    def fetch_keys():
+        if state["down"]:
+            raise requests.ConnectionError("googleapis.com injoignable")
+        return issuer.fetch_keys()
+
+    keys = SigningKeys(fetch=fetch_keys, min_refetch_interval=0)
+    monkeypatch.setattr(firebase_auth, "_session_manager", SessionManager(TokenVerifier(issuer.project_id, keys),
+                                                                          issuer.refresh))
+    monkeypatch.setattr(server, "API_AUTH", "firebase")
+    return SimpleNamespace(url=api.url, issuer=issuer, state=state)
+
+
+def test_invalid_token_is_401(firebase_api):
+    status, body, _ = post_turn(firebase_api.url, {"message": "bonjour"}, {"Authorization": "Bearer abc"})
+    assert (status, body["error"]) == (401, "unauthorized")
+    status, _, _ = post_turn(firebase_api.url, {"message": "bonjour"})
+    assert status == 401
+
+
+def test_unreachable_signing_keys_is_503(firebase_api):
+    token = firebase_api.issuer.issue("alice")
+    firebase_api.state["down"] = True
+    status, body, headers = post_turn(firebase_api.url, {"message": "bonjour"}, {"Authorization": f"Bearer {token}"})
+    assert (status, body["error"]) == (503, "auth_unavailable")
+    assert int(headers["Retry-After"]) > 0
+
+    firebase_api.state["down"] = False
+    status, body, _ = post_turn(firebase_api.url, {"message": "bonjour"}, {"Authorization": f"Bearer {token}"})
+    assert status == 200 and body["answer"] == "réponse à bonjour"
@@ -0,0 +1,129 @@
+# Fichier : tests/test_auth_session.py
+# Vérification locale des jetons et renouvellement des sessions
+# (auth/session.py), hors ligne grâce à auth/local_issuer.py.
+
+import time
+
+import pytest
+
+from auth.local_issuer import LocalTokenIssuer
+from auth.session import InvalidToken, SigningKeys, TokenVerifier
+
+
+@pytest.fixture
+def issuer():
+    return LocalTokenIssuer("demo-travel")
+
+
+def make_verifier(issuer, **kwargs):
+    return TokenVerifier(issuer.project_id, SigningKeys(fetch=issuer.fetch_keys, **kwargs))
+
+
+def wait_for(condition, timeout=5.0):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if condition():
+            return True
+        time.sleep(0.02)
+    return False
+
+
+def test_valid_token_is_accepted_and_cached(issuer):
+    verifier = make_verifier(issuer)
+    token = issuer.issue("alice", "alice@example.com")
+    assert verifier.verify(token)["sub"] == "alice"
+    assert verifier.verify(token)["email"] == "alice@example.com"
+    assert verifier.stats()["key_fetches"] == 1
+
+
+def test_expired_token_is_rejected(issuer):
+    verifier = make_verifier(issuer)
+    with pytest.raises(InvalidToken):
+        verifier.verify(issuer.issue("alice", lifetime=-3600))
+
+
+@pytest.mark.parametrize("claims", [
+    {"aud": "other-project"},
+    {"iss": "https://securetoken.google.com/other-project"},
+    {"iss": "https://accounts.example.com"},
+])
+def test_wrong_audience_or_issuer_is_rejected(issuer, claims):
+    verifier = make_verifier(issuer)
+    with pytest.raises(InvalidToken):
+        verifier.verify(issuer.issue("alice", **claims))
+
+
+def test_token_from_another_issuer_is_rejected(issuer):
+    verifier = make_verifier(issuer)
+    forged = LocalTokenIssuer(issuer.project_id).issue("mallory")
+    with pytest.raises(InvalidToken):
+        verifier.verify(forged)
+
+
+def test_unknown_kid_triggers_a_key_refresh(issuer):
+    verifier = make_verifier(issuer, min_refetch_interval=0)
+    verifier.verify(issuer.issue("alice"))
+    assert verifier.keys.fetches == 1
+
+    issuer.rotate_key()  # kid inconnu du cache, clés encore valides
+    assert verifier.verify(issuer.issue("bob"))["sub"] == "bob"
+    assert verifier.keys.fetches == 2
+
+
+def test_unknown_kid_refetch_is_rate_limited(issuer):
+    verifier = make_verifier(issuer, min_refetch_interval=60)
+    verifier.verify(issuer.issue("alice"))
+    issuer.rotate_key()
+    for _ in range(3):
+        with pytest.raises(InvalidToken):
+            verifier.verify(issuer.issue("bob"))
+    assert verifier.keys.fetches == 1
+
+
+def test_key_rotation_keeps_old_tokens_valid(issuer):
+    verifier = make_verifier(issuer, min_refetch_interval=0)
+    old_token = issuer.issue("alice")
+    issuer.rotate_key()
+    new_token = issuer.issue("alice")
+    assert verifier.verify(new_token)["sub"] == "alice"
+    assert verifier.verify(old_token)["sub"] == "alice"
+
+
+def test_background_refresh_renews_session_before_expiry():
+    issuer = LocalTokenIssuer("demo-travel", lifetime=120)  # expire dans moins de refresh_margin
+    tokens = issuer.sign_in("alice@example.com", uid="alice")
+    issuer.lifetime = 3600
+    manager = issuer.session_manager(refresh_margin=300, check_interval=0.05)
+    try:
+        session = manager.open(tokens)
+        assert wait_for(lambda: manager.stats()["refreshed"] >= 1)
+        renewed = manager.get(session["session_id"])
+        assert renewed["expires_at"] >= session["expires_at"] + 3000
+        assert renewed["id_token"] != tokens["idToken"]
+        assert renewed["uid"] == "alice"
+    finally:
+        manager.stop()
+
+
+def test_failed_refresh_keeps_session_until_expiry():
+    issuer = LocalTokenIssuer("demo-travel", lifetime=120)
+    tokens = issuer.sign_in("alice@example.com")
+    issuer.revoke(tokens["refreshToken"])
+    manager = issuer.session_manager(refresh_margin=300, check_interval=0.05)
+    try:
+        session = manager.open(tokens)
+        assert wait_for(lambda: manager.stats()["refresh_errors"] >= 1)
+        assert manager.get(session["session_id"])["id_token"] == tokens["idToken"]
+    finally:
+        manager.stop()
+
+
+def test_expired_session_is_closed():
+    issuer = LocalTokenIssuer("demo-travel", lifetime=-30)  # accepté grâce à clock_skew, déjà expiré
+    manager = issuer.session_manager(refresh_margin=0)
+    try:
+        session = manager.open(issuer.sign_in("alice@example.com"))
+        assert manager.get(session["session_id"]) is None
+    finally:
+        manager.stop()
+    assert manager.stats()["expired"] == 1
@@ -0,0 +1,61 @@
+# Fichier : tests/test_bulk_load.py
+# Chargement en masse (database/bulk_load.py) : les valeurs sont copiées
+# telles quelles (chaîne vide ≠ NULL) et un second chargement identique ne
+# réécrit aucune ligne.
+
+import json
+import uuid
+
+import pytest
+
+from database.bulk_load import load_file
+
+
+@pytest.fixture
+def catalogue(database, tmp_path):
+    country = f"Testland {uuid.uuid4().hex[:8]}"
+    destinations = [
+        {"country": country, "city": "Vide", "description": "", "visa_info": "", "vaccinations": None,
+         "average_budget_per_day": 80, "visa_required": False, "aliases": []},
+        {"country": country, "city": "Guillemets", "description": 'Le "vieux" port, virgules, et\nretours',
+         "visa_info": "\\N", "aliases": ["Port", "Vieux Port"]},
+    ]
+    accommodations = [
+        {"country": country, "city": "Vide", "name": "Auberge", "type": "hostel", "address": "",
+         "booking_url": None, "average_price_per_night": 25.5, "rating": 4.2, "amenities": ["wifi", ""]},
+    ]
+    for table, rows in (("destinations", destinations), ("accommodations", accommodations)):
+        with open(tmp_path / f"{table}.jsonl", "w", encoding="utf-8") as f:
+            f.writelines(json.dumps(row, ensure_ascii=False) + "\n" for row in rows)
+    yield country, tmp_path
+    with database.get_db_connection() as conn:
+        with conn.cursor() as cur:
+            cur.execute("DELETE FROM destinations WHERE country = %s;", (country,))
+            cur.execute("DELETE FROM bulk_load_progress WHERE source LIKE %s;", (f"%{tmp_path}%",))
+
+
+def load(database, directory):
+    with database.get_db_connection() as conn:
+        return [load_file(conn, table, str(directory / f"{table}.jsonl"), restart=True)
+                for table in ("destinations", "accommodations")]
+
+
+def test_empty_strings_are_kept_and_reload_writes_nothing(database, catalogue):
+    country, directory = catalogue
+    assert [r["rows_written"] for r in load(database, directory)] == [2, 1]
+
+    with database.get_db_connection() as conn:
+        with conn.cursor() as cur:
+            cur.execute("SELECT city, description, visa_info, vaccinations FROM destinations "
+                        "WHERE country = %s ORDER BY city;", (country,))
+            rows = cur.fetchall()
+            cur.execute("SELECT address, booking_url FROM accommodations a JOIN destinations d "
+                        "ON d.id = a.destination_id WHERE d.country = %s;", (country,))
+            address, booking_url = cur.fetchone()
+    assert rows == [
+        ("Guillemets", 'Le "vieux" port, virgules, et\nretours', "\\N", None),
+        ("Vide", "", "", None),
+    ]
+    assert (address, booking_url) == ("", None)
+
+    assert [r["rows_written"] for r in load(database, directory)] == [0, 0]
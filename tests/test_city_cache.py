@@ -0,0 +1,155 @@
+# Fichier : tests/test_city_cache.py
+# Cache des fiches de villes (database/city_cache.py) et colonnes du
+# classement (database/ranking.py) : une invalidation reçue pendant une
+# lecture ne doit pas être écrasée par son résultat périmé.
+
+import asyncio
+import threading
+
+import pytest
+
+from database import city_cache
+from database.ranking import PreferenceRanker
+
+
+@pytest.fixture
+def versions(monkeypatch):
+    """
+    Fausse base : la première lecture renvoie l'ancienne fiche et reste
+    bloquée jusqu'à `release`, les suivantes renvoient la nouvelle.
+    """
+    state = {"reads": 0, "started": threading.Event(), "release": threading.Event()}
+
+    def fetch(key, filters):
+        state["reads"] += 1
+        if state["reads"] == 1:
+            state["started"].set()
+            state["release"].wait(5)
+            return "ancienne fiche"
+        return "nouvelle fiche"
+
+    async def afetch(key, filters):
+        return await asyncio.to_thread(fetch, key, filters)
+
+    monkeypatch.setattr(city_cache, "_fetch_details", fetch)
+    monkeypatch.setattr(city_cache, "_afetch_details", afetch)
+    monkeypatch.setattr(city_cache, "_invalidation_callbacks", [])
+    city_cache.invalidate_city("*")
+    yield state
+    state["release"].set()
+    city_cache.invalidate_city("*")
+
+
+@pytest.mark.parametrize("mode", ["sync", "async"])
+def test_invalidation_during_lookup_wins(versions, mode):
+    def lookup():
+        if mode == "sync":
+            return city_cache.get_cached_info_for_city("Gentville")
+        return asyncio.run(city_cache.aget_cached_info_for_city("Gentville"))
+
+    results = []
+    reader = threading.Thread(target=lambda: results.append(lookup()))
+    reader.start()
+    assert versions["started"].wait(5)
+    city_cache.invalidate_city("gentville")  # la ville change pendant la lecture
+
+    # Une lecture postérieure ne se joint pas à la lecture en cours.
+    assert "nouvelle fiche" in lookup()
+    versions["release"].set()
+    reader.join(5)
+    assert "ancienne fiche" in results[0]
+    # L'ancienne lecture, terminée après l'invalidation, n'a rien écrit.
+    assert "nouvelle fiche" in lookup()
+    assert versions["reads"] == 2
+
+
+def test_invalidation_during_ranker_load_wins(monkeypatch):
+    started, release = threading.Event(), threading.Event()
+    loads = []
+
+    def load_city(city):
+        loads.append(city)
+        if len(loads) == 1:
+            started.set()
+            release.wait(5)
+            name = "Hôtel ancien"
+        else:
+            name = "Hôtel nouveau"
+        return {"destination": {"city": "Gentville", "country": "Testland"},
+                "accommodations": [(name, "hotel", 50.0, 4.0)], "activities": []}
+
+    ranker = PreferenceRanker(load_city=load_city)
+    monkeypatch.setattr(city_cache, "_ranker", ranker)
+    monkeypatch.setattr(city_cache, "RANKING_MODE", "numpy")
+    monkeypatch.setattr(city_cache, "_invalidation_callbacks", [ranker.refresh_city])
+    city_cache.invalidate_city("*")
+    filters = {"limit": 5, "sort": "best"}
+
+    results = []
+    reader = threading.Thread(target=lambda: results.append(city_cache.get_cached_info_for_city("Gentville", filters)))
+    reader.start()
+    try:
+        assert started.wait(5)
+        city_cache.invalidate_city("gentville")  # la ville change pendant le chargement des colonnes
+    finally:
+        release.set()
+        reader.join(5)
+    assert "Hôtel ancien" in results[0]
+
+    # Les colonnes chargées avant l'invalidation n'ont été gardées ni par le classement ni par le cache.
+    assert not ranker.is_loaded("gentville")
+    assert "Hôtel nouveau" in city_cache.get_cached_info_for_city("Gentville", filters)
+    assert len(loads) == 2
+    city_cache.invalidate_city("*")
+
+
+@pytest.fixture
+def approximate(monkeypatch):
+    """« Pariss » absente de la base, résolue vers « Paris » ; les lectures sont comptées."""
+    state = {"reads": [], "resolutions": 0, "version": 1, "failing": set()}
+
+    def fetch(key, filters):
+        state["reads"].append(key)
+        if key in state["failing"]:
+            raise ConnectionError("base indisponible")
+        return f"fiche {state['version']}" if key == "paris" else None
+
+    async def afetch(key, filters):
+        return fetch(key, filters)
+
+    def resolve(city_name):
+        state["resolutions"] += 1
+        return {"id": 1, "city": "Paris", "country": "France", "confidence": 0.9, "matched": "paris"}
+
+    monkeypatch.setattr(city_cache, "_fetch_details", fetch)
+    monkeypatch.setattr(city_cache, "_afetch_details", afetch)
+    monkeypatch.setattr(city_cache, "resolve_city", resolve)
+    monkeypatch.setattr(city_cache, "_invalidation_callbacks", [])
+    city_cache.invalidate_city("*")
+    yield state
+    city_cache.invalidate_city("*")
+
+
+@pytest.mark.parametrize("mode", ["sync", "async"])
+def test_approximate_name_is_cached_until_its_city_changes(approximate, mode):
+    def lookup():
+        if mode == "sync":
+            return city_cache.get_cached_info_for_city("Pariss")
+        return asyncio.run(city_cache.aget_cached_info_for_city("Pariss"))
+
+    first = lookup()
+    assert "destination la plus proche : Paris" in first and "fiche 1" in first
+    assert lookup() == first
+    assert approximate["reads"] == ["pariss", "paris"] and approximate["resolutions"] == 1
+
+    approximate["version"] = 2
+    city_cache.invalidate_city("paris")  # invalide aussi « pariss »
+    assert "fiche 2" in lookup()
+    assert approximate["resolutions"] == 2
+
+
+def test_approximate_name_error_is_not_cached(approximate):
+    approximate["failing"].add("paris")
+    assert "Erreur" in city_cache.get_cached_info_for_city("Pariss")
+    approximate["failing"].clear()
+    assert "fiche 1" in city_cache.get_cached_info_for_city("Pariss")
@@ -0,0 +1,89 @@
+# Fichier : tests/test_city_lookup_plan.py
+# La recherche de ville de get_info_for_city doit rester servie par les
+# index sur un gros catalogue : lecture de la fiche précalculée (CITY_DIGESTS,
+# par défaut) et assemblage de repli (CITY_DIGESTS=off). Les données sont
+# créées dans des tables temporaires, qui masquent les tables publiques le
+# temps de la transaction, puis jetées : la base n'est pas modifiée.
+
+import json
+import os
+
+import psycopg2
+import pytest
+
+N_DESTINATIONS = int(os.getenv("TEST_PLAN_DESTINATIONS", "100000"))
+
+# Identifiants explicites : les valeurs par défaut copiées par LIKE ... INCLUDING
+# ALL consommeraient les séquences des tables publiques.
+SEED_SQL = """
+    CREATE TEMP TABLE destinations (LIKE public.destinations INCLUDING ALL);
+    CREATE TEMP TABLE accommodations (LIKE public.accommodations INCLUDING ALL);
+    CREATE TEMP TABLE activities (LIKE public.activities INCLUDING ALL);
+    CREATE TEMP TABLE destination_digests (LIKE public.destination_digests INCLUDING ALL);
+
+    INSERT INTO destinations (id, country, city, description, safety_rating)
+    SELECT i, 'Pays ' || (i %% 200), 'Ville' || i, 'Destination synthétique', 1 + i %% 5
+    FROM generate_series(1, %(n)s) AS i;
+
+    INSERT INTO accommodations (id, destination_id, name, type, average_price_per_night, rating)
+    SELECT (d - 1) * 2 + k, d, 'Hôtel ' || d || '-' || k, CASE WHEN k = 1 THEN 'hostel' ELSE 'hotel' END,
+           20 + k * 40, 4.0
+    FROM generate_series(1, %(n)s) AS d, generate_series(1, 2) AS k;
+
+    INSERT INTO activities (id, destination_id, name, category, duration_hours, price)
+    SELECT (d - 1) * 2 + k, d, 'Activité ' || d || '-' || k, 'culture', 2, 10 * k
+    FROM generate_series(1, %(n)s) AS d, generate_series(1, 2) AS k;
+
+    INSERT INTO destination_digests (city_key, destination_id, digest, digest_text)
+    SELECT lower(city), id, jsonb_build_object('destination', jsonb_build_object('id', id)), description
+    FROM destinations;
+
+    ANALYZE destinations;
+    ANALYZE accommodations;
+    ANALYZE activities;
+    ANALYZE destination_digests;
+"""
+
+
+@pytest.fixture(scope="module")
+def catalogue(database, database_url):
+    conn = psycopg2.connect(database_url)
+    try:
+        with conn.cursor() as cur:
+            cur.execute(SEED_SQL, {"n": N_DESTINATIONS})
+        yield conn
+    finally:
+        conn.rollback()
+        conn.close()
+
+
+def _scans(conn, query):
+    with conn.cursor() as cur:
+        cur.execute("EXPLAIN (FORMAT JSON) " + query, (f"ville{N_DESTINATIONS // 2}",))
+        plan = cur.fetchone()[0]
+    if isinstance(plan, str):
+        plan = json.loads(plan)
+    nodes, scans = [plan[0]["Plan"]], {}
+    while nodes:
+        node = nodes.pop()
+        nodes += node.get("Plans", [])
+        if "Relation Name" in node:
+            scans.setdefault(node["Relation Name"], set()).add(node["Node Type"])
+    return scans
+
+
+INDEX_SCANS = {"Index Scan", "Index Only Scan"}
+
+
+@pytest.mark.parametrize("query_name", ["CITY_DIGEST_TEXT_QUERY", "CITY_DIGEST_QUERY"])
+def test_digest_lookup_uses_primary_key(database, catalogue, query_name):
+    scans = _scans(catalogue, getattr(database, query_name))
+    assert set(scans) == {"destination_digests"}
+    assert scans["destination_digests"] <= INDEX_SCANS
+
+
+def test_assembly_fallback_uses_indexes(database, catalogue):
+    scans = _scans(catalogue, database.CITY_DETAILS_QUERY)
+    assert set(scans) == {"destinations", "accommodations", "activities"}
+    for relation, node_types in scans.items():
+        assert node_types <= INDEX_SCANS, f"{relation} : {node_types}"
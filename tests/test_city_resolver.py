@@ -0,0 +1,71 @@
+# Fichier : tests/test_city_resolver.py
+# Résolution approximative des villes (database/city_resolver.py) sur le
+# catalogue synthétique des benchmarks : noms exacts, avec le pays, fautes
+# de frappe et mise à jour incrémentale de l'index.
+
+import os
+import random
+
+import pytest
+
+from benchmarks.catalogue import synthetic_catalogue
+from benchmarks.city_resolver import typo
+from database.city_resolver import CityResolver, edit_ratio
+
+
+@pytest.fixture(scope="module")
+def catalogue():
+    rows = synthetic_catalogue(int(os.getenv("TEST_RESOLVER_CITIES", "20000")), random.Random(7))
+    by_city = {row["city"].lower(): row for row in rows}
+    resolver = CityResolver(load_all=lambda: rows, load_city=lambda city: [by_city[city]] if city in by_city else [])
+    resolver.rebuild()
+    return rows, by_city, resolver
+
+
+def accuracy(resolver, rows, make_query, n=500, seed=3):
+    rng = random.Random(seed)
+    sample = rng.sample(rows, n)
+    correct = 0
+    for row in sample:
+        match = resolver.resolve(make_query(row, rng))
+        correct += match is not None and match["id"] == row["id"]
+    return correct / n
+
+
+def test_exact_and_country_queries(catalogue):
+    rows, _, resolver = catalogue
+    assert accuracy(resolver, rows, lambda r, rng: r["city"]) >= 0.99
+    assert accuracy(resolver, rows, lambda r, rng: f"{r['city']}, {r['country']}") >= 0.99
+
+
+def test_typo_queries_resolve_to_the_right_city(catalogue):
+    rows, _, resolver = catalogue
+    assert accuracy(resolver, rows, lambda r, rng: typo(r["city"], rng)) >= 0.88
+
+
+def test_incremental_refresh_updates_the_index(catalogue):
+    rows, by_city, resolver = catalogue
+    row = dict(rows[0], aliases=["Zyxwopolis"])
+    key = row["city"].lower()
+    original = by_city[key]
+    by_city[key] = row
+    try:
+        resolver.refresh_city(key)
+        match = resolver.resolve("Zyxwopolys")
+        assert match["id"] == row["id"] and match["confidence"] < 1.0
+        assert resolver.resolve(row["city"])["id"] == row["id"]
+    finally:
+        by_city[key] = original
+        resolver.refresh_city(key)
+    match = resolver.resolve("Zyxwopolis")
+    assert match is None or match["confidence"] < 1.0  # l'alias a disparu de l'index
+
+
+@pytest.mark.parametrize("a, b, floor, expected", [
+    ("paris", "paris", 0.0, 1.0),
+    ("paris", "parus", 0.0, 0.8),
+    ("paris", "parus", 0.9, None),
+    ("tokyo", "kyoto", 0.0, 0.2),
+])
+def test_edit_ratio(a, b, floor, expected):
+    assert edit_ratio(a, b, floor) == (pytest.approx(expected) if expected is not None else None)
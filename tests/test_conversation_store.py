@@ -0,0 +1,47 @@
+# Fichier : tests/test_conversation_store.py
+# File d'écriture de l'historique (database/conversation_store.py) : lots
+# retentés avec attente croissante, puis abandonnés sans attente inutile.
+
+import pytest
+
+from database import conversation_store
+from database.conversation_store import ConversationWriter
+
+
+@pytest.fixture
+def sleeps(monkeypatch):
+    delays = []
+    monkeypatch.setattr(conversation_store.time, "sleep", delays.append)
+    return delays
+
+
+def test_failed_batch_backs_off_only_between_attempts(sleeps):
+    calls = []
+
+    def failing(batch):
+        calls.append(len(batch))
+        raise ConnectionError("base indisponible")
+
+    writer = ConversationWriter(write_batch=failing, flush_interval=0, max_retries=2)
+    writer.append("c1", "u1", "user", "bonjour")
+    assert writer.flush(timeout=5)
+    assert calls == [1, 1, 1]
+    assert sleeps == [0.1, 0.2]
+    stats = writer.stats()
+    assert stats["errors"] == 3 and stats["dropped"] == 1 and stats["written"] == 0
+
+
+def test_batch_written_after_a_retry(sleeps):
+    written, failures = [], [ConnectionError("coupure")]
+
+    def flaky(batch):
+        if failures:
+            raise failures.pop()
+        written.extend(batch)
+
+    writer = ConversationWriter(write_batch=flaky, flush_interval=0, max_retries=2)
+    writer.append("c1", "u1", "user", "bonjour")
+    assert writer.flush(timeout=5)
+    assert [message[3] for message in written] == ["bonjour"]
+    assert sleeps == [0.1]
+    assert writer.stats()["written"] == 1
@@ -0,0 +1,102 @@
+# Fichier : tests/test_destination_digests.py
+# Fiches précalculées (database/init/08_destination_digests.sql) : deux
+# transactions concurrentes sur la même ville doivent toutes deux aboutir,
+# et la fiche finale refléter leurs deux modifications.
+
+import threading
+import time
+import uuid
+
+import psycopg2
+import pytest
+
+
+@pytest.fixture
+def city(database):
+    """Une destination jetable avec deux hébergements et deux activités."""
+    name = f"Testville {uuid.uuid4().hex[:8]}"
+    with database.get_db_connection() as conn:
+        with conn.cursor() as cur:
+            cur.execute(
+                "INSERT INTO destinations (country, city, description) VALUES ('Testland', %s, 'Test') RETURNING id;",
+                (name,),
+            )
+            destination_id = cur.fetchone()[0]
+            cur.execute(
+                "INSERT INTO accommodations (destination_id, name, type, average_price_per_night, rating) "
+                "VALUES (%s, 'Hôtel A', 'hotel', 100, 3.0), (%s, 'Hôtel B', 'hotel', 80, 3.0);",
+                (destination_id, destination_id),
+            )
+            cur.execute(
+                "INSERT INTO activities (destination_id, name, category) VALUES (%s, 'Musée', 'culture');",
+                (destination_id,),
+            )
+    yield name, destination_id
+    with database.get_db_connection() as conn:
+        with conn.cursor() as cur:
+            cur.execute("DELETE FROM destinations WHERE id = %s;", (destination_id,))
+
+
+WRITES = {
+    "update": [
+        "UPDATE accommodations SET rating = 4.5 WHERE destination_id = %(id)s AND name = 'Hôtel A';",
+        "UPDATE accommodations SET rating = 4.8 WHERE destination_id = %(id)s AND name = 'Hôtel B';",
+    ],
+    "insert": [
+        "INSERT INTO activities (destination_id, name, category) VALUES (%(id)s, 'Balade', 'nature');",
+        "INSERT INTO activities (destination_id, name, category) VALUES (%(id)s, 'Marché', 'food');",
+    ],
+}
+
+
+@pytest.mark.parametrize("kind", sorted(WRITES))
+def test_concurrent_writers_on_one_city(database, database_url, city, kind):
+    name, destination_id = city
+    first_sql, second_sql = WRITES[kind]
+    first = psycopg2.connect(database_url)
+    second = psycopg2.connect(database_url)
+    errors = []
+
+    def second_writer():
+        try:
+            with second.cursor() as cur:
+                cur.execute(second_sql, {"id": destination_id})
+            second.commit()
+        except Exception as e:
+            second.rollback()
+            errors.append(e)
+
+    try:
+        with first.cursor() as cur:
+            cur.execute(first_sql, {"id": destination_id})  # fiche recalculée, transaction ouverte
+        writer = threading.Thread(target=second_writer)
+        writer.start()
+        time.sleep(0.3)
+        assert writer.is_alive(), "la seconde transaction doit attendre la première"
+        first.commit()
+        writer.join(timeout=10)
+        assert not writer.is_alive()
+        assert errors == []
+    finally:
+        first.close()
+        second.close()
+
+    details = database.fetch_city_digest(name)
+    with database.get_db_connection() as conn:
+        with conn.cursor() as cur:
+            cur.execute("SELECT digest_text FROM destination_digests WHERE city_key = lower(%s);", (name,))
+            digest_text = cur.fetchone()[0]
+    assert digest_text == database.format_city_body(details)
+    if kind == "update":
+        assert sorted(a["rating"] for a in details["accommodations"]) == [4.5, 4.8]
+    else:
+        assert sorted(t["name"] for t in details["activities"]) == ["Balade", "Marché", "Musée"]
+
+
+def test_renamed_city_digest_is_removed(database, city):
+    name, destination_id = city
+    with database.get_db_connection() as conn:
+        with conn.cursor() as cur:
+            cur.execute("UPDATE destinations SET city = %s WHERE id = %s;", (name + " bis", destination_id))
+    assert database.fetch_city_digest(name) is None
+    assert database.fetch_city_digest(name + " bis")["destination"]["id"] == destination_id
@@ -0,0 +1,78 @@
+# Fichier : tests/test_fast_path.py
+# Raccourci « parle-moi de <ville> » (agent/router.py) : la réponse doit être
+# celle de travel_database_tool, filtrée par les préférences et bornée par limit.
+
+import asyncio
+import uuid
+
+import pytest
+
+from agent.preferences import use_preferences
+
+
+class FakeMemory:
+    def __init__(self):
+        self.saved = []
+
+    async def asave_context(self, inputs, outputs):
+        self.saved.append((inputs, outputs))
+
+
+class FakeSessions:
+    """Remplace le SessionStore : pas d'AgentExecutor (ni de modèle) à construire."""
+
+    def __init__(self):
+        self.memory = FakeMemory()
+
+    def get(self, session_id):
+        return self
+
+
+@pytest.fixture
+def travel_agent(database, monkeypatch):
+    from agent import travel_agent
+    monkeypatch.setattr(travel_agent, "sessions", FakeSessions())
+    monkeypatch.setattr(travel_agent, "FAST_PATH_MODE", "template")
+    return travel_agent
+
+
+@pytest.fixture
+def city(database):
+    """Une destination avec douze hébergements de 20 à 130 €/nuit."""
+    name = f"Rapideville {uuid.uuid4().hex[:8]}"
+    with database.get_db_connection() as conn:
+        with conn.cursor() as cur:
+            cur.execute(
+                "INSERT INTO destinations (country, city, description) VALUES ('Testland', %s, 'Test') RETURNING id;",
+                (name,),
+            )
+            destination_id = cur.fetchone()[0]
+            for i in range(12):
+                cur.execute(
+                    "INSERT INTO accommodations (destination_id, name, type, average_price_per_night, rating) "
+                    "VALUES (%s, %s, 'hotel', %s, 4.0);",
+                    (destination_id, f"Hôtel {i}", 20 + 10 * i),
+                )
+    yield name
+    with database.get_db_connection() as conn:
+        with conn.cursor() as cur:
+            cur.execute("DELETE FROM destinations WHERE id = %s;", (destination_id,))
+
+
+def test_fast_path_answer_is_the_filtered_tool_summary(travel_agent, city):
+    travel_agent.router.mark_stale()
+    preferences = {"budget_per_day": 160}  # hébergements ≤ 80 €/nuit
+
+    async def main():
+        with use_preferences(preferences):
+            answer = await travel_agent._afast_path_answer(f"Parle-moi de {city}", "session-test")
+            tool = await travel_agent.atravel_database(city)
+        return answer, tool
+
+    answer, tool = asyncio.run(main())
+    assert answer == tool
+    hotels = [line for line in answer.splitlines() if line.startswith("- Hôtel")]
+    assert len(hotels) == 5  # limit par défaut de l'outil
+    assert all(float(line.split(")")[1].split("€")[0]) <= 80 for line in hotels)
+    assert "≤ 80.0€/nuit" in answer
+    assert travel_agent.sessions.memory.saved[-1][1]["output"] == answer
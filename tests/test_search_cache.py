@@ -0,0 +1,139 @@
+# Fichier : tests/test_search_cache.py
+# Outil internet_search (agent/search_cache.py) avec une fausse recherche :
+# cache SQLite, regroupement des requêtes identiques, limitation de débit et
+# repli sur un résultat expiré.
+
+import asyncio
+import threading
+import time
+
+import pytest
+
+from agent.search_cache import create_cached_search_tool
+from utils.rate_limit import RateLimitTimeout, TokenBucket
+
+
+class FakeSearch:
+    """Fausse recherche : compte les appels, latence et panne à la demande."""
+
+    def __init__(self, latency: float = 0.0):
+        self.latency = latency
+        self.calls = []
+        self.failing = False
+        self._lock = threading.Lock()
+
+    def __call__(self, query: str) -> str:
+        with self._lock:
+            self.calls.append(query)
+        time.sleep(self.latency)
+        if self.failing:
+            raise ConnectionError("moteur indisponible")
+        return f"résultats pour {query}"
+
+
+@pytest.fixture
+def cache_path(tmp_path, monkeypatch):
+    path = tmp_path / "search_cache.sqlite3"
+    monkeypatch.setenv("SEARCH_CACHE_PATH", str(path))
+    monkeypatch.setenv("SEARCH_RATE_LIMIT", "1000")
+    monkeypatch.setenv("SEARCH_RATE_BURST", "1000")
+    return path
+
+
+def test_cache_hit_within_ttl(cache_path):
+    backend = FakeSearch()
+    tool = create_cached_search_tool(backend=backend)
+    assert tool.run("Visa Japon") == "résultats pour Visa Japon"
+    assert tool.run("  visa japon ") == "résultats pour Visa Japon"  # même requête normalisée
+    assert len(backend.calls) == 1
+    assert tool.stats()["cache"]["hits"] == 1
+
+
+def test_expired_entry_is_fetched_again(cache_path):
+    backend = FakeSearch()
+    tool = create_cached_search_tool(backend=backend)
+    tool.cache.ttl = 0.05
+    tool.run("météo Lisbonne")
+    time.sleep(0.1)
+    tool.run("météo Lisbonne")
+    assert len(backend.calls) == 2
+
+
+def test_cache_persists_across_instances(cache_path):
+    create_cached_search_tool(backend=FakeSearch()).run("visa Japon")
+    backend = FakeSearch()
+    tool = create_cached_search_tool(backend=backend)
+    assert tool.run("visa Japon") == "résultats pour visa Japon"
+    assert backend.calls == []
+
+
+def test_concurrent_identical_queries_share_one_call(cache_path):
+    backend = FakeSearch(latency=0.2)
+    tool = create_cached_search_tool(backend=backend)
+    results = []
+    threads = [threading.Thread(target=lambda: results.append(tool.run("visa Japon"))) for _ in range(5)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert results == ["résultats pour visa Japon"] * 5
+    assert len(backend.calls) == 1
+    assert tool.stats()["coalescing"]["shared"] == 4
+
+
+def test_concurrent_async_queries_share_one_call(cache_path):
+    backend = FakeSearch(latency=0.2)
+    tool = create_cached_search_tool(backend=backend)
+
+    async def main():
+        return await asyncio.gather(*(tool.arun("visa Japon") for _ in range(5)))
+
+    assert asyncio.run(main()) == ["résultats pour visa Japon"] * 5
+    assert len(backend.calls) == 1
+
+
+def test_rate_limit_denial(cache_path, monkeypatch):
+    monkeypatch.setenv("SEARCH_RATE_LIMIT", "0.01")
+    monkeypatch.setenv("SEARCH_RATE_BURST", "1")
+    backend = FakeSearch()
+    tool = create_cached_search_tool(backend=backend)
+    tool.rate_limit_timeout = 0.05
+    tool.run("visa Japon")
+    with pytest.raises(RateLimitTimeout):
+        tool.run("visa Pérou")
+    assert backend.calls == ["visa Japon"]
+
+
+@pytest.mark.parametrize("rate, burst", [("0", "3"), ("-1", "3"), ("1", "0")])
+def test_invalid_rate_limit_is_rejected(cache_path, monkeypatch, rate, burst):
+    monkeypatch.setenv("SEARCH_RATE_LIMIT", rate)
+    monkeypatch.setenv("SEARCH_RATE_BURST", burst)
+    with pytest.raises(ValueError):
+        create_cached_search_tool(backend=FakeSearch())
+    with pytest.raises(ValueError):
+        TokenBucket(rate=float(rate), burst=int(burst))
+
+
+@pytest.mark.parametrize("mode", ["sync", "async"])
+def test_stale_result_when_backend_fails(cache_path, mode):
+    backend = FakeSearch()
+    tool = create_cached_search_tool(backend=backend)
+    tool.cache.ttl = 0.05
+    tool.run("visa Japon")
+    time.sleep(0.1)
+    backend.failing = True
+    if mode == "sync":
+        result = tool.run("visa Japon")
+    else:
+        result = asyncio.run(tool.arun("visa Japon"))
+    assert result == "résultats pour visa Japon"
+    assert len(backend.calls) == 2
+    assert tool.stats()["cache"]["stale_hits"] == 1
+
+
+def test_backend_failure_without_stale_result_is_raised(cache_path):
+    backend = FakeSearch()
+    backend.failing = True
+    tool = create_cached_search_tool(backend=backend)
+    with pytest.raises(ConnectionError):
+        asyncio.run(tool.arun("visa Japon"))
@@ -0,0 +1,97 @@
+# Fichier : tests/test_turn_coalescing.py
+# Regroupement des premiers tours identiques (agent/travel_agent.py) : la
+# réponse du premier tour est partagée, mais pas son message d'excuse s'il
+# échoue — les tours en attente s'exécutent alors eux-mêmes.
+
+import asyncio
+from types import SimpleNamespace
+
+import pytest
+
+from agent import travel_agent
+
+
+class FakeExecutor:
+    """AgentExecutor d'une session : le premier tour du processus échoue si `fail_first`."""
+
+    def __init__(self, session_id, backend):
+        self.session_id = session_id
+        self.backend = backend
+        self.saved = []
+        self.memory = SimpleNamespace(
+            chat_memory=SimpleNamespace(messages=[]), moving_summary_buffer="", asave_context=self._save,
+        )
+
+    async def _save(self, inputs, outputs):
+        self.saved.append(outputs["output"])
+
+    async def _answer(self):
+        self.backend.calls.append(self.session_id)
+        await asyncio.sleep(0.2)
+        if self.backend.fail_first and len(self.backend.calls) == 1:
+            raise ConnectionError("Gemini indisponible")
+        return f"réponse pour {self.session_id}"
+
+    async def ainvoke(self, inputs, config=None):
+        return {"output": await self._answer()}
+
+    async def astream_events(self, inputs, version=None, config=None):
+        yield {"event": "on_chain_end", "parent_ids": [], "data": {"output": {"output": await self._answer()}}}
+
+
+class FakeSessions:
+    def __init__(self, fail_first):
+        self.fail_first = fail_first
+        self.calls = []
+        self.executors = {}
+
+    def get(self, session_id):
+        return self.executors.setdefault(session_id, FakeExecutor(session_id, self))
+
+    def stats(self):
+        return {}
+
+
+@pytest.fixture
+def agent(monkeypatch):
+    def install(fail_first):
+        backend = FakeSessions(fail_first)
+        monkeypatch.setattr(travel_agent, "sessions", backend)
+        monkeypatch.setattr(travel_agent, "warm_up", lambda: None)
+        monkeypatch.setattr(travel_agent, "FAST_PATH_MODE", "off")
+        monkeypatch.setattr(travel_agent, "COALESCE_FIRST_TURNS", True)
+        return backend
+    return install
+
+
+async def ask(session_id, streaming):
+    if not streaming:
+        return await travel_agent.aget_response("week-end à Paris", session_id)
+    async for event in travel_agent.astream_response("week-end à Paris", session_id):
+        if event["type"] == "final":
+            return event["text"]
+
+
+async def identical_turns(streaming, sessions=3):
+    leader = asyncio.create_task(ask("s0", streaming))
+    await asyncio.sleep(0.05)  # le premier tour est en cours
+    followers = [ask(f"s{i}", streaming) for i in range(1, sessions)]
+    return await asyncio.gather(leader, *followers)
+
+
+@pytest.mark.parametrize("streaming", [False, True])
+def test_identical_first_turns_share_one_answer(agent, streaming):
+    backend = agent(fail_first=False)
+    answers = asyncio.run(identical_turns(streaming))
+    assert answers == ["réponse pour s0"] * 3
+    assert backend.calls == ["s0"]
+    assert all(backend.get(f"s{i}").saved == ["réponse pour s0"] for i in (1, 2))
+
+
+@pytest.mark.parametrize("streaming", [False, True])
+def test_failed_leader_apology_is_not_shared(agent, streaming):
+    backend = agent(fail_first=True)
+    answers = asyncio.run(identical_turns(streaming))
+    assert "difficulté technique" in answers[0]
+    assert answers[1:] == ["réponse pour s1", "réponse pour s2"]
+    assert sorted(backend.calls) == ["s0", "s1", "s2"]
@@ -0,0 +1,147 @@
+# Fichier : utils/deadline.py
+# Échéance du tour en cours (horloge monotone), portée par une ContextVar :
+# appels LLM, outils et requêtes SQL lisent le temps qui reste sans qu'on le
+# passe de fonction en fonction (les tâches asyncio et asyncio.to_thread
+# copient le contexte). Hors d'un tour : pas d'échéance, rien ne change.
+
+import asyncio
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import AsyncIterator, Awaitable, Callable, Iterator, Optional, TypeVar, Union
+
+from utils.metrics import registry
+
+T = TypeVar("T")
+
+deadline_hits = registry.counter(
+    "travel_agent_deadline_hits_total", "Opérations interrompues par l'échéance du tour, par étape (llm, tool, db...)"
+)
+
+_deadline: ContextVar[Optional[float]] = ContextVar("travel_agent_deadline", default=None)
+
+
+class DeadlineExceeded(Exception):
+    """Le tour n'a pas pu se terminer avant son échéance (`stage` : étape interrompue)."""
+
+    stage = "turn"
+
+
+def _expired(stage: Union[str, Callable[[], str]]) -> DeadlineExceeded:
+    name = stage() if callable(stage) else stage
+    record_hit(name)
+    error = DeadlineExceeded(f"échéance atteinte pendant l'étape {name}")
+    error.stage = name
+    return error
+
+
+@contextmanager
+def use_deadline(seconds: Optional[float]) -> Iterator[None]:
+    """
+    Échéance à `seconds` secondes pour le code du bloc (None ou 0 : aucune).
+    Une échéance englobante plus proche est conservée : on ne fait que resserrer.
+    """
+    current = _deadline.get()
+    if seconds:
+        expires = time.monotonic() + seconds
+        current = expires if current is None else min(current, expires)
+    token = _deadline.set(current)
+    try:
+        yield
+    finally:
+        try:
+            _deadline.reset(token)
+        except ValueError:
+            # Générateur asynchrone fermé depuis un autre contexte : rien à restaurer.
+            pass
+
+
+def remaining() -> Optional[float]:
+    """Secondes avant l'échéance (négatif si dépassée), None hors d'un tour."""
+    expires = _deadline.get()
+    return None if expires is None else expires - time.monotonic()
+
+
+def record_hit(stage: str) -> None:
+    deadline_hits.inc(stage=stage)
+
+
+def time_left(stage: str, cap: Optional[float] = None) -> Optional[float]:
+    """
+    Délai à accorder à un appel : le temps restant, borné par `cap` (délai
+    propre à l'appel) ; `cap` hors d'un tour. Lève DeadlineExceeded si
+    l'échéance est déjà passée : inutile de commencer.
+    """
+    left = remaining()
+    if left is None:
+        return cap
+    if left <= 0:
+        raise _expired(stage)
+    return left if cap is None else min(left, cap)
+
+
+def statement_timeout_ms() -> Optional[int]:
+    """statement_timeout PostgreSQL pour le temps restant (None hors d'un tour)."""
+    left = time_left("db")
+    return None if left is None else max(int(left * 1000), 1)
+
+
+async def bounded(awaitable: Awaitable[T], stage: Union[str, Callable[[], str]], reserve: float = 0.0) -> T:
+    """
+    Attend `awaitable` au plus jusqu'à l'échéance moins `reserve` secondes,
+    puis l'annule (annulation coopérative : appels HTTP, requêtes asyncpg et
+    tâches filles sont interrompus) et lève DeadlineExceeded. `stage` peut
+    être une fonction, appelée à l'échéance (étape en cours à ce moment-là).
+    """
+    left = remaining()
+    if left is None:
+        return await awaitable
+    try:
+        return await asyncio.wait_for(awaitable, max(left - reserve, 0.0))
+    except asyncio.TimeoutError:
+        raise _expired(stage) from None
+
+
+async def bounded_iter(source: AsyncIterator[T], stage: Union[str, Callable[[], str]],
+                       reserve: float = 0.0) -> AsyncIterator[T]:
+    """
+    Relaie `source` jusqu'à l'échéance moins `reserve`, puis l'annule et
+    lève DeadlineExceeded. La source est consommée par une seule tâche, qui
+    garde son contexte d'un élément à l'autre (callbacks LangChain).
+    """
+    if remaining() is None:
+        async for item in source:
+            yield item
+        return
+    items: asyncio.Queue = asyncio.Queue()
+    done = object()
+
+    async def pump():
+        try:
+            async for item in source:
+                items.put_nowait((item, None))
+        except Exception as e:
+            items.put_nowait((done, e))
+        else:
+            items.put_nowait((done, None))
+
+    task = asyncio.ensure_future(pump())
+    try:
+        while True:
+            left = remaining() - reserve
+            try:
+                item, error = await asyncio.wait_for(items.get(), max(left, 0.0))
+            except asyncio.TimeoutError:
+                raise _expired(stage) from None
+            if item is done:
+                if error is not None:
+                    raise error
+                return
+            yield item
+    finally:
+        if not task.done():
+            task.cancel()
+            try:
+                await task
+            except (asyncio.CancelledError, Exception):
+                pass
@@ -0,0 +1,149 @@
+# Fichier : utils/metrics.py
+# Compteurs et histogrammes au format texte Prometheus, et un petit serveur
+# HTTP qui les expose sur /metrics.
+
+import threading
+from bisect import bisect_left
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Callable, Dict, List, Optional, Tuple
+
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+
+def _escape(value) -> str:
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _labels_text(labels: Tuple[Tuple[str, str], ...]) -> str:
+    if not labels:
+        return ""
+    return "{" + ",".join(f'{k}="{_escape(v)}"' for k, v in labels) + "}"
+
+
+class Counter:
+    def __init__(self, name: str, documentation: str):
+        self.name = name
+        self.documentation = documentation
+        self._values: Dict[tuple, float] = {}
+        self._lock = threading.Lock()
+
+    def inc(self, amount: float = 1.0, **labels) -> None:
+        key = tuple(sorted(labels.items()))
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} counter"]
+        with self._lock:
+            for key, value in sorted(self._values.items()):
+                lines.append(f"{self.name}{_labels_text(key)} {value}")
+        return lines
+
+
+class Histogram:
+    def __init__(self, name: str, documentation: str, buckets=DEFAULT_BUCKETS):
+        self.name = name
+        self.documentation = documentation
+        self.buckets = tuple(buckets)
+        self._values: Dict[tuple, list] = {}
+        self._lock = threading.Lock()
+
+    def observe(self, value: float, **labels) -> None:
+        key = tuple(sorted(labels.items()))
+        with self._lock:
+            state = self._values.get(key)
+            if state is None:
+                # compteurs par seuil (non cumulés), somme, nombre
+                state = self._values[key] = [[0] * len(self.buckets), 0.0, 0]
+            index = bisect_left(self.buckets, value)
+            if index < len(self.buckets):
+                state[0][index] += 1
+            state[1] += value
+            state[2] += 1
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} histogram"]
+        with self._lock:
+            for key, (counts, total, count) in sorted(self._values.items()):
+                cumulative = 0
+                for bound, bucket_count in zip(self.buckets, counts):
+                    cumulative += bucket_count
+                    lines.append(f"{self.name}_bucket{_labels_text(key + (('le', repr(bound)),))} {cumulative}")
+                lines.append(f"{self.name}_bucket{_labels_text(key + (('le', '+Inf'),))} {count}")
+                lines.append(f"{self.name}_sum{_labels_text(key)} {total}")
+                lines.append(f"{self.name}_count{_labels_text(key)} {count}")
+        return lines
+
+
+class Registry:
+    """
+    Ensemble de métriques rendues ensemble. Les jauges sont lues au moment du
+    rendu via une fonction (ex. get_pool_stats) : rien n'est calculé entre deux
+    collectes.
+    """
+
+    def __init__(self):
+        self._metrics: Dict[str, object] = {}
+        self._gauges: Dict[str, Tuple[str, Callable[[], Dict]]] = {}
+        self._lock = threading.Lock()
+
+    def counter(self, name: str, documentation: str) -> Counter:
+        with self._lock:
+            return self._metrics.setdefault(name, Counter(name, documentation))
+
+    def histogram(self, name: str, documentation: str, buckets=DEFAULT_BUCKETS) -> Histogram:
+        with self._lock:
+            return self._metrics.setdefault(name, Histogram(name, documentation, buckets))
+
+    def gauge_callback(self, name: str, documentation: str, read: Callable[[], Dict]) -> None:
+        """read() renvoie {valeur d'étiquette ou None: nombre} ; l'étiquette s'appelle 'key'."""
+        with self._lock:
+            self._gauges[name] = (documentation, read)
+
+    def render(self) -> str:
+        with self._lock:
+            metrics = list(self._metrics.values())
+            gauges = list(self._gauges.items())
+        lines = []
+        for metric in metrics:
+            lines += metric.render()
+        for name, (documentation, read) in gauges:
+            try:
+                values = read()
+            except Exception as e:
+                print(f"Erreur lors de la lecture de la jauge {name} : {e}")
+                continue
+            lines += [f"# HELP {name} {documentation}", f"# TYPE {name} gauge"]
+            for key, value in values.items():
+                if isinstance(value, bool) or not isinstance(value, (int, float)):
+                    continue
+                labels = (("key", key),) if key is not None else ()
+                lines.append(f"{name}{_labels_text(labels)} {value}")
+        return "\n".join(lines) + "\n"
+
+
+registry = Registry()
+
+
+def start_metrics_server(port: int, host: str = "0.0.0.0", target: Optional[Registry] = None) -> ThreadingHTTPServer:
+    """Sert target.render() sur http://host:port/metrics, dans un thread démon."""
+    target = target or registry
+
+    class MetricsHandler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            if self.path.split("?")[0] != "/metrics":
+                self.send_error(404)
+                return
+            body = target.render().encode("utf-8")
+            self.send_response(200)
+            self.send_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, format, *args):
+            pass  # pas une ligne de log par collecte
+
+    server = ThreadingHTTPServer((host, port), MetricsHandler)
+    threading.Thread(target=server.serve_forever, name="metrics-server", daemon=True).start()
+    return server
@@ -0,0 +1,53 @@
+# Fichier : utils/rate_limit.py
+
+import threading
+import time
+from typing import Dict, Optional
+
+
+class RateLimitTimeout(Exception):
+    """Levée quand aucun jeton n'est disponible avant la fin du délai d'attente."""
+
+
+class TokenBucket:
+    """
+    Limiteur de débit côté client (seau à jetons), thread-safe :
+    `rate` requêtes par seconde en régime permanent, rafales de `burst`.
+    Lève ValueError si rate n'est pas strictement positif ou burst inférieur à 1.
+    """
+
+    def __init__(self, rate: float, burst: int = 1):
+        if not rate > 0:
+            raise ValueError(f"Débit invalide : {rate} requête(s)/s (doit être > 0)")
+        if burst < 1:
+            raise ValueError(f"Rafale invalide : {burst} (doit être ≥ 1)")
+        self.rate = rate
+        self.burst = burst
+        self._tokens = float(burst)
+        self._updated_at = time.monotonic()
+        self._lock = threading.Lock()
+        self._stats = {"acquired": 0, "throttled": 0, "wait_time_total": 0.0}
+
+    def acquire(self, timeout: Optional[float] = None) -> None:
+        start = time.monotonic()
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._tokens = min(self.burst, self._tokens + (now - self._updated_at) * self.rate)
+                self._updated_at = now
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    waited = now - start
+                    self._stats["acquired"] += 1
+                    self._stats["wait_time_total"] += waited
+                    if waited > 0.001:
+                        self._stats["throttled"] += 1
+                    return
+                wait = (1 - self._tokens) / self.rate
+            if timeout is not None and time.monotonic() + wait - start > timeout:
+                raise RateLimitTimeout(f"Limite de {self.rate} requête(s)/s atteinte")
+            time.sleep(wait)
+
+    def stats(self) -> Dict:
+        with self._lock:
+            return dict(self._stats)
@@ -0,0 +1,94 @@
+# Fichier : utils/singleflight.py
+
+import asyncio
+import threading
+from concurrent.futures import Future
+from typing import Awaitable, Callable, Dict, Hashable, Tuple
+
+
+class Abandoned(Exception):
+    """L'appel partagé a été annulé par son exécutant : chaque attente réessaie."""
+
+
+class SingleFlight:
+    """
+    Regroupe les appels simultanés portant sur la même clé : le premier
+    exécute la fonction, les suivants attendent et reçoivent le même résultat
+    (ou la même exception). Rien n'est conservé une fois l'appel terminé.
+
+    Utilisable depuis des threads (do) comme depuis des coroutines (ado), y
+    compris sur des boucles asyncio différentes : un appel synchrone peut
+    attendre le résultat d'un appel asynchrone en cours, et inversement.
+    join / finish permettent d'exécuter soi-même l'appel (ex. réponse en
+    streaming) tout en le partageant.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._calls: Dict[Hashable, Future] = {}
+        self._stats = {"executions": 0, "shared": 0, "abandoned": 0}
+
+    def join(self, key: Hashable) -> Tuple[Future, bool]:
+        """(futur de l'appel, True si l'appelant doit l'exécuter puis appeler finish)."""
+        with self._lock:
+            future = self._calls.get(key)
+            if future is not None:
+                self._stats["shared"] += 1
+                return future, False
+            future = self._calls[key] = Future()
+            self._stats["executions"] += 1
+            return future, True
+
+    def finish(self, key: Hashable, future: Future, result=None, error: BaseException = None) -> None:
+        """Publie le résultat (ou l'erreur) de l'appel aux appelants en attente."""
+        with self._lock:
+            if self._calls.get(key) is future:
+                del self._calls[key]
+            if isinstance(error, Abandoned):
+                self._stats["abandoned"] += 1
+        if error is not None:
+            future.set_exception(error)
+        else:
+            future.set_result(result)
+
+    def do(self, key: Hashable, fn: Callable):
+        while True:
+            future, leader = self.join(key)
+            if not leader:
+                try:
+                    return future.result()
+                except Abandoned:
+                    continue
+            try:
+                result = fn()
+            except BaseException as e:
+                self.finish(key, future, error=e if isinstance(e, Exception) else Abandoned())
+                raise
+            self.finish(key, future, result=result)
+            return result
+
+    async def ado(self, key: Hashable, factory: Callable[[], Awaitable]):
+        while True:
+            future, leader = self.join(key)
+            if not leader:
+                try:
+                    # shield : annuler une attente n'annule pas l'appel partagé.
+                    return await asyncio.shield(asyncio.wrap_future(future))
+                except Abandoned:
+                    continue
+            try:
+                result = await factory()
+            except BaseException as e:
+                # Annulation de l'exécutant (client parti...) : les autres réessaient.
+                self.finish(key, future, error=e if isinstance(e, Exception) else Abandoned())
+                raise
+            self.finish(key, future, result=result)
+            return result
+
+    def stats(self) -> Dict:
+        with self._lock:
+            stats = dict(self._stats)
+            stats["in_flight"] = len(self._calls)
+        calls = stats["executions"] + stats["shared"]
+        stats["shared_rate"] = stats["shared"] / calls if calls else 0.0
+        return stats
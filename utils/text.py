@@ -0,0 +1,11 @@
+# Fichier : utils/text.py
+
+import re
+import unicodedata
+
+
+def normalize_text(text: str) -> str:
+    """Minuscules, sans accents ni ponctuation : 'Reykjavík ?' -> 'reykjavik'."""
+    text = unicodedata.normalize("NFKD", text)
+    text = "".join(c for c in text if not unicodedata.combining(c))
+    return " ".join(re.sub(r"[^\w]+", " ", text.lower()).split())
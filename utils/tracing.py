@@ -0,0 +1,104 @@
+# Fichier : utils/tracing.py
+# Étapes (« spans ») d'un tour : appels LLM, outils, requêtes base...
+# Chaque étape alimente toujours les métriques agrégées (utils/metrics) ; une
+# fraction des tours (TELEMETRY_SAMPLE_RATE) est en plus journalisée en JSON,
+# une ligne par étape, avec l'identifiant du tour.
+
+import json
+import logging
+import os
+import random
+import sys
+import time
+import uuid
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Dict, Iterator, Optional
+
+from utils.metrics import registry
+
+SAMPLE_RATE = float(os.getenv("TELEMETRY_SAMPLE_RATE", "0.1"))
+
+span_duration = registry.histogram(
+    "travel_agent_span_duration_seconds", "Durée des étapes par type (turn, llm, tool, db) et nom"
+)
+span_total = registry.counter(
+    "travel_agent_spans_total", "Nombre d'étapes par type, nom et statut"
+)
+
+_current_trace: ContextVar[Optional[Dict]] = ContextVar("travel_agent_trace", default=None)
+
+
+def _build_logger() -> logging.Logger:
+    """TELEMETRY_LOG = stderr (défaut) | off | chemin d'un fichier JSON lines."""
+    logger = logging.getLogger("travel_agent.telemetry")
+    logger.propagate = False
+    destination = os.getenv("TELEMETRY_LOG", "stderr")
+    if not logger.handlers and destination != "off":
+        handler = logging.StreamHandler(sys.stderr) if destination == "stderr" else logging.FileHandler(destination)
+        handler.setFormatter(logging.Formatter("%(message)s"))
+        logger.addHandler(handler)
+    logger.setLevel(logging.INFO if destination != "off" else logging.CRITICAL)
+    return logger
+
+
+_logger = _build_logger()
+
+
+def current_trace() -> Optional[Dict]:
+    return _current_trace.get()
+
+
+def record_span(kind: str, name: str, duration: float, status: str = "ok", **attrs) -> None:
+    """
+    Enregistre une étape terminée. Hors d'un tour (thread d'écoute, script),
+    la décision d'échantillonnage est prise étape par étape.
+    """
+    span_duration.observe(duration, kind=kind, name=name)
+    span_total.inc(kind=kind, name=name, status=status)
+    trace = _current_trace.get()
+    sampled = trace["sampled"] if trace is not None else random.random() < SAMPLE_RATE
+    if not sampled or not _logger.isEnabledFor(logging.INFO):
+        return
+    record = {
+        "ts": round(time.time(), 3),
+        "trace_id": trace["trace_id"] if trace is not None else None,
+        "kind": kind,
+        "name": name,
+        "duration_ms": round(duration * 1000, 2),
+        "status": status,
+    }
+    record.update(attrs)
+    _logger.info(json.dumps(record, ensure_ascii=False, default=str))
+
+
+@contextmanager
+def trace(name: str, **attrs) -> Iterator[Dict]:
+    """
+    Délimite un tour : les étapes enregistrées dans le bloc (y compris dans les
+    tâches et threads lancés depuis lui) partagent son identifiant et sa
+    décision d'échantillonnage. Le bloc peut modifier turn["name"],
+    turn["status"] et turn["attrs"] avant la fin.
+    """
+    turn = {
+        "trace_id": uuid.uuid4().hex[:16],
+        "sampled": random.random() < SAMPLE_RATE,
+        "name": name,
+        "status": "ok",
+        "attrs": dict(attrs),
+    }
+    token = _current_trace.set(turn)
+    start = time.perf_counter()
+    try:
+        yield turn
+    except BaseException:
+        turn["status"] = "error"
+        raise
+    finally:
+        record_span("turn", turn["name"], time.perf_counter() - start, turn["status"], **turn["attrs"])
+        try:
+            _current_trace.reset(token)
+        except ValueError:
+            # Générateur asynchrone fermé depuis un autre contexte (aclose par le GC) :
+            # le contexte d'origine n'existe plus, il n'y a rien à restaurer.
+            pass
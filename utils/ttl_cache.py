@@ -0,0 +1,83 @@
+# Fichier : utils/ttl_cache.py
+
+import threading
+import time
+from collections import OrderedDict
+
+
+class TTLCache:
+    """
+    Cache LRU en mémoire, thread-safe, borné en taille (max_size) et en durée
+    de vie (ttl, en secondes ; 0 = pas d'expiration). Compte les hits/misses.
+    """
+
+    _MISSING = object()
+
+    def __init__(self, max_size=256, ttl=600.0):
+        self.max_size = max_size
+        self.ttl = ttl
+        self._data = OrderedDict()  # clé -> (valeur, expire_à)
+        self._lock = threading.Lock()
+        self._stats = {"hits": 0, "misses": 0, "evictions": 0, "expirations": 0, "invalidations": 0}
+
+    def get(self, key, default=None):
+        with self._lock:
+            entry = self._data.get(key, self._MISSING)
+            if entry is self._MISSING:
+                self._stats["misses"] += 1
+                return default
+            value, expires_at = entry
+            if expires_at and expires_at <= time.monotonic():
+                del self._data[key]
+                self._stats["expirations"] += 1
+                self._stats["misses"] += 1
+                return default
+            self._data.move_to_end(key)
+            self._stats["hits"] += 1
+            return value
+
+    def set(self, key, value):
+        expires_at = time.monotonic() + self.ttl if self.ttl else 0
+        with self._lock:
+            self._data[key] = (value, expires_at)
+            self._data.move_to_end(key)
+            while len(self._data) > self.max_size:
+                self._data.popitem(last=False)
+                self._stats["evictions"] += 1
+
+    def invalidate(self, key):
+        with self._lock:
+            if self._data.pop(key, self._MISSING) is not self._MISSING:
+                self._stats["invalidations"] += 1
+
+    def invalidate_where(self, predicate):
+        """Supprime toutes les clés pour lesquelles predicate(clé) est vrai."""
+        with self._lock:
+            keys = [key for key in self._data if predicate(key)]
+            for key in keys:
+                del self._data[key]
+            self._stats["invalidations"] += len(keys)
+
+    def clear(self):
+        with self._lock:
+            self._stats["invalidations"] += len(self._data)
+            self._data.clear()
+
+    def __contains__(self, key):
+        """Présence d'une entrée non expirée, sans compter de hit ni de miss."""
+        with self._lock:
+            entry = self._data.get(key, self._MISSING)
+            return entry is not self._MISSING and not (entry[1] and entry[1] <= time.monotonic())
+
+    def __len__(self):
+        with self._lock:
+            return len(self._data)
+
+    def stats(self):
+        with self._lock:
+            stats = dict(self._stats)
+            stats["size"] = len(self._data)
+            stats["max_size"] = self.max_size
+        lookups = stats["hits"] + stats["misses"]
+        stats["hit_rate"] = stats["hits"] / lookups if lookups else 0.0
+        return stats